@@ -0,0 +1,30 @@
+import argparse
+import json
+import sys
+
+from dice import Die, load_die_definitions
+from utils.audit import write_audit
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scores existing die layouts by the sd of their vertex weights")
+    parser.add_argument("die", help="a name from data/standard_dice.json, or the path of a json die definition")
+    parser.add_argument("layouts", help="a .csv, .jsonl or .npy file of layouts, with face values in face order")
+    parser.add_argument("--best-sd", type=float, default=None, help="the sd of the best known layout")
+    parser.add_argument("--output", default=None, help="the file to write, standard output by default")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    definitions = load_die_definitions()
+    if args.die in definitions:
+        definition = definitions[args.die]
+    else:
+        with open(args.die) as f:
+            definition = json.load(f)
+
+    chunks = Die.from_dict(definition).audit_layouts(args.layouts, best_sd=args.best_sd, chunk_size=args.chunk_size)
+    if args.output is None:
+        write_audit(chunks, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="") as out:
+            write_audit(chunks, out, args.format)
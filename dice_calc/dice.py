@@ -1,19 +1,53 @@
 import datetime
+import functools
+import json
+import multiprocessing
+import os
+from math import factorial, inf
+from time import time_ns
+
 import numpy as np
 
+from utils.audit import audit_layouts, read_layout_chunks
+from utils.bounds import BOUND_TOLERANCE, OptimalityCertificate, vertex_weight_sd_lower_bound
+from utils.branch_and_bound import branch_and_bound_optimum
+from utils.compiled import OBJECTIVES, CompiledDie, Placement, evaluate
 from utils.decorators import timed
-from utils.generators import paired_face_weights_locked_one, face_weights_locked_one
-from utils.graphs import Edge, WeightedVertex, UndirectedPath, UndirectedCycle
+from utils.frontier import frontier_dp_optimum
+from utils.geometry import DieGeometry
+from utils.generators import paired_face_weights_locked_one, face_weights_locked_one, batched_face_weights, \
+    paired_face_weights_from_low_values, face_weights_locked_one_from_perms, ranked_placements, FACE_WEIGHT_DTYPE
+from utils.graphs import Edge, WeightedVertex, UndirectedCycle, adjacency_bitsets, dual_cycles, find_simple_cycles
+from utils.heuristics import STRATEGIES as PORTFOLIO_STRATEGIES, SwapSpace, run_portfolio
+from utils.pareto import ParetoFront
+from utils.sampling import DEFAULT_QUANTILES, SampleSummary, sample_sds
+from utils.shard_queue import ShardQueue, publish_shards, reduce_shards, shard_worker
+from utils.statistics import SdDistribution, sd_distribution_of_ranks
+from utils.tables import SdTable, write_sd_table
+
+STANDARD_DICE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "standard_dice.json")
+
+
+def load_die_definitions(path: str = STANDARD_DICE_PATH) -> dict[str, dict]:
+    """
+    Reads die definitions, see Die.from_dict for their format
+    :param path: a json file of definitions by die name
+    :return: the definitions by die name
+    """
+    with open(path) as f:
+        return json.load(f)
 
 
 class Die:
+    OBJECTIVES = OBJECTIVES
+
     cycles: list[UndirectedCycle]
     edges: list[Edge]
     verts: list[WeightedVertex]
     sides: int
 
     def __init__(self, num_faces: int, adjacent_faces: [tuple[int, int]],
-                 num_faces_on_vertices: int, opposing_faces: list[tuple[int, int]]):
+                 num_faces_on_vertices: int, opposing_faces: list[tuple[int, int]], cycles: list[list[int]] = None):
         """
         An abstract undirected graph representation of a die. Vertices in the graph represent faces on a die, and the vertex
         weights are the face values of the die. A simple cycle of a given number of vertices represents the point, or
@@ -22,6 +56,9 @@ class Die:
         Inside the class we refer to the graphical representation, but outside the graph we refer to components
         as the die components.
 
+        A Die is not thread safe. The calc_* solvers apply their weights to it and set its optimality_certificate, so
+        give each thread its own Die, or share die.compile() and score Placements with utils.compiled.evaluate.
+
         :param num_faces: the number of faces on the die. this will be the number of vertices in the graph.
         :param adjacent_faces: an edge list of faces of the die that are adjacent to each other. A list of tuples
             containing the vertex indices of the start and end vertices of an edge.
@@ -29,13 +66,152 @@ class Die:
             perfectly fair dice (D4, D6, D8, D12, D20) this will always be the same number of faces (3, 3, 4, 3, 5) within
             the die. For unfair dice (D10, D30, etc.) this may differ in the die (3 and 5, 3 and 5), which is why this
             is a list.
+        :param cycles: the die vertices as lists of face numbers, if they are already known. The cycle search is skipped
+            when they are given.
         """
         self.verts = [WeightedVertex(index=i, name=i + 1, weight=0) for i in range(num_faces)]
         self.edges = [Edge(self.verts[e[0] - 1], self.verts[e[1] - 1]) for e in adjacent_faces]
         self.opposing_faces = opposing_faces
+        self.num_faces_on_vertices = num_faces_on_vertices
         self.edge_dict = self.__get_edge_dict__()
+        self.adjacency = adjacency_bitsets(num_faces, [(e.src.index, e.dst.index) for e in self.edges])
+
+        if cycles is None:
+            self.cycles = self.__find_simple_cycles__(num_faces_on_vertices)
+        else:
+            self.cycles = [UndirectedCycle([self.verts[f - 1] for f in c]) for c in cycles]
+        self.optimality_certificate = None
+        self.geometry = None
+        self.value_masses = None
+        self.compiled = None
+
+    @classmethod
+    def from_dict(cls, definition: dict):
+        """
+        Builds a die from a definition in the format of data/standard_dice.json: num_faces, adjacent_faces, opposing_faces
+        and num_faces_on_vertices (a number, or a list of one number). Vertices that do not have that many faces are
+        listed as lists of face numbers in extra_cycles.
+        :param definition: the die definition
+        :return: the die
+        """
+        cycle_lens = definition["num_faces_on_vertices"]
+        if isinstance(cycle_lens, int):
+            cycle_lens = [cycle_lens]
+        if len(cycle_lens) != 1:
+            raise ValueError("Only one vertex size can be searched for, list the other vertices in extra_cycles")
+
+        die = cls(
+            num_faces=definition["num_faces"],
+            adjacent_faces=[tuple(e) for e in definition["adjacent_faces"]],
+            num_faces_on_vertices=cycle_lens[0],
+            opposing_faces=[tuple(p) for p in definition["opposing_faces"]],
+        )
+        die.add_cycles([UndirectedCycle([die.verts[f - 1] for f in c]) for c in definition.get("extra_cycles", [])])
+        return die
 
-        self.cycles = self.__find_simple_cycles__(num_faces_on_vertices)
+    def with_changes(self, adjacent_faces: list[tuple[int, int]] = None, opposing_faces: list[tuple[int, int]] = None):
+        """
+        Builds the die after a small change to its definition without searching for all of its vertices again. The
+        vertices that do not use a removed adjacency are kept, and only the vertices through an added adjacency are
+        searched for. Kept vertices of other sizes (extra_cycles) stay, but new ones are not looked for.
+        :param adjacent_faces: the new edge list of adjacent faces, unchanged if None
+        :param opposing_faces: the new opposing face pairs, unchanged if None
+        :return: the changed die, this die is left as it is
+        """
+        def pair(a: int, b: int) -> tuple[int, int]:
+            return min(a, b), max(a, b)
+
+        old_adjacent = [pair(e.src.name, e.dst.name) for e in self.edges]
+        new_adjacent = old_adjacent if adjacent_faces is None else [pair(*e) for e in adjacent_faces]
+        removed = set(old_adjacent) - set(new_adjacent)
+        added = set(new_adjacent) - set(old_adjacent)
+
+        kept = []
+        for cycle in self.cycles:
+            names = [v.name for v in cycle]
+            if not any(pair(a, b) in removed for a, b in zip(names, names[1:] + names[:1])):
+                kept.append(names)
+
+        die = Die(
+            num_faces=len(self.verts),
+            adjacent_faces=new_adjacent,
+            num_faces_on_vertices=self.num_faces_on_vertices,
+            opposing_faces=list(self.opposing_faces if opposing_faces is None else opposing_faces),
+            cycles=kept,
+        )
+        added_edges = [e for e in die.edges if pair(e.src.name, e.dst.name) in added]
+        known = set(die.cycles)
+        die.add_cycles([c for c in die.__find_simple_cycles__(self.num_faces_on_vertices, added_edges)
+                        if c not in known])
+        return die
+
+    def dual(self, opposing_faces: list[tuple[int, int]] = None):
+        """
+        Builds the die with its numbers on its corners instead of its faces, as the dual graph: the die's vertices become
+        the numbered faces, and its faces become the vertices. Face i of the dual is self.cycles[i - 1]. It is built in
+        linear time from the vertices, without a cycle search, and every solver works on it unchanged.
+        :param opposing_faces: the opposing corner pairs, an empty list for none. By default the corners whose faces are
+            opposite to each other's
+        :throws: a ValueError if opposing_faces is not given and this die's opposing faces do not pair every corner up
+        :return: the dual die
+        """
+        corners = self.__get_cycle_face_indices__()
+        edges, faces = dual_cycles(corners)
+        if opposing_faces is None:
+            opposite = {i - 1: j - 1 for i, j in self.opposing_faces}
+            opposite.update({j: i for i, j in opposite.items()})
+            by_faces = {frozenset(c): i for i, c in enumerate(corners)}
+            mirrors = [by_faces.get(frozenset(opposite.get(f) for f in c)) for c in corners]
+            unpaired = [i for i, m in enumerate(mirrors) if m is None or m == i]
+            if unpaired:
+                raise ValueError("The opposing faces do not pair up the corners: the faces {} of corner {} are not opposite "
+                                 "to another corner's. Give opposing_faces, an empty list for none".format(
+                                     [f + 1 for f in corners[unpaired[0]]], unpaired[0] + 1))
+            opposing_faces = sorted({(min(i, j) + 1, max(i, j) + 1) for i, j in enumerate(mirrors)})
+        return Die.__from_cycles__(len(corners), edges, faces, opposing_faces)
+
+    @classmethod
+    def from_geometry(cls, geometry: DieGeometry, number_corners: bool = False,
+                      opposing_faces: list[tuple[int, int]] = None):
+        """
+        Builds a die from an imported mesh in linear time, without a cycle search
+        :param geometry: the die's geometry
+        :param number_corners: whether the numbers are on the corners (geometry.points) rather than the faces
+        :param opposing_faces: the opposing pairs of numbered faces or corners. By default the ones that are mirror
+            images through the centroid, if the die is centrally symmetric
+        :return: the die, with the geometry attached when the faces are numbered
+        """
+        if number_corners:
+            edges = {(min(a, b), max(a, b)) for face in geometry.faces for a, b in zip(face, face[1:] + face[:1])}
+            if opposing_faces is None:
+                opposing_faces = geometry.opposing_pairs(geometry.points)
+            return cls.__from_cycles__(len(geometry.points), sorted(edges), geometry.faces, opposing_faces)
+
+        edges, corners = dual_cycles(geometry.faces)
+        if opposing_faces is None:
+            opposing_faces = geometry.opposing_pairs(geometry.face_centroids)
+        die = cls.__from_cycles__(len(geometry.faces), edges, corners, opposing_faces)
+        die.set_geometry(geometry)
+        return die
+
+    @classmethod
+    def __from_cycles__(cls, num_faces: int, edges: list[tuple[int, int]], cycles: list[list[int]],
+                        opposing_faces: list[tuple[int, int]]):
+        """
+        :param num_faces: the number of numbered faces
+        :param edges: pairs of face indices of adjacent faces
+        :param cycles: the face indices around each vertex, in order
+        :param opposing_faces: pairs of (1 based) opposing face numbers
+        :return: the die, whose most common vertex size is the one searched for by with_changes
+        """
+        sizes = [len(c) for c in cycles]
+        return cls(
+            num_faces=num_faces,
+            adjacent_faces=[(a + 1, b + 1) for a, b in edges],
+            num_faces_on_vertices=max(set(sizes), key=sizes.count),
+            opposing_faces=list(opposing_faces),
+            cycles=[[f + 1 for f in c] for c in cycles],
+        )
 
     def __get_edge_dict__(self) -> dict[WeightedVertex, set[WeightedVertex]]:
         edge_dict = {}
@@ -55,32 +231,16 @@ class Die:
 
         return edge_dict
 
-    def __find_simple_cycles__(self, cycle_len: int) -> list[UndirectedCycle]:
+    def __find_simple_cycles__(self, cycle_len: int, edges: list[Edge] = None) -> list[UndirectedCycle]:
         """
-        Finds all unique, undirected, simple cycles of a specific length in an edge_list.
-        :param edges: The undirected edge list of the graph
-        :param cycle_lens: The number of unique vertices in the cycles. The first vertex counts as the first and last.
+        Finds all unique, undirected, simple cycles of a specific length, searching the adjacency bitsets.
+        :param cycle_len: The number of unique vertices in the cycles. The first vertex counts as the first and last.
+        :param edges: Only find the cycles through these edges. All of the graph's edges by default
         :return: A list of unique simple cycles in the graph. The closing edge goes from the last to the first vertex
         """
-
-        def cycle_helper(all_cycles: set, curr_path: UndirectedPath, cycle_len: int):
-            if len(curr_path) == cycle_len + 1:
-                if curr_path.can_be_simple_cycle():
-                    all_cycles.add(curr_path.get_cycle())
-            elif len(curr_path) < cycle_len + 1:
-                for v in self.edge_dict[curr_path[-1]]:
-                    curr_path.append(v)
-                    cycle_helper(all_cycles, curr_path, cycle_len)
-                    curr_path.pop()
-            # Prevent infinite recursion
-            else:
-                raise ValueError("Somehow the path is longer than it should be allowed")
-
-        all_cycles = set()
-        for e in self.edges:
-            cycle_helper(all_cycles, UndirectedPath(verts=[e.src, e.dst]), cycle_len)
-
-        return list(all_cycles)
+        if edges is not None:
+            edges = [(e.src.index, e.dst.index) for e in edges]
+        return [UndirectedCycle([self.verts[i] for i in c]) for c in find_simple_cycles(self.adjacency, cycle_len, edges)]
 
     def __get_vertex_weights__(self) -> list[float]:
         """
@@ -104,46 +264,738 @@ class Die:
         for i, w in enumerate(weights):
             self.verts[i].weight = w
 
+    def set_geometry(self, geometry: DieGeometry, value_masses: np.ndarray = None):
+        """
+        Attaches the solid shape of the die so that placements can be scored by their geometric balance
+        :param geometry: the die's geometry, its faces must be adjacent exactly where the die's faces are
+        :param value_masses: an optional lookup of the mass each face value represents, indexed by the value (see
+            DieGeometry.engraving_masses). The face value itself is used when not given
+        :return: None
+        """
+        if len(geometry.faces) != len(self.verts):
+            raise ValueError("The geometry has {} faces, the die has {}".format(len(geometry.faces), len(self.verts)))
+        die_adjacent_faces = {(min(e.src.name, e.dst.name), max(e.src.name, e.dst.name)) for e in self.edges}
+        if geometry.adjacent_faces() != die_adjacent_faces:
+            raise ValueError("The geometry's faces are not adjacent in the same way as the die's faces")
+        self.geometry = geometry
+        self.value_masses = value_masses
+        self.compiled = None
+
+    def __get_cycle_face_indices__(self) -> list[list[int]]:
+        """
+        :return: the face indices around each vertex of the die
+        """
+        return [[v.index for v in cycle] for cycle in self.cycles]
+
+    def calc_vertex_weight_sd_lower_bound(self) -> float:
+        """
+        Calculates a proven lower bound on the standard deviation of die vertex weights that any face value placement can
+        reach. Searches stop as soon as they find a placement that meets it.
+        :return: the lower bound
+        """
+        return vertex_weight_sd_lower_bound(self.__get_cycle_face_indices__(), list(range(1, len(self.verts) + 1)))
+
+    def __iter_optimum_face_weights__(self, weights_generator, locked_opposing_faces: bool, objective: str,
+                                      block_size: int, cancel):
+        """
+        Scans the weights from a generator, a block at a time, for the weight positioning that minimizes an objective,
+        yielding every improvement as soon as it is found. The scan stops early if a placement meets the objective's
+        lower bound or cancel is set, and records how the result was proven in self.optimality_certificate.
+        :param weights_generator: an iterable of face weights to try
+        :param locked_opposing_faces: whether the generator only gives placements whose opposing faces add up to the
+            same value
+        :param objective: a name from Die.OBJECTIVES, or "geometric_moment" for dice with a geometry
+        :param block_size: the number of placements scored together
+        :param cancel: an optional threading.Event, the scan stops at the next block once it is set
+        :return: a generator of (weights, objective score, elapsed ms) for each new best placement
+        """
+        start = time_ns()
+        compiled = self.compile()
+        if objective == "vertex_weight_sd":
+            # compare the exact integer objective, so that ties go to the first placement generated
+            key, to_score = compiled.vertex_weight_objective, compiled.objective_sd
+            lower_bound = self.calc_vertex_weight_sd_lower_bound()
+        else:
+            key, to_score = compiled.objective(objective), np.asarray
+            lower_bound = 0.0
+        optimal_key = None
+        optimal_weights_sd = inf
+        reason = "unproven"
+        placements_checked = 0
+
+        try:
+            for block in batched_face_weights(weights_generator, block_size):
+                if cancel is not None and cancel.is_set():
+                    return
+                keys = key(block)
+                scores = to_score(keys)
+                meeting = np.flatnonzero(scores <= lower_bound + BOUND_TOLERANCE)
+                i = meeting[0] if len(meeting) else np.argmin(keys)
+                placements_checked += i + 1 if len(meeting) else len(block)
+                if optimal_key is None or keys[i] < optimal_key:
+                    optimal_key = keys[i]
+                    optimal_weights_sd = float(scores[i])
+                    yield [int(w) for w in block[i]], optimal_weights_sd, (time_ns() - start) / 1000000
+                if len(meeting):
+                    reason = "bound"
+                    break
+            else:
+                reason = "exhausted"
+        finally:
+            # a search that was cancelled before its first block, or had nothing to scan, has no result to certify
+            self.optimality_certificate = None if not placements_checked else OptimalityCertificate(
+                sd=optimal_weights_sd,
+                lower_bound=lower_bound,
+                proven_optimal=reason != "unproven",
+                reason=reason,
+                placements_checked=int(placements_checked),
+                objective=objective,
+                locked_opposing_faces=locked_opposing_faces,
+            )
+
+    def __apply_last__(self, improvements) -> float:
+        """
+        Runs an anytime solver to the end and applies the best weights it found to the die
+        :param improvements: a generator of (weights, score, elapsed ms)
+        :throws: a ValueError if the solver found no placement, because it was cancelled or had none to search
+        :return: the score of the best weights
+        """
+        weights, score = None, None
+        for weights, score, _ in improvements:
+            pass
+        if weights is None:
+            raise ValueError("The search ended without finding a placement")
+        self.__assign_weights__(weights)
+        return score
+
+    def iter_optimum_face_weights_locked_opposing_faces(self, objective: str = "vertex_weight_sd",
+                                                        block_size: int = 4096, cancel=None):
+        """
+        The anytime version of calc_optimum_face_weights_locked_opposing_faces. Does not apply the weights to the die,
+        but sets self.optimality_certificate when the search stops.
+        :param objective: a name from Die.OBJECTIVES or "geometric_moment"
+        :param block_size: the number of placements scored together
+        :param cancel: an optional threading.Event that stops the search cleanly once set
+        :throws: a ValueError if some face has no opposing face
+        :return: a generator of (weights, objective score, elapsed ms) for each new best placement
+        """
+        # checked here rather than in the generator, which would fail on the missing pairs with a bare list error
+        self.__get_placement_units__(locked_opposing_faces=True)
+        return self.__iter_optimum_face_weights__(
+            paired_face_weights_locked_one(num_faces=len(self.verts), opp_faces=list(self.opposing_faces)), True,
+            objective, block_size, cancel
+        )
+
+    def iter_optimum_face_weights_free_opposing_faces(self, objective: str = "vertex_weight_sd",
+                                                      block_size: int = 4096, cancel=None):
+        """
+        The anytime version of calc_optimum_face_weights_free_opposing_faces. Does not apply the weights to the die,
+        but sets self.optimality_certificate when the search stops.
+        :param objective: a name from Die.OBJECTIVES or "geometric_moment"
+        :param block_size: the number of placements scored together
+        :param cancel: an optional threading.Event that stops the search cleanly once set
+        :return: a generator of (weights, objective score, elapsed ms) for each new best placement
+        """
+        return self.__iter_optimum_face_weights__(
+            face_weights_locked_one(num_faces=len(self.verts)), False, objective, block_size, cancel
+        )
+
     @timed
-    def calc_optimum_face_weights_locked_opposing_faces(self):
+    def calc_optimum_face_weights_locked_opposing_faces(self, objective: str = "vertex_weight_sd"):
         """
         Finds the weight (face number) positioning that minimizes the standard deviation of die vertex weights, keeping
         facial symmetry (average of opposing faces is identical) a requirement.
-        :return: a string representation of face ids and the weights attributed.
+        :param objective: what to minimize instead of the vertex weight sd, a name from Die.OBJECTIVES or
+            "geometric_moment"
+        :return: the objective score (by default the standard deviation of die vertex weights) of the optimal
+            positioning, which is applied to the die
+        """
+        return self.__apply_last__(self.iter_optimum_face_weights_locked_opposing_faces(objective=objective))
+
+    @timed
+    def calc_optimum_face_weights_free_opposing_faces(self, objective: str = "vertex_weight_sd"):
+        """
+        Finds the weight (face number) positioning that minimizes the standard deviation of die vertex weights.
+        :param objective: what to minimize instead of the vertex weight sd, a name from Die.OBJECTIVES or
+            "geometric_moment"
+        :return: the objective score (by default the standard deviation of die vertex weights) of the optimal
+            positioning, which is applied to the die
+        """
+        return self.__apply_last__(self.iter_optimum_face_weights_free_opposing_faces(objective=objective))
+
+    def __get_placement_units__(self, locked_opposing_faces: bool):
+        """
+        Describes the same search spaces as the weight generators as units of faces that are assigned together and the
+        values each unit can take. Face 1 always gets the value 1, and with locked opposing faces each opposing pair is a
+        unit whose first face gets the lower value.
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :return: a list of face index tuples, and for each of them a list of value tuples
+        """
+        num_faces = len(self.verts)
+        if not locked_opposing_faces:
+            units = [(f,) for f in range(num_faces)]
+            options = [[(1,)]] + [[(v,) for v in range(2, num_faces + 1)] for _ in range(num_faces - 1)]
+            return units, options
+
+        if 2 * len(self.opposing_faces) != num_faces:
+            raise ValueError("Locking opposing faces needs every face in an opposing pair")
+        units = []
+        options = []
+        for i, j in self.opposing_faces:
+            if i == 1 or j == 1:
+                units.insert(0, (0, i + j - 2))
+                options.insert(0, [(1, num_faces)])
+            else:
+                units.append((i - 1, j - 1))
+                options.append([(v, num_faces + 1 - v) for v in range(2, num_faces // 2 + 1)])
+        return units, options
+
+    def __iter_optimum_face_weights_dp__(self, locked_opposing_faces: bool, cancel):
         """
-        optimal_weights = [0] * len(self.verts)
-        optimal_weights_sd = 99999999999999
+        Finds the optimal weights with the exact frontier dynamic program rather than by scanning every permutation. The
+        dynamic program only knows a placement once it is done, so it yields once.
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param cancel: an optional threading.Event that stops the search cleanly once set
+        :return: a generator of (weights, sd, elapsed ms)
+        """
+        start = time_ns()
+        units, options = self.__get_placement_units__(locked_opposing_faces)
+        result = frontier_dp_optimum(self.__get_cycle_face_indices__(), units, options, cancel=cancel)
+        if result is None:
+            return
+        weights, sd, states_kept = result
 
-        for weights in paired_face_weights_locked_one(num_faces=len(self.verts), opp_faces=self.opposing_faces):
-            self.__assign_weights__(weights=weights)
-            sd = np.std(self.__get_vertex_weights__())
-            if sd < optimal_weights_sd:
-                optimal_weights = weights
-                optimal_weights_sd = sd
+        self.optimality_certificate = OptimalityCertificate(
+            sd=sd,
+            lower_bound=self.calc_vertex_weight_sd_lower_bound(),
+            proven_optimal=True,
+            reason="exact",
+            placements_checked=states_kept,
+            locked_opposing_faces=locked_opposing_faces,
+        )
+        yield weights, sd, (time_ns() - start) / 1000000
 
-        # apply and return the best weights
-        self.__assign_weights__(optimal_weights)
-        return optimal_weights_sd
+    def iter_optimum_face_weights_locked_opposing_faces_dp(self, cancel=None):
+        """
+        The anytime version of calc_optimum_face_weights_locked_opposing_faces_dp. Does not apply the weights to the die,
+        but sets self.optimality_certificate when the search stops.
+        :param cancel: an optional threading.Event that stops the search cleanly once set
+        :return: a generator of (weights, sd, elapsed ms)
+        """
+        return self.__iter_optimum_face_weights_dp__(locked_opposing_faces=True, cancel=cancel)
+
+    def iter_optimum_face_weights_free_opposing_faces_dp(self, cancel=None):
+        """
+        The anytime version of calc_optimum_face_weights_free_opposing_faces_dp. Does not apply the weights to the die,
+        but sets self.optimality_certificate when the search stops.
+        :param cancel: an optional threading.Event that stops the search cleanly once set
+        :return: a generator of (weights, sd, elapsed ms)
+        """
+        return self.__iter_optimum_face_weights_dp__(locked_opposing_faces=False, cancel=cancel)
 
     @timed
-    def calc_optimum_face_weights_free_opposing_faces(self):
+    def calc_optimum_face_weights_locked_opposing_faces_dp(self):
         """
-        Finds the weight (face number) positioning that minimizes the standard deviation of die vertex weights.
-        :return: a string representation of face ids and the weights attributed.
+        Finds the same optimum as calc_optimum_face_weights_locked_opposing_faces with a dynamic program over face
+        subsets, which is far cheaper for the larger dice.
+        :return: the standard deviation of die vertex weights of the optimal positioning, which is applied to the die
+        """
+        return self.__apply_last__(self.iter_optimum_face_weights_locked_opposing_faces_dp())
+
+    @timed
+    def calc_optimum_face_weights_free_opposing_faces_dp(self):
+        """
+        Finds the same optimum as calc_optimum_face_weights_free_opposing_faces with a dynamic program over face subsets,
+        which is far cheaper for the larger dice.
+        :return: the standard deviation of die vertex weights of the optimal positioning, which is applied to the die
+        """
+        return self.__apply_last__(self.iter_optimum_face_weights_free_opposing_faces_dp())
+
+    def __optimum_face_weights_bnb__(self, locked_opposing_faces: bool, processes: int,
+                                     incumbent_weights: list[int] = None) -> float:
+        """
+        Finds the optimal weights with the parallel branch and bound, and applies them to the die
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param processes: the number of worker processes, defaults to the number of cpus
+        :param incumbent_weights: an optional placement in the search space to prune with from the start
+        :return: the standard deviation of die vertex weights of the optimal positioning
+        """
+        units, options = self.__get_placement_units__(locked_opposing_faces)
+        lower_bound = self.calc_vertex_weight_sd_lower_bound()
+        weights, _, nodes, met_bound = branch_and_bound_optimum(self.__get_cycle_face_indices__(), units, options,
+                                                                processes=processes, target_sd=lower_bound,
+                                                                incumbent_weights=incumbent_weights)
+        # the bounds are floating point, report the exact sd
+        sd = self.calc_vertex_weight_sd(weights)
+        self.__assign_weights__(weights)
+        self.optimality_certificate = OptimalityCertificate(
+            sd=sd,
+            lower_bound=lower_bound,
+            proven_optimal=True,
+            reason="bound" if met_bound else "exhausted",
+            placements_checked=nodes,
+            locked_opposing_faces=locked_opposing_faces,
+        )
+        return sd
+
+    @timed
+    def calc_optimum_face_weights_locked_opposing_faces_bnb(self, processes: int = None):
+        """
+        Finds the same optimum as calc_optimum_face_weights_locked_opposing_faces with a branch and bound whose worker
+        processes share the best sd found and hand subtrees to idle workers.
+        :param processes: the number of worker processes, defaults to the number of cpus
+        :return: the standard deviation of die vertex weights of the optimal positioning, which is applied to the die
         """
-        optimal_weights = [0] * len(self.verts)
-        optimal_weights_sd = 99999999999999
+        return self.__optimum_face_weights_bnb__(locked_opposing_faces=True, processes=processes)
 
-        for weights in face_weights_locked_one(num_faces=len(self.verts)):
-            self.__assign_weights__(weights=weights)
-            sd = np.std(self.__get_vertex_weights__())
-            if sd < optimal_weights_sd:
-                optimal_weights = weights
-                optimal_weights_sd = sd
+    @timed
+    def calc_optimum_face_weights_free_opposing_faces_bnb(self, processes: int = None):
+        """
+        Finds the same optimum as calc_optimum_face_weights_free_opposing_faces with a branch and bound whose worker
+        processes share the best sd found and hand subtrees to idle workers.
+        :param processes: the number of worker processes, defaults to the number of cpus
+        :return: the standard deviation of die vertex weights of the optimal positioning, which is applied to the die
+        """
+        return self.__optimum_face_weights_bnb__(locked_opposing_faces=False, processes=processes)
+
+    def __check_placement__(self, weights: list[int], locked_opposing_faces: bool):
+        """
+        :param weights: the face weights of a placement
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :throws: a ValueError if the placement does not put each value from 1 to the number of faces on one face, or
+            breaks a locked opposing pair
+        """
+        num_faces = len(self.verts)
+        if sorted(int(w) for w in weights) != list(range(1, num_faces + 1)):
+            raise ValueError("The placement {} does not put the values 1 to {} on the faces".format(weights, num_faces))
+        if locked_opposing_faces and any(weights[i - 1] + weights[j - 1] != num_faces + 1 for i, j in self.opposing_faces):
+            raise ValueError("The placement {} breaks an opposing face pair".format(weights))
+
+    def __remap_placement__(self, weights: list[int], locked_opposing_faces: bool) -> list[int]:
+        """
+        Turns a placement, for example the optimum of the die before a change, into a placement of this die's search
+        space that keeps as much of it as possible
+        :param weights: the face weights, a permutation of 1 to the number of faces
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :return: the face weights in the search space
+        """
+        num_faces = len(self.verts)
+        weights = [int(w) for w in weights]
+        if sorted(weights) != list(range(1, num_faces + 1)):
+            raise ValueError("The placement does not put the values 1 to {} on the faces".format(num_faces))
+        if not locked_opposing_faces:
+            one = weights.index(1)
+            weights[0], weights[one] = weights[one], weights[0]
+            return weights
+
+        remapped = [0] * num_faces
+        free_low_values = set(range(2, num_faces // 2 + 1))
+        broken_pairs = []
+        for i, j in self.opposing_faces:
+            if 1 in (i, j):
+                remapped[0], remapped[i + j - 2] = 1, num_faces
+                continue
+            low = min(weights[i - 1], weights[j - 1])
+            if weights[i - 1] + weights[j - 1] == num_faces + 1 and low in free_low_values:
+                remapped[i - 1], remapped[j - 1] = low, num_faces + 1 - low
+                free_low_values.remove(low)
+            else:
+                broken_pairs.append((i, j))
+        for (i, j), low in zip(broken_pairs, sorted(free_low_values)):
+            remapped[i - 1], remapped[j - 1] = low, num_faces + 1 - low
+        return remapped
+
+    @timed
+    def calc_optimum_face_weights_seeded(self, seed_weights: list[int], locked_opposing_faces: bool = False,
+                                         processes: int = None):
+        """
+        Finds the optimum with a branch and bound whose first incumbent is a known placement, for example the optimum
+        of the die before a small change (see with_changes). This is a seeded re-solve, not a warm start: no bounds or
+        subtrees of the earlier search are reused, the seed only prunes from the first node. It helps when the seed is
+        much better than the first placement a fresh search finds, and costs about as much as a fresh search otherwise.
+        :param seed_weights: the face weights of the seed placement, remapped into this die's search space
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param processes: the number of worker processes, defaults to the number of cpus
+        :return: the standard deviation of die vertex weights of the optimal positioning, which is applied to the die
+        """
+        incumbent_weights = self.__remap_placement__(seed_weights, locked_opposing_faces)
+        return self.__optimum_face_weights_bnb__(locked_opposing_faces, processes, incumbent_weights)
+
+    @timed
+    def calc_optimum_face_weights_portfolio(self, locked_opposing_faces: bool = False, time_budget: float = 10.0,
+                                            target_sd: float = None, processes: int = None,
+                                            strategies: tuple[str, ...] = PORTFOLIO_STRATEGIES, seed: int = 0):
+        """
+        Searches for a good weight positioning with a portfolio of annealing, tabu and random restart workers in
+        parallel processes that share their best placement, for dice too large to solve exactly. The result is only
+        proven optimal if it meets the lower bound.
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param time_budget: the number of seconds to search for
+        :param target_sd: stop as soon as a placement is this good, defaults to the lower bound
+        :param processes: the number of worker processes, defaults to the number of cpus
+        :param strategies: names from utils.heuristics.STRATEGIES, given to the workers in turn
+        :param seed: the seed of the first worker's random generator
+        :return: the standard deviation of die vertex weights of the best positioning found, which is applied to the die
+        """
+        units, options = self.__get_placement_units__(locked_opposing_faces)
+        space = SwapSpace(self.compile().incidence, units, options)
+        lower_bound = self.calc_vertex_weight_sd_lower_bound()
+        target_sd = lower_bound if target_sd is None else target_sd
+        assignment, _, evaluations = run_portfolio(space, time_budget, target_sd, processes, strategies, seed)
+
+        weights = space.weights(assignment)
+        self.__check_placement__(weights, locked_opposing_faces)
+        # the workers keep floating point vertex weights, report the exact sd
+        sd = self.calc_vertex_weight_sd(weights)
+        self.__assign_weights__(weights)
+        meets_bound = sd <= lower_bound + BOUND_TOLERANCE
+        self.optimality_certificate = OptimalityCertificate(
+            sd=sd,
+            lower_bound=lower_bound,
+            proven_optimal=meets_bound,
+            reason="bound" if meets_bound else "unproven",
+            placements_checked=evaluations,
+            locked_opposing_faces=locked_opposing_faces,
+        )
+        return sd
+
+    def publish_optimum_search(self, path: str, locked_opposing_faces: bool = False, shard_size: int = 1 << 22,
+                               block_size: int = 65536) -> bool:
+        """
+        Publishes the exhaustive search of a placement space as shards in a SQLite file, for workers on any node that
+        shares the file to lease (see utils.shard_queue.shard_worker). Publishing the same search again resumes it.
+        :param path: the SQLite file of the queue
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param shard_size: about the number of placements per shard
+        :param block_size: the number of placements the workers score together
+        :return: whether the search was new
+        """
+        num_placements, _ = self.__get_ranked_placements__(locked_opposing_faces)
+        job = dict(self.__get_table_metadata__(locked_opposing_faces), block_size=block_size)
+        return publish_shards(path, job, num_placements, shard_size)
+
+    def collect_optimum_face_weights(self, path: str) -> float:
+        """
+        Merges the shard optima of a finished search published with publish_optimum_search, and applies the optimum
+        :param path: the SQLite file of the queue
+        :throws: a ValueError if the search was not published for this die or has unfinished shards
+        :return: the standard deviation of die vertex weights of the optimal positioning
+        """
+        queue = ShardQueue(path)
+        try:
+            job = queue.job()
+        finally:
+            queue.close()
+        if job is None or any(job[k] != v for k, v in self.__get_table_metadata__(job["locked_opposing_faces"]).items()):
+            raise ValueError("The search at {} was not published for this die".format(path))
+
+        _, _, weights, _ = reduce_shards(path)
+        sd = self.calc_vertex_weight_sd(weights)
+        self.__assign_weights__(weights)
+        num_placements, _ = self.__get_ranked_placements__(job["locked_opposing_faces"])
+        self.optimality_certificate = OptimalityCertificate(
+            sd=sd,
+            lower_bound=self.calc_vertex_weight_sd_lower_bound(),
+            proven_optimal=True,
+            reason="exhausted",
+            placements_checked=num_placements,
+            locked_opposing_faces=job["locked_opposing_faces"],
+        )
+        return sd
+
+    @timed
+    def calc_optimum_face_weights_distributed(self, path: str, locked_opposing_faces: bool = False,
+                                              processes: int = None, shard_size: int = 1 << 22,
+                                              block_size: int = 65536, lease_seconds: float = 60.0):
+        """
+        Runs a sharded exhaustive search with local worker processes, see publish_optimum_search. Workers on other
+        nodes can join by running utils.shard_queue.shard_worker on the same file, and an interrupted search resumes
+        where it left off.
+        :param path: the SQLite file of the queue
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param processes: the number of local worker processes, defaults to the number of cpus
+        :param shard_size: about the number of placements per shard
+        :param block_size: the number of placements the workers score together
+        :param lease_seconds: how long a shard stays leased to a worker without a heartbeat
+        :return: the standard deviation of die vertex weights of the optimal positioning, which is applied to the die
+        """
+        self.publish_optimum_search(path, locked_opposing_faces, shard_size, block_size)
+        processes = processes or multiprocessing.cpu_count()
+        if processes == 1:
+            shard_worker(path, lease_seconds=lease_seconds)
+        else:
+            workers = [multiprocessing.Process(target=shard_worker, args=(path,), kwargs={"lease_seconds": lease_seconds})
+                       for _ in range(processes)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        return self.collect_optimum_face_weights(path)
+
+    def compile(self) -> CompiledDie:
+        """
+        Freezes the die's topology and everything its scoring needs, built once and then shared. Placements are scored
+        against it with utils.compiled.evaluate, which never touches the die.
+        :return: the compiled die
+        """
+        if self.compiled is None:
+            geometry = {}
+            if self.geometry is not None:
+                geometry = {"lever_arms": self.geometry.lever_arms(), "value_masses": self.value_masses}
+            self.compiled = CompiledDie(
+                num_faces=len(self.verts),
+                cycles=self.__get_cycle_face_indices__(),
+                edges=[(e.src.index, e.dst.index) for e in self.edges],
+                opposing_faces=self.opposing_faces,
+                **geometry,
+            )
+        return self.compiled
+
+    def __get_objective_functions__(self, objectives: list[str]):
+        """
+        :param objectives: names from Die.OBJECTIVES
+        :return: a function for each objective that scores a block of face weights
+        """
+        compiled = self.compile()
+        return [compiled.objective(name) for name in objectives]
+
+    def __iter_pareto_front__(self, weights_generator, objectives: list[str], block_size: int, max_front_size: int,
+                              cancel):
+        """
+        Scores every placement from a generator against all objectives in one pass, keeping the placements that no other
+        placement beats in every objective.
+        :param weights_generator: an iterable of face weights to try
+        :param objectives: names from Die.OBJECTIVES
+        :param block_size: the number of placements scored together
+        :param max_front_size: the maximum number of placements kept on the front
+        :param cancel: an optional threading.Event that stops the search cleanly once set
+        :return: a generator of (a copy of the Pareto front, elapsed ms) for every change to the front
+        """
+        start = time_ns()
+        functions = self.__get_objective_functions__(objectives)
+        front = ParetoFront(objectives, max_size=max_front_size)
+        for block in batched_face_weights(weights_generator, block_size):
+            if cancel is not None and cancel.is_set():
+                return
+            if front.update(np.column_stack([f(block) for f in functions]), block):
+                yield front.copy(), (time_ns() - start) / 1000000
+
+    def iter_pareto_face_weights_locked_opposing_faces(self, objectives: list[str] = OBJECTIVES, block_size: int = 4096,
+                                                       max_front_size: int = 64, cancel=None):
+        """
+        The anytime version of calc_pareto_face_weights_locked_opposing_faces
+        :param objectives: names from Die.OBJECTIVES
+        :param block_size: the number of placements scored together
+        :param max_front_size: the maximum number of placements kept on the front
+        :param cancel: an optional threading.Event that stops the search cleanly once set
+        :return: a generator of (a copy of the Pareto front, elapsed ms) for every change to the front
+        """
+        return self.__iter_pareto_front__(
+            paired_face_weights_locked_one(num_faces=len(self.verts), opp_faces=list(self.opposing_faces)),
+            objectives, block_size, max_front_size, cancel
+        )
+
+    def iter_pareto_face_weights_free_opposing_faces(self, objectives: list[str] = OBJECTIVES, block_size: int = 4096,
+                                                     max_front_size: int = 64, cancel=None):
+        """
+        The anytime version of calc_pareto_face_weights_free_opposing_faces
+        :param objectives: names from Die.OBJECTIVES
+        :param block_size: the number of placements scored together
+        :param max_front_size: the maximum number of placements kept on the front
+        :param cancel: an optional threading.Event that stops the search cleanly once set
+        :return: a generator of (a copy of the Pareto front, elapsed ms) for every change to the front
+        """
+        return self.__iter_pareto_front__(
+            face_weights_locked_one(num_faces=len(self.verts)), objectives, block_size, max_front_size, cancel
+        )
+
+    @timed
+    def calc_pareto_face_weights_locked_opposing_faces(self, objectives: list[str] = OBJECTIVES, block_size: int = 4096,
+                                                       max_front_size: int = 64):
+        """
+        Finds the placements, with facial symmetry a requirement, that are not beaten in every objective at once by any
+        other placement. Does not change the die.
+        :param objectives: names from Die.OBJECTIVES
+        :param block_size: the number of placements scored together
+        :param max_front_size: the maximum number of placements kept on the front
+        :return: the Pareto front of placements
+        """
+        front = ParetoFront(objectives, max_size=max_front_size)
+        for front, _ in self.iter_pareto_face_weights_locked_opposing_faces(objectives, block_size, max_front_size):
+            pass
+        return front
+
+    @timed
+    def calc_pareto_face_weights_free_opposing_faces(self, objectives: list[str] = OBJECTIVES, block_size: int = 4096,
+                                                     max_front_size: int = 64):
+        """
+        Finds the placements that are not beaten in every objective at once by any other placement. Does not change the
+        die.
+        :param objectives: names from Die.OBJECTIVES
+        :param block_size: the number of placements scored together
+        :param max_front_size: the maximum number of placements kept on the front
+        :return: the Pareto front of placements
+        """
+        front = ParetoFront(objectives, max_size=max_front_size)
+        for front, _ in self.iter_pareto_face_weights_free_opposing_faces(objectives, block_size, max_front_size):
+            pass
+        return front
+
+    def calc_vertex_weight_sd(self, weights: list[int]) -> float:
+        """
+        Calculates the standard deviation of die vertex weights of a placement without changing the die
+        :param weights: the face weights, in face order
+        :return: the standard deviation
+        """
+        return evaluate(self.compile(), Placement(weights))
+
+    def audit_layouts(self, source, best_sd: float = None, chunk_size: int = 65536):
+        """
+        Scores existing layouts of the die in chunks, without changing the die. See utils.audit.read_layout_chunks for the
+        sources it reads and utils.audit.write_audit to stream the results out.
+        :param source: a 2d array of face weights, or the path of a .npy, .csv or .jsonl file of them
+        :param best_sd: the sd of the best known placement to measure gaps from. Defaults to the result of the last
+            search on the die if it minimized the vertex weight sd over every placement, no gaps are reported if there
+            was no search
+        :param chunk_size: the number of layouts scored together
+        :throws: a ValueError if best_sd is not given and the last search had another objective or locked opposing faces
+        :return: a generator of AuditChunks with the sd, sd ratio and optimum gap of each layout
+        """
+        certificate = self.optimality_certificate
+        if best_sd is None and certificate is not None:
+            if certificate.objective != "vertex_weight_sd" or certificate.locked_opposing_faces:
+                raise ValueError("The last search on the die did not minimize the vertex weight sd over every placement, "
+                                 "give best_sd")
+            best_sd = certificate.sd
+        return audit_layouts(self.compile(), read_layout_chunks(source, len(self.verts), chunk_size), best_sd)
+
+    def __get_ranked_placements__(self, locked_opposing_faces: bool):
+        """
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :return: the number of placements in the search space, and a picklable function from (start, stop) to the block
+            of placements with those ranks
+        """
+        return ranked_placements(len(self.verts), self.opposing_faces, locked_opposing_faces)
+
+    @timed
+    def calc_vertex_weight_sd_distribution(self, locked_opposing_faces: bool = False, bins: int = 1000,
+                                           processes: int = None, block_size: int = 65536):
+        """
+        Summarizes the standard deviation of die vertex weights over every placement in a search space, split across
+        worker processes. Memory use does not grow with the size of the space.
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param bins: the number of histogram bins between 0 and the largest possible sd
+        :param processes: the number of worker processes, defaults to the number of cpus
+        :param block_size: the number of placements scored together
+        :return: the SdDistribution of the space
+        """
+        num_placements, placement_block = self.__get_ranked_placements__(locked_opposing_faces)
+        # vertex weights are averages of face values, so they can be at most half the range of the values apart
+        high = (len(self.verts) - 1) / 2
+        processes = processes or multiprocessing.cpu_count()
+        num_shards = min(num_placements, processes * 4)
+        bounds = [num_placements * i // num_shards for i in range(num_shards + 1)]
+        shards = [(self.compile(), placement_block, start, stop, bins, high, block_size)
+                  for start, stop in zip(bounds, bounds[1:])]
+
+        if processes == 1:
+            parts = [sd_distribution_of_ranks(*shard) for shard in shards]
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                parts = pool.starmap(sd_distribution_of_ranks, shards)
+
+        distribution = SdDistribution(bins, high)
+        for part in parts:
+            distribution.merge(part)
+        return distribution
+
+    def __get_sampled_placements__(self, locked_opposing_faces: bool):
+        """
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :return: the number of placements in the search space, the sorted items whose permutations make up the space,
+            and a function from a 2d array of permutations to the block of placements they stand for
+        """
+        num_faces = len(self.verts)
+        if locked_opposing_faces:
+            items = np.arange(2, num_faces // 2 + 1, dtype=FACE_WEIGHT_DTYPE)
+            return factorial(len(items)), items, functools.partial(
+                paired_face_weights_from_low_values, num_faces, list(self.opposing_faces)
+            )
+        items = np.arange(2, num_faces + 1, dtype=FACE_WEIGHT_DTYPE)
+        return factorial(len(items)), items, face_weights_locked_one_from_perms
+
+    @timed
+    def calc_vertex_weight_sd_sample(self, locked_opposing_faces: bool = False, time_budget: float = 5.0,
+                                     incumbent_sd: float = None, quantiles: tuple[float, ...] = DEFAULT_QUANTILES,
+                                     confidence: float = 0.95, max_samples: int = 10000000, block_size: int = 65536,
+                                     seed: int = None) -> SampleSummary:
+        """
+        Samples a search space that is too large to enumerate, to judge how good a placement is. Placements are drawn
+        uniformly, stratified by the value of face 2 (or of the first opposing pair), and scored in blocks.
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param time_budget: the number of seconds to sample for
+        :param incumbent_sd: the sd to compare the space against, defaults to that of the die's current placement if
+            every face has a value
+        :param quantiles: the low quantiles of the sd to estimate
+        :param confidence: the confidence level of the quantile intervals and of the bound on better placements
+        :param max_samples: the most samples to take, 4 bytes of memory each
+        :param block_size: about the number of placements scored together
+        :param seed: the seed of the random generator
+        :return: the SampleSummary, with quantile estimates and intervals, the best sampled placement, and an upper
+            bound on the share of the space that beats the incumbent
+        """
+        if incumbent_sd is None and all(v.weight for v in self.verts):
+            incumbent_sd = self.calc_vertex_weight_sd([v.weight for v in self.verts])
+        num_placements, items, to_placements = self.__get_sampled_placements__(locked_opposing_faces)
+        sds, best_weights, better_count = sample_sds(self.compile(), items, to_placements, time_budget, max_samples,
+                                                     block_size, np.random.default_rng(seed), incumbent_sd)
+        return SampleSummary(num_placements, sds, quantiles, confidence, best_weights, incumbent_sd, better_count)
+
+    def __get_table_metadata__(self, locked_opposing_faces: bool) -> dict:
+        """
+        :param locked_opposing_faces: whether the table covers the locked opposing faces search space
+        :return: what a stored sd table must agree on with the die to be used for it
+        """
+        return {
+            "num_faces": len(self.verts),
+            "opposing_faces": [list(p) for p in self.opposing_faces],
+            "locked_opposing_faces": locked_opposing_faces,
+            "cycles": sorted(sorted(c) for c in self.__get_cycle_face_indices__()),
+        }
+
+    def materialize_vertex_weight_sd_table(self, path: str, locked_opposing_faces: bool = False,
+                                           dtype: str = "float32") -> SdTable:
+        """
+        Stores the standard deviation of die vertex weights of every placement in a search space, by placement rank, in
+        a memory mapped file. Later questions about the space (ranks, thresholds, best placements with fixed faces) are
+        then answered from the file.
+        :param path: the .npy file to write, its metadata goes to <path>.json
+        :param locked_opposing_faces: whether opposing faces must add up to the same value
+        :param dtype: "float32", or "uint16" for fixed point
+        :return: the table
+        """
+        num_placements, placement_block = self.__get_ranked_placements__(locked_opposing_faces)
+        sds, scale = write_sd_table(path, self.compile(), num_placements, placement_block, dtype=dtype,
+                                    metadata=self.__get_table_metadata__(locked_opposing_faces))
+        return SdTable(path, sds, scale, len(self.verts), list(self.opposing_faces), locked_opposing_faces,
+                       placement_block)
+
+    def open_vertex_weight_sd_table(self, path: str) -> SdTable:
+        """
+        Opens a table written by materialize_vertex_weight_sd_table for this die
+        :param path: the .npy file
+        :return: the table
+        """
+        with open(path + ".json") as f:
+            metadata = json.load(f)
+        locked_opposing_faces = metadata["locked_opposing_faces"]
+        expected = self.__get_table_metadata__(locked_opposing_faces)
+        if any(metadata[k] != v for k, v in expected.items()):
+            raise ValueError("The table at {} was not made for this die".format(path))
 
-        # apply and return the best weights
-        self.__assign_weights__(optimal_weights)
-        return optimal_weights_sd
+        _, placement_block = self.__get_ranked_placements__(locked_opposing_faces)
+        return SdTable(path, np.lib.format.open_memmap(path, mode="r"), metadata["scale"], len(self.verts),
+                       list(self.opposing_faces), locked_opposing_faces, placement_block)
 
     def faces_to_string(self):
         return str([str(v) for v in self.verts])
@@ -153,6 +1005,7 @@ class Die:
 
     def add_cycles(self, cycles: list[UndirectedCycle]):
         self.cycles.extend(cycles)
+        self.compiled = None
 
     def num_faces(self):
         return len(self.verts)
@@ -168,7 +1021,7 @@ if __name__ == '__main__':
 
     d6 = Die(
         num_faces=6,
-        adjacent_faces=[(1, 2), (1, 3), (1, 4), (1, 5), (2, 3), (2, 4), (2, 6), (3, 5), (3, 6), (4, 5), (5, 6)],
+        adjacent_faces=[(1, 2), (1, 3), (1, 4), (1, 5), (2, 3), (2, 4), (2, 6), (3, 5), (3, 6), (4, 5), (4, 6), (5, 6)],
         num_faces_on_vertices=3,
         opposing_faces=[(1, 6), (2, 5), (3, 4)]
     )
@@ -245,15 +1098,17 @@ if __name__ == '__main__':
         print(f"\t\tSd ratio : {sd/total_sd:.4f}")
         print(f"\tOpt face value placement of a d{die.num_faces()}: {die.faces_to_string()}")
         print(f"\tFaces around the vertices of a d{die.num_faces()}: \n\t\t{die.vertices_to_string()}")
+        print(f"\tOptimality: {die.optimality_certificate}")
         print(f"\tCalculated in {datetime.timedelta(milliseconds=t)}\n")
         print("Free Faces")
 
         # currently, brute force is going to take 195.75 Millennia....so we're just gonna not
         if die.num_faces() != 20:
-            sd, t = die.calc_optimum_face_weights_free_opposing_faces()
+            sd, t = die.calc_optimum_face_weights_free_opposing_faces_dp()
             print(f"\tOpt vert weight sd of a d{die.num_faces()}: {sd:.4f}")
             print(f"\t\tTotal sd of a d{die.num_faces()}: {total_sd:.4f}")
             print(f"\t\tSd ratio : {sd / total_sd:.4f}")
             print(f"\tOpt face value placement of a d{die.num_faces()}: {die.faces_to_string()}")
             print(f"\tFaces around the vertices of a d{die.num_faces()}: \n\t\t{die.vertices_to_string()}")
+            print(f"\tOptimality: {die.optimality_certificate}")
             print(f"\tCalculated in {datetime.timedelta(milliseconds=t)}\n")
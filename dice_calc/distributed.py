@@ -0,0 +1,65 @@
+import argparse
+import json
+import multiprocessing
+
+from dice import Die, load_die_definitions
+from utils.shard_queue import ShardQueue, shard_worker
+
+
+def load_die(name: str) -> Die:
+    """
+    :param name: a name from data/standard_dice.json, or the path of a json die definition
+    :return: the die
+    """
+    definitions = load_die_definitions()
+    if name in definitions:
+        return Die.from_dict(definitions[name])
+    with open(name) as f:
+        return Die.from_dict(json.load(f))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="An exhaustive optimum search sharded through a SQLite file that "
+                                                 "workers on any node sharing it can lease from")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    publish = commands.add_parser("publish", help="publish a search, or resume one")
+    publish.add_argument("die", help="a name from data/standard_dice.json, or the path of a json die definition")
+    publish.add_argument("queue", help="the SQLite file of the queue")
+    publish.add_argument("--locked", action="store_true", help="opposing faces add up to the same value")
+    publish.add_argument("--shard-size", type=int, default=1 << 22)
+    publish.add_argument("--block-size", type=int, default=65536)
+
+    work = commands.add_parser("work", help="lease and search shards until the search is done")
+    work.add_argument("queue")
+    work.add_argument("--processes", type=int, default=None, help="defaults to the number of cpus")
+    work.add_argument("--lease-seconds", type=float, default=60.0)
+
+    status = commands.add_parser("status", help="count the shards that are done, leased and waiting")
+    status.add_argument("queue")
+
+    collect = commands.add_parser("collect", help="merge the shard optima of a finished search")
+    collect.add_argument("die")
+    collect.add_argument("queue")
+
+    args = parser.parse_args()
+    if args.command == "publish":
+        new = load_die(args.die).publish_optimum_search(args.queue, args.locked, args.shard_size, args.block_size)
+        print("Published" if new else "Resumed", args.queue)
+    elif args.command == "work":
+        workers = [multiprocessing.Process(target=shard_worker, args=(args.queue,),
+                                           kwargs={"lease_seconds": args.lease_seconds})
+                   for _ in range(args.processes or multiprocessing.cpu_count())]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    elif args.command == "status":
+        queue = ShardQueue(args.queue)
+        print(queue.progress())
+        queue.close()
+    else:
+        die = load_die(args.die)
+        sd = die.collect_optimum_face_weights(args.queue)
+        print(f"Opt vert weight sd: {sd:.4f}")
+        print(f"Opt face value placement: {[str(v) for v in die.verts]}")
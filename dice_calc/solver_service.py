@@ -0,0 +1,230 @@
+import argparse
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from dice import Die, load_die_definitions
+
+# solver modes by name, and whether they take an objective
+MODES = {
+    "locked": ("calc_optimum_face_weights_locked_opposing_faces", True),
+    "free": ("calc_optimum_face_weights_free_opposing_faces", True),
+    "locked_dp": ("calc_optimum_face_weights_locked_opposing_faces_dp", False),
+    "free_dp": ("calc_optimum_face_weights_free_opposing_faces_dp", False),
+}
+
+
+@functools.lru_cache(maxsize=32)
+def compile_die(definition_json: str) -> Die:
+    """
+    Builds a die once per worker process, cycle discovery included, and keeps the most recently used ones
+    :param definition_json: the canonical json of a die definition
+    :return: the die
+    """
+    return Die.from_dict(json.loads(definition_json))
+
+
+def run_job(definition_json: str, mode: str, objective: str = None) -> dict:
+    """
+    Solves one job in a worker process
+    :param definition_json: the canonical json of a die definition
+    :param mode: a name from MODES
+    :param objective: the objective for modes that take one
+    :return: the json-able result
+    """
+    die = compile_die(definition_json)
+    method, takes_objective = MODES[mode]
+    kwargs = {"objective": objective} if takes_objective and objective else {}
+    sd, ms = getattr(die, method)(**kwargs)
+    certificate = die.optimality_certificate
+    return {
+        "sd": float(sd),
+        "weights": [v.weight for v in die.verts],
+        "elapsed_ms": ms,
+        "proven_optimal": certificate.proven_optimal,
+        "reason": certificate.reason,
+        "lower_bound": certificate.lower_bound,
+    }
+
+
+class SolverService:
+    def __init__(self, max_workers: int = None, max_results: int = 256):
+        """
+        Queues solver jobs into a pool of worker processes. Identical jobs share one run while it is in flight, and
+        finished results are kept in memory, the least recently used are dropped first.
+        :param max_workers: the number of worker processes, defaults to the number of cpus
+        :param max_results: the number of finished results kept
+        """
+        self.pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.max_results = max_results
+        self.results = OrderedDict()
+        self.in_flight = {}
+        self.standard_dice = load_die_definitions()
+        self.lock = threading.RLock()
+
+    def __job_key__(self, request: dict) -> tuple[str, str, str, str]:
+        """
+        Validates a job request and gives it a key that is the same for every identical job
+        :param request: {"die": a name from data/standard_dice.json or a definition, "mode": a name from MODES,
+            "objective": optional}
+        :return: (job id, canonical definition json, mode, objective)
+        :throws: ValueError if the request is not a valid job
+        """
+        if not isinstance(request, dict):
+            raise ValueError("A job must be a json object")
+        die = request.get("die")
+        if isinstance(die, str):
+            if die not in self.standard_dice:
+                raise ValueError("Unknown die {}, choose from {}".format(die, list(self.standard_dice)))
+            die = self.standard_dice[die]
+        if not isinstance(die, dict):
+            raise ValueError("A job needs a die name or definition")
+
+        mode = request.get("mode", "locked_dp")
+        if mode not in MODES:
+            raise ValueError("Unknown mode {}, choose from {}".format(mode, list(MODES)))
+        objective = request.get("objective") if MODES[mode][1] else None
+
+        definition_json = json.dumps(die, sort_keys=True)
+        job_id = hashlib.sha256(json.dumps([definition_json, mode, objective]).encode()).hexdigest()[:16]
+        return job_id, definition_json, mode, objective
+
+    def submit(self, request: dict) -> str:
+        """
+        Queues a job unless the same job is already running or finished
+        :param request: see __job_key__
+        :return: the job id
+        """
+        job_id, definition_json, mode, objective = self.__job_key__(request)
+        with self.lock:
+            if job_id in self.results:
+                self.results.move_to_end(job_id)
+            elif job_id not in self.in_flight:
+                future = self.pool.submit(run_job, definition_json, mode, objective)
+                self.in_flight[job_id] = future
+                future.add_done_callback(functools.partial(self.__finish__, job_id))
+        return job_id
+
+    def __finish__(self, job_id: str, future):
+        with self.lock:
+            if self.in_flight.pop(job_id, None) is None:
+                return
+            try:
+                self.results[job_id] = {"status": "done", "result": future.result()}
+            except Exception as e:
+                self.results[job_id] = {"status": "failed", "error": repr(e)}
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+
+    def status(self, job_id: str, timeout: float = None) -> dict:
+        """
+        :param job_id: the id from submit
+        :param timeout: how long to wait for a running job, in seconds. Does not wait if None
+        :return: the job status, and its result once it is done
+        """
+        with self.lock:
+            future = self.in_flight.get(job_id)
+        if future is not None and timeout:
+            try:
+                future.exception(timeout=timeout)
+            except TimeoutError:
+                pass
+        if future is not None and future.done():
+            # the done callback may not have run yet
+            self.__finish__(job_id, future)
+        with self.lock:
+            if job_id in self.results:
+                self.results.move_to_end(job_id)
+                return dict(self.results[job_id], id=job_id)
+            if job_id in self.in_flight:
+                return {"id": job_id, "status": "running"}
+        return {"id": job_id, "status": "unknown"}
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+class SolverRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /jobs queues a job and answers with its id, POST /solve waits for the result. GET /jobs/<id> reports a job,
+    ?wait=<seconds> waits for it first.
+    """
+    service = None
+
+    def __reply__(self, code: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path not in ("/jobs", "/solve"):
+            return self.__reply__(404, {"error": "not found"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            job_id = self.service.submit(request)
+            timeout = float(request.get("timeout", 600))
+        except (ValueError, KeyError, TypeError) as e:
+            return self.__reply__(400, {"error": str(e)})
+        if self.path == "/solve":
+            return self.__reply__(200, self.service.status(job_id, timeout=timeout))
+        return self.__reply__(202, self.service.status(job_id))
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if not path.startswith("/jobs/"):
+            return self.__reply__(404, {"error": "not found"})
+        try:
+            wait = float(parse_qs(query).get("wait", [0])[0])
+        except ValueError:
+            return self.__reply__(400, {"error": "wait must be a number of seconds"})
+        status = self.service.status(path[len("/jobs/"):], timeout=wait)
+        return self.__reply__(404 if status["status"] == "unknown" else 200, status)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_handler(service: SolverService):
+    """
+    :param service: the service the requests go to
+    :return: a request handler class bound to the service
+    """
+    return type("SolverRequestHandler", (SolverRequestHandler,), {"service": service})
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, max_workers: int = None) -> tuple[ThreadingHTTPServer, SolverService]:
+    """
+    Starts a solver service on localhost, call serve_forever on the server to handle requests
+    :param host: the address to bind
+    :param port: the port to bind, 0 picks a free one
+    :param max_workers: the number of worker processes
+    :return: the http server and the service behind it
+    """
+    service = SolverService(max_workers=max_workers)
+    return ThreadingHTTPServer((host, port), make_handler(service)), service
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="A long-lived local die solver service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    server, service = serve(args.host, args.port, args.workers)
+    print(f"Serving die solvers on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
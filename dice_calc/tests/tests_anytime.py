@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import unittest
+
+from dice import Die, load_die_definitions
+from utils.anytime import aiterate
+
+
+class TestAnytimeSolvers(unittest.TestCase):
+    def setUp(self):
+        self.die = Die.from_dict(load_die_definitions()["d6"])
+
+    def test_improvements_get_better(self):
+        improvements = list(self.die.iter_optimum_face_weights_free_opposing_faces(block_size=4))
+
+        scores = [sd for _, sd, _ in improvements]
+        self.assertGreater(len(scores), 1)
+        self.assertListEqual(sorted(scores, reverse=True), scores)
+        self.assertAlmostEqual(self.die.calc_optimum_face_weights_free_opposing_faces()[0], scores[-1])
+        self.assertTrue(self.die.optimality_certificate.proven_optimal)
+
+    def test_iterating_does_not_change_the_die(self):
+        list(self.die.iter_optimum_face_weights_free_opposing_faces())
+
+        self.assertListEqual([0] * 6, [v.weight for v in self.die.verts])
+
+    def test_cancel_stops_the_search(self):
+        cancel = threading.Event()
+        solver = self.die.iter_optimum_face_weights_free_opposing_faces(block_size=1, cancel=cancel)
+        next(solver)
+        cancel.set()
+
+        self.assertListEqual([], list(solver))
+        self.assertFalse(self.die.optimality_certificate.proven_optimal)
+
+    def test_cancel_before_the_first_block_certifies_nothing(self):
+        cancel = threading.Event()
+        cancel.set()
+
+        self.assertListEqual([], list(self.die.iter_optimum_face_weights_free_opposing_faces(cancel=cancel)))
+        self.assertIsNone(self.die.optimality_certificate)
+        with self.assertRaisesRegex(ValueError, "without finding a placement"):
+            self.die.__apply_last__(self.die.iter_optimum_face_weights_free_opposing_faces(cancel=cancel))
+
+    def test_async_iteration(self):
+        async def collect():
+            return [item async for item in aiterate(self.die.iter_optimum_face_weights_locked_opposing_faces_dp)]
+
+        improvements = asyncio.run(collect())
+
+        self.assertEqual(1, len(improvements))
+        self.assertAlmostEqual(self.die.calc_optimum_face_weights_locked_opposing_faces()[0], improvements[0][1])
+
+    def test_async_early_exit_cancels_the_solver(self):
+        # a search far too big to finish before it is cancelled
+        d12 = Die.from_dict(load_die_definitions()["d12"])
+        cancel = threading.Event()
+
+        async def first():
+            async for item in aiterate(d12.iter_optimum_face_weights_free_opposing_faces, block_size=1, cancel=cancel):
+                return item
+
+        weights, _, _ = asyncio.run(first())
+
+        self.assertTrue(cancel.is_set())
+        self.assertEqual(12, len(weights))
+        self.assertFalse(d12.optimality_certificate.proven_optimal)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dice import Die, load_die_definitions
+from utils.audit import write_audit
+
+
+class TestAudit(unittest.TestCase):
+    def setUp(self):
+        self.die = Die.from_dict(load_die_definitions()["d12"])
+        rng = np.random.default_rng(0)
+        self.layouts = np.array([rng.permutation(12) + 1 for _ in range(50)])
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_scores_match_the_die_across_chunks(self):
+        chunks = list(self.die.audit_layouts(self.layouts, best_sd=0.5, chunk_size=16))
+        sds = np.concatenate([c.sds for c in chunks])
+
+        self.assertListEqual([16, 16, 16, 2], [len(c) for c in chunks])
+        for layout, sd in zip(self.layouts, sds):
+            self.assertAlmostEqual(self.die.calc_vertex_weight_sd(layout.tolist()), sd)
+        np.testing.assert_allclose(sds / np.std(range(1, 13)), np.concatenate([c.ratios for c in chunks]))
+        np.testing.assert_allclose(sds - 0.5, np.concatenate([c.gaps for c in chunks]))
+
+    def test_file_sources_agree(self):
+        np.save(self.path("layouts.npy"), self.layouts)
+        with open(self.path("layouts.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name"] + ["face {}".format(i) for i in range(1, 13)])
+            writer.writerows([["vendor {}".format(i)] + layout.tolist() for i, layout in enumerate(self.layouts)])
+        with open(self.path("layouts.jsonl"), "w") as f:
+            for layout in self.layouts:
+                f.write(json.dumps(layout.tolist()) + "\n")
+
+        expected = np.concatenate([c.sds for c in self.die.audit_layouts(self.layouts)])
+        labels = {}
+        for name in ("layouts.npy", "layouts.csv", "layouts.jsonl"):
+            chunks = list(self.die.audit_layouts(self.path(name), chunk_size=20))
+            np.testing.assert_allclose(expected, np.concatenate([c.sds for c in chunks]))
+            labels[name] = chunks[0].labels[3]
+
+        self.assertDictEqual({"layouts.npy": 3, "layouts.csv": "vendor 3", "layouts.jsonl": 3}, labels)
+
+    def test_gap_defaults_to_the_last_search(self):
+        die = Die.from_dict(load_die_definitions()["d8"])
+        layouts = np.array([np.random.default_rng(i).permutation(8) + 1 for i in range(10)])
+        self.assertIsNone(next(die.audit_layouts(layouts)).gaps)
+
+        optimum, _ = die.calc_optimum_face_weights_free_opposing_faces_dp()
+        chunk = next(die.audit_layouts(layouts))
+        np.testing.assert_allclose(chunk.sds - optimum, chunk.gaps)
+
+        # the optimum of a smaller search space, or of another objective, is not the best known sd
+        die.calc_optimum_face_weights_locked_opposing_faces_dp()
+        with self.assertRaisesRegex(ValueError, "best_sd"):
+            next(die.audit_layouts(layouts))
+        die.calc_optimum_face_weights_free_opposing_faces(objective="edge_sum_sd")
+        with self.assertRaisesRegex(ValueError, "best_sd"):
+            next(die.audit_layouts(layouts))
+        self.assertIsNotNone(next(die.audit_layouts(layouts, best_sd=optimum)).gaps)
+
+    def test_rejects_layouts_that_are_not_numberings(self):
+        layouts = self.layouts.copy()
+        layouts[7, 0] = layouts[7, 1]
+
+        with self.assertRaisesRegex(ValueError, "Layout 7"):
+            list(self.die.audit_layouts(layouts))
+
+    def test_values_are_checked_before_they_are_cast(self):
+        layouts = self.layouts.copy()
+        # 65537 would wrap around to 1 as an int16
+        layouts[5, layouts[5].tolist().index(1)] = 65537
+
+        with self.assertRaisesRegex(ValueError, "Layout 5"):
+            list(self.die.audit_layouts(layouts))
+        with self.assertRaisesRegex(ValueError, "integer"):
+            list(self.die.audit_layouts(self.layouts + 0.5))
+
+        with open(self.path("layouts.jsonl"), "w") as f:
+            f.write(json.dumps(self.layouts[0].tolist()) + "\n")
+            f.write(json.dumps({"name": "float", "weights": [w + 0.25 for w in self.layouts[1].tolist()]}) + "\n")
+        with self.assertRaisesRegex(ValueError, "Layout float"):
+            list(self.die.audit_layouts(self.path("layouts.jsonl")))
+
+        with open(self.path("layouts.jsonl"), "w") as f:
+            f.write(json.dumps({"name": "first", "weights": self.layouts[0].tolist()}) + "\n")
+            f.write(json.dumps({"name": "missing", "values": self.layouts[1].tolist()}) + "\n")
+        with self.assertRaisesRegex(ValueError, "Layout missing on line 1"):
+            list(self.die.audit_layouts(self.path("layouts.jsonl")))
+
+        with open(self.path("layouts.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerows([layout.tolist() for layout in self.layouts[:3]])
+            writer.writerow(self.layouts[3].tolist()[:-2])
+        with self.assertRaisesRegex(ValueError, "Layout 3"):
+            list(self.die.audit_layouts(self.path("layouts.csv")))
+
+    def test_write_audit_streams_rows(self):
+        out = io.StringIO()
+
+        count = write_audit(self.die.audit_layouts(self.layouts[:3], best_sd=0.5), out)
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(3, count)
+        self.assertListEqual(["0", "1", "2"], [r["layout"] for r in rows])
+        self.assertAlmostEqual(self.die.calc_vertex_weight_sd(self.layouts[0].tolist()), float(rows[0]["sd"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from fractions import Fraction
+
+from utils.bounds import fixed_vertex_weight_mean, vertex_weight_sd_lower_bound, meets_bound
+
+
+class TestVertexWeightSdLowerBound(unittest.TestCase):
+    # face indices around the vertices of a d4 and a d8
+    d4_cycles = [[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]]
+    d8_cycles = [[0, 5, 2, 7], [7, 2, 1, 4], [4, 1, 6, 3], [3, 6, 5, 0], [0, 3, 4, 7], [2, 1, 6, 5]]
+
+    def test_fixed_mean_of_regular_die(self):
+        self.assertEqual(Fraction(5, 2), fixed_vertex_weight_mean(self.d4_cycles, [1, 2, 3, 4]))
+
+    def test_no_fixed_mean_when_faces_are_uneven(self):
+        self.assertIsNone(fixed_vertex_weight_mean([[0, 1, 2], [0, 1, 3]], [1, 2, 3, 4]))
+
+    def test_integrality_bound_d4(self):
+        # cycle sums total 30 over 4 vertices, so at best two are 7 and two are 8
+        self.assertAlmostEqual(1 / 6, vertex_weight_sd_lower_bound(self.d4_cycles, [1, 2, 3, 4]))
+
+    def test_zero_bound_when_mean_cycle_sum_is_integral(self):
+        self.assertEqual(0.0, vertex_weight_sd_lower_bound(self.d8_cycles, list(range(1, 9))))
+
+    def test_mixed_cycle_lengths(self):
+        # a d10 with its two 5 face vertices
+        cycles = [[0, 3, 6], [3, 6, 9], [6, 9, 2], [9, 2, 7], [2, 7, 4], [7, 4, 1], [4, 1, 8], [1, 8, 5], [8, 5, 0],
+                  [5, 0, 3], [0, 8, 4, 2, 6], [9, 7, 1, 5, 3]]
+        bound = vertex_weight_sd_lower_bound(cycles, list(range(1, 11)))
+        self.assertAlmostEqual(((10 / 36 + 2 / 100) / 12) ** 0.5, bound)
+
+    def test_meets_bound_tolerates_rounding(self):
+        self.assertTrue(meets_bound(1 / 6 + 1e-12, 1 / 6))
+        self.assertFalse(meets_bound(0.2, 1 / 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
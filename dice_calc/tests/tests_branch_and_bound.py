@@ -0,0 +1,52 @@
+import unittest
+
+from dice import Die, load_die_definitions
+from utils.branch_and_bound import branch_and_bound_optimum
+
+
+class TestBranchAndBound(unittest.TestCase):
+    def setUp(self):
+        self.d6 = Die.from_dict(load_die_definitions()["d6"])
+
+    def test_matches_brute_force(self):
+        sd, _ = self.d6.calc_optimum_face_weights_free_opposing_faces()
+        locked_sd, _ = self.d6.calc_optimum_face_weights_locked_opposing_faces()
+
+        self.assertAlmostEqual(sd, self.d6.calc_optimum_face_weights_free_opposing_faces_bnb(processes=1)[0])
+        self.assertAlmostEqual(locked_sd, self.d6.calc_optimum_face_weights_locked_opposing_faces_bnb(processes=1)[0])
+        self.assertTrue(self.d6.optimality_certificate.proven_optimal)
+
+    def test_workers_share_the_search(self):
+        die = Die.from_dict(load_die_definitions()["d10"])
+        sd, _ = die.calc_optimum_face_weights_free_opposing_faces_dp()
+
+        for processes in (1, 3):
+            bnb_sd, _ = die.calc_optimum_face_weights_free_opposing_faces_bnb(processes=processes)
+            self.assertAlmostEqual(sd, bnb_sd)
+            self.assertEqual("exhausted", die.optimality_certificate.reason)
+            self.assertAlmostEqual(bnb_sd, die.calc_vertex_weight_sd([v.weight for v in die.verts]))
+
+    def test_stops_at_the_target(self):
+        die = Die.from_dict(load_die_definitions()["d8"])
+
+        sd, _ = die.calc_optimum_face_weights_free_opposing_faces_bnb(processes=2)
+
+        self.assertAlmostEqual(0.0, sd)
+        self.assertEqual("bound", die.optimality_certificate.reason)
+
+    def test_incumbent_prunes_from_the_start(self):
+        die = Die.from_dict(load_die_definitions()["d10"])
+        units, options = die.__get_placement_units__(True)
+        cycle_faces = die.__get_cycle_face_indices__()
+        weights, sd, nodes, _ = branch_and_bound_optimum(cycle_faces, units, options, processes=1)
+
+        seeded_weights, seeded_sd, seeded_nodes, _ = branch_and_bound_optimum(cycle_faces, units, options,
+                                                                              processes=1, incumbent_weights=weights)
+
+        self.assertAlmostEqual(sd, seeded_sd)
+        self.assertListEqual(weights, seeded_weights)
+        self.assertLess(seeded_nodes, nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
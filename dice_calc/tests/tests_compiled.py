@@ -0,0 +1,109 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from itertools import permutations
+
+import numpy as np
+
+from dice import Die, load_die_definitions
+from utils.compiled import Placement, evaluate, evaluate_block
+from utils.generators import FACE_WEIGHT_DTYPE, batched_face_weights, face_weights_locked_one
+
+
+class TestPlacement(unittest.TestCase):
+    def test_placements_are_values(self):
+        a = Placement([1, 2, 3])
+        b = Placement(np.array([1, 2, 3]))
+
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(1, len({a, b}))
+        self.assertNotEqual(a, Placement([1, 3, 2]))
+
+    def test_placements_are_immutable(self):
+        placement = Placement([1, 2, 3])
+
+        with self.assertRaises(AttributeError):
+            placement.weights = (3, 2, 1)
+
+
+class TestCompiledDie(unittest.TestCase):
+    def setUp(self):
+        self.die = Die.from_dict(load_die_definitions()["d6"])
+
+    def test_compiled_die_is_immutable(self):
+        compiled = self.die.compile()
+
+        with self.assertRaises(AttributeError):
+            compiled.num_faces = 7
+        with self.assertRaises(ValueError):
+            compiled.incidence[0, 0] = 1
+
+    def test_compile_is_cached_until_the_topology_changes(self):
+        compiled = self.die.compile()
+
+        self.assertIs(compiled, self.die.compile())
+        self.die.add_cycles([])
+        self.assertIsNot(compiled, self.die.compile())
+
+    def test_evaluate_matches_the_die(self):
+        compiled = self.die.compile()
+        weights = [1, 3, 2, 5, 4, 6]
+        self.die.__assign_weights__(weights)
+
+        self.assertAlmostEqual(float(np.std(self.die.__get_vertex_weights__())),
+                               evaluate(compiled, Placement(weights)))
+
+    def test_evaluate_does_not_change_the_die(self):
+        evaluate(self.die.compile(), Placement([6, 5, 4, 3, 2, 1]))
+
+        self.assertListEqual([0] * 6, [v.weight for v in self.die.verts])
+
+    def test_threads_share_a_compiled_die(self):
+        compiled = self.die.compile()
+        blocks = np.array_split(np.array([[1] + list(p) for p in permutations(range(2, 7))]), 8)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            scores = list(pool.map(lambda block: evaluate_block(compiled, block), blocks))
+
+        for block, block_scores in zip(blocks, scores):
+            np.testing.assert_allclose(evaluate_block(compiled, block), block_scores)
+        self.assertAlmostEqual(self.die.calc_optimum_face_weights_free_opposing_faces()[0],
+                               min(s.min() for s in scores))
+
+
+class TestIntegerObjective(unittest.TestCase):
+    def test_objective_matches_float_sd_with_mixed_cycle_lengths(self):
+        die = Die.from_dict(load_die_definitions()["d10"])
+        compiled = die.compile()
+        self.assertGreater(len({len(c) for c in compiled.cycles}), 1)
+        block = next(batched_face_weights(face_weights_locked_one(10), 1000))
+
+        self.assertEqual(FACE_WEIGHT_DTYPE, block.dtype)
+        np.testing.assert_allclose((block @ compiled.incidence.T).std(axis=1),
+                                   compiled.objective_sd(compiled.vertex_weight_objective(block)), atol=1e-12)
+
+    def test_equal_placements_tie_exactly(self):
+        die = Die.from_dict(load_die_definitions()["d10"])
+        compiled = die.compile()
+        block = next(batched_face_weights(face_weights_locked_one(10), 5000))
+        objective = compiled.vertex_weight_objective(block)
+
+        self.assertEqual(np.int64, objective.dtype)
+        self.assertLess(len(np.unique(objective)), len(objective))
+        sds = compiled.objective("vertex_weight_sd")(block)
+        for value in np.unique(objective):
+            self.assertEqual(1, len(np.unique(sds[objective == value])))
+
+    def test_search_keeps_the_first_of_tied_optima(self):
+        die = Die.from_dict(load_die_definitions()["d8"])
+        block = next(batched_face_weights(face_weights_locked_one(8), 5040))
+        objective = die.compile().vertex_weight_objective(block)
+
+        die.calc_optimum_face_weights_free_opposing_faces()
+
+        self.assertGreater(int((objective == objective.min()).sum()), 1)
+        self.assertListEqual(block[np.argmin(objective)].tolist(), [v.weight for v in die.verts])
+
+
+if __name__ == '__main__':
+    unittest.main()
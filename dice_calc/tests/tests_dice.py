@@ -1,6 +1,7 @@
 import unittest
 
-from dice import Die
+from dice import Die, load_die_definitions
+from utils.geometry import DieGeometry
 from utils.graphs import UndirectedPath, Edge, UndirectedCycle
 
 
@@ -33,6 +34,30 @@ class DieTestCaseMixin:
         )
 
 
+class DieDefinitionTestCase(unittest.TestCase):
+    def test_standard_dice(self):
+        definitions = load_die_definitions()
+
+        for name, vertices in [("d4", 4), ("d6", 8), ("d8", 6), ("d10", 12), ("d12", 20), ("d20", 12)]:
+            die = Die.from_dict(definitions[name])
+            self.assertEqual(definitions[name]["num_faces"], die.num_faces())
+            self.assertEqual(vertices, len(die.cycles))
+
+    def test_explicit_cycles_skip_the_search(self):
+        d8 = Die.from_dict(load_die_definitions()["d8"])
+
+        die = Die(num_faces=8, adjacent_faces=[(e.src.name, e.dst.name) for e in d8.edges], num_faces_on_vertices=4,
+                  opposing_faces=d8.opposing_faces, cycles=[[1, 2, 3, 4]])
+
+        self.assertEqual(1, len(die.cycles))
+        self.assertEqual(UndirectedCycle(die.verts[:4]), die.cycles[0])
+
+    def test_several_vertex_sizes_need_extra_cycles(self):
+        definition = dict(load_die_definitions()["d10"], num_faces_on_vertices=[3, 5])
+
+        self.assertRaises(ValueError, Die.from_dict, definition)
+
+
 class D4TestCase(unittest.TestCase, DieTestCaseMixin):
     num_faces = 4
     adjacent_faces = [(1, 2), (1, 3), (1, 4), (2, 3), (2, 4), (3, 4)]
@@ -59,6 +84,14 @@ class D4TestCase(unittest.TestCase, DieTestCaseMixin):
 
         self.assertDictEqual(expected_dict, self.die.__get_edge_dict__())
 
+    def test_optimum_is_certified(self):
+        sd, _ = self.die.calc_optimum_face_weights_free_opposing_faces()
+
+        certificate = self.die.optimality_certificate
+        self.assertTrue(certificate.proven_optimal)
+        self.assertAlmostEqual(sd, certificate.sd)
+        self.assertLessEqual(certificate.lower_bound, sd)
+
     def test_cycle_finding(self):
         # Setup
         verts = self.die.verts
@@ -115,6 +148,51 @@ class D6TestCase(unittest.TestCase, DieTestCaseMixin):
         for cycle in expected_cycles:
             self.assertIn(cycle, actual_cycles)
 
+    def test_dp_matches_brute_force(self):
+        brute_sd, _ = self.die.calc_optimum_face_weights_free_opposing_faces()
+        dp_sd, _ = self.die.calc_optimum_face_weights_free_opposing_faces_dp()
+
+        self.assertAlmostEqual(brute_sd, dp_sd)
+        self.assertEqual("exact", self.die.optimality_certificate.reason)
+
+    def test_locked_dp_matches_brute_force(self):
+        brute_sd, _ = self.die.calc_optimum_face_weights_locked_opposing_faces()
+        dp_sd, _ = self.die.calc_optimum_face_weights_locked_opposing_faces_dp()
+
+        self.assertAlmostEqual(brute_sd, dp_sd)
+        for i, j in self.opposing_faces:
+            self.assertEqual(self.num_faces + 1, self.die.verts[i - 1].weight + self.die.verts[j - 1].weight)
+
+    def test_pareto_front_holds_vertex_weight_optimum(self):
+        front, _ = self.die.calc_pareto_face_weights_free_opposing_faces(block_size=7)
+        sd, _ = self.die.calc_optimum_face_weights_free_opposing_faces()
+
+        self.assertAlmostEqual(sd, min(scores["vertex_weight_sd"] for _, scores in front))
+        self.assertRaises(ValueError, self.die.calc_pareto_face_weights_free_opposing_faces, objectives=["nope"])
+
+    def test_geometric_balance_objective(self):
+        points = [(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+        faces = [[1, 3, 7, 5], [4, 5, 7, 6], [2, 3, 7, 6], [0, 1, 5, 4], [0, 1, 3, 2], [0, 2, 6, 4]]
+        self.assertRaises(ValueError, self.die.calc_optimum_face_weights_free_opposing_faces, objective="geometric_moment")
+        self.assertRaises(ValueError, self.die.set_geometry, DieGeometry(points, [faces[1], faces[0]] + faces[2:]))
+
+        self.die.set_geometry(DieGeometry(points, faces))
+        moment, _ = self.die.calc_optimum_face_weights_free_opposing_faces(objective="geometric_moment")
+
+        # the best a cube can do is put consecutive numbers on opposing faces
+        self.assertAlmostEqual(0.5 * 3 ** 0.5, moment)
+        for i, j in self.opposing_faces:
+            self.assertEqual(1, abs(self.die.verts[i - 1].weight - self.die.verts[j - 1].weight))
+
+    def test_sd_distribution_covers_every_placement(self):
+        distribution, _ = self.die.calc_vertex_weight_sd_distribution(processes=2)
+        sd, _ = self.die.calc_optimum_face_weights_free_opposing_faces()
+
+        self.assertEqual(120, distribution.count)
+        self.assertAlmostEqual(sd, distribution.min)
+        self.assertEqual(0, distribution.percentile_of(sd))
+        self.assertAlmostEqual(sd, self.die.calc_vertex_weight_sd([v.weight for v in self.die.verts]))
+
 
 class D8TestCase(unittest.TestCase, DieTestCaseMixin):
     num_faces = 8
@@ -155,6 +233,126 @@ class D8TestCase(unittest.TestCase, DieTestCaseMixin):
         for cycle in expected_cycles:
             self.assertIn(cycle, actual_cycles)
 
+    def test_search_stops_at_lower_bound(self):
+        sd, _ = self.die.calc_optimum_face_weights_free_opposing_faces()
+
+        certificate = self.die.optimality_certificate
+        self.assertAlmostEqual(0.0, sd)
+        self.assertEqual("bound", certificate.reason)
+        self.assertLess(certificate.placements_checked, 5040)
+
+
+class DieChangeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.definition = load_die_definitions()["d12"]
+        self.die = Die.from_dict(self.definition)
+        self.adjacent_faces = [(e.src.name, e.dst.name) for e in self.die.edges]
+        # move one adjacency, the kind of edit made while designing a die
+        self.changed_faces = self.adjacent_faces[1:] + [(1, 12)]
+
+    @staticmethod
+    def sorted_cycles(die: Die) -> list[list[int]]:
+        return sorted(sorted(c) for c in die.__get_cycle_face_indices__())
+
+    def test_changed_die_has_the_same_vertices_as_a_new_one(self):
+        changed = self.die.with_changes(adjacent_faces=self.changed_faces)
+
+        fresh = Die.from_dict(dict(self.definition, adjacent_faces=self.changed_faces))
+        self.assertListEqual(self.sorted_cycles(fresh), self.sorted_cycles(changed))
+        self.assertNotEqual(self.sorted_cycles(self.die), self.sorted_cycles(changed))
+
+    def test_remapped_placement_is_in_the_search_space(self):
+        opposing_faces = list(self.die.opposing_faces)
+        (a, b), (c, d) = opposing_faces[1:3]
+        opposing_faces[1:3] = [(a, d), (c, b)]
+        changed = self.die.with_changes(opposing_faces=opposing_faces)
+        self.die.calc_optimum_face_weights_locked_opposing_faces_dp()
+
+        weights = changed.__remap_placement__([v.weight for v in self.die.verts], locked_opposing_faces=True)
+
+        self.assertListEqual(list(range(1, 13)), sorted(weights))
+        self.assertEqual(1, weights[0])
+        for i, j in opposing_faces:
+            self.assertEqual(13, weights[i - 1] + weights[j - 1])
+            if 1 not in (i, j):
+                self.assertLess(weights[i - 1], weights[j - 1])
+
+    def test_seeded_resolve_matches_a_new_search(self):
+        self.die.calc_optimum_face_weights_locked_opposing_faces_dp()
+        changed = self.die.with_changes(adjacent_faces=self.changed_faces)
+
+        sd, _ = changed.calc_optimum_face_weights_seeded([v.weight for v in self.die.verts], locked_opposing_faces=True,
+                                                         processes=1)
+
+        fresh = Die.from_dict(dict(self.definition, adjacent_faces=self.changed_faces))
+        self.assertAlmostEqual(fresh.calc_optimum_face_weights_locked_opposing_faces_dp()[0], sd)
+        self.assertTrue(changed.optimality_certificate.proven_optimal)
+
+
+class DualDieTestCase(unittest.TestCase):
+    # a unit cube, numbered like the d6 in tests_geometry
+    points = [(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+    faces = [[1, 3, 7, 5], [4, 5, 7, 6], [2, 3, 7, 6], [0, 1, 5, 4], [0, 1, 3, 2], [0, 2, 6, 4]]
+
+    def setUp(self):
+        self.d6 = Die.from_dict(load_die_definitions()["d6"])
+        self.d8 = Die.from_dict(load_die_definitions()["d8"])
+
+    @staticmethod
+    def optima(die: Die) -> tuple[float, float]:
+        return (die.calc_optimum_face_weights_free_opposing_faces_dp()[0],
+                die.calc_optimum_face_weights_locked_opposing_faces_dp()[0])
+
+    def test_corner_numbered_octahedron_is_a_cube(self):
+        dual = self.d8.dual()
+
+        self.assertEqual(6, dual.num_faces())
+        self.assertEqual(8, len(dual.cycles))
+        self.assertEqual(3, len(dual.opposing_faces))
+        for a, b in zip(self.optima(self.d6), self.optima(dual)):
+            self.assertAlmostEqual(a, b)
+
+    def test_dual_of_the_dual_is_the_die(self):
+        definitions = load_die_definitions()
+
+        for die in [self.d6] + [Die.from_dict(definitions[name]) for name in ("d8", "d10", "d12", "d20")]:
+            dual = die.dual().dual()
+
+            self.assertListEqual(sorted(sorted(c) for c in die.__get_cycle_face_indices__()),
+                                 sorted(sorted(c) for c in dual.__get_cycle_face_indices__()))
+            self.assertListEqual(sorted((min(p), max(p)) for p in die.opposing_faces), dual.opposing_faces)
+
+    def test_corners_that_do_not_pair_up_need_opposing_faces(self):
+        # the d10's own opposing faces pair up its corners, these do not
+        d10 = Die.from_dict(load_die_definitions()["d10"]).with_changes(
+            opposing_faces=[(1, 2), (3, 4), (5, 6), (7, 8), (9, 10)])
+
+        with self.assertRaisesRegex(ValueError, "do not pair up the corners"):
+            d10.dual()
+        self.assertListEqual([], d10.dual(opposing_faces=[]).opposing_faces)
+        unpaired = Die.from_dict(load_die_definitions()["d4"]).dual(opposing_faces=[])
+        with self.assertRaisesRegex(ValueError, "every face in an opposing pair"):
+            unpaired.calc_optimum_face_weights_locked_opposing_faces()
+
+    def test_dice_from_a_mesh(self):
+        geometry = DieGeometry(self.points, self.faces)
+
+        cube = Die.from_geometry(geometry)
+        corners = Die.from_geometry(geometry, number_corners=True)
+
+        self.assertIs(geometry, cube.geometry)
+        self.assertListEqual([(1, 6), (2, 5), (3, 4)], cube.opposing_faces)
+        for a, b in zip(self.optima(self.d6), self.optima(cube)):
+            self.assertAlmostEqual(a, b)
+        for a, b in zip(self.optima(self.d8), self.optima(corners)):
+            self.assertAlmostEqual(a, b)
+
+    def test_open_surfaces_have_no_dual(self):
+        die = Die(num_faces=8, adjacent_faces=[(e.src.name, e.dst.name) for e in self.d8.edges],
+                  num_faces_on_vertices=4, opposing_faces=self.d8.opposing_faces, cycles=[[1, 2, 3, 4]])
+
+        self.assertRaises(ValueError, die.dual)
+
 
 class D10TestCase(unittest.TestCase, DieTestCaseMixin):
     num_faces = 10
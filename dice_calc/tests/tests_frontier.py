@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from utils.frontier import elimination_order, frontier_dp_optimum
+from utils.generators import face_weights_locked_one
+
+
+class TestFrontierDp(unittest.TestCase):
+    # face indices around the vertices of a d6 and a d10 with its two 5 face vertices
+    d6_cycles = [[0, 1, 2], [0, 1, 3], [0, 4, 3], [0, 4, 2], [5, 1, 2], [5, 1, 3], [5, 4, 3], [5, 4, 2]]
+    d10_cycles = [[0, 3, 6], [3, 6, 9], [6, 9, 2], [9, 2, 7], [2, 7, 4], [7, 4, 1], [4, 1, 8], [1, 8, 5], [8, 5, 0],
+                  [5, 0, 3], [0, 8, 4, 2, 6], [9, 7, 1, 5, 3]]
+
+    @staticmethod
+    def free_units(num_faces):
+        units = [(f,) for f in range(num_faces)]
+        options = [[(1,)]] + [[(v,) for v in range(2, num_faces + 1)] for _ in range(num_faces - 1)]
+        return units, options
+
+    @staticmethod
+    def brute_force_sd(cycles, num_faces):
+        return min(np.std([sum(w[f] for f in c) / len(c) for c in cycles])
+                   for w in face_weights_locked_one(num_faces))
+
+    def test_order_starts_with_first_unit(self):
+        units, _ = self.free_units(6)
+        order = elimination_order(units, self.d6_cycles)
+
+        self.assertEqual(0, order[0])
+        self.assertListEqual(list(range(6)), sorted(order))
+
+    def test_matches_brute_force_d6(self):
+        weights, sd, _ = frontier_dp_optimum(self.d6_cycles, *self.free_units(6))
+
+        self.assertAlmostEqual(self.brute_force_sd(self.d6_cycles, 6), sd)
+        self.assertAlmostEqual(sd, np.std([sum(weights[f] for f in c) / len(c) for c in self.d6_cycles]))
+        self.assertEqual(1, weights[0])
+        self.assertSetEqual(set(range(1, 7)), set(weights))
+
+    def test_matches_brute_force_mixed_cycle_lengths(self):
+        weights, sd, _ = frontier_dp_optimum(self.d10_cycles, *self.free_units(10))
+
+        self.assertAlmostEqual(0.3687, sd, places=4)
+        self.assertAlmostEqual(sd, np.std([sum(weights[f] for f in c) / len(c) for c in self.d10_cycles]))
+
+    def test_paired_units(self):
+        units = [(0, 5), (1, 4), (2, 3)]
+        options = [[(1, 6)], [(2, 5), (3, 4)], [(2, 5), (3, 4)]]
+
+        weights, _, _ = frontier_dp_optimum(self.d6_cycles, units, options)
+
+        for i, j in units:
+            self.assertEqual(7, weights[i] + weights[j])
+
+
+if __name__ == '__main__':
+    unittest.main()
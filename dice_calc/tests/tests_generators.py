@@ -1,6 +1,9 @@
 import unittest
 
-from utils.generators import paired_face_weights_locked_one
+import numpy as np
+
+from utils.generators import paired_face_weights_locked_one, face_weights_locked_one, unrank_permutations, \
+    rank_permutations, face_weights_locked_one_block, paired_face_weights_locked_one_block
 
 
 class TestFaceWeightGenerator(unittest.TestCase):
@@ -163,6 +166,11 @@ class TestFaceWeightGenerator(unittest.TestCase):
             for i, j in self.d20_opposing_faces:
                 self.assertEqual(expected_sum, weights[i-1] + weights[j-1])
 
+    def test_face_one_second_in_its_pair(self):
+        for weights in paired_face_weights_locked_one(num_faces=6, opp_faces=[(6, 1), (2, 5), (3, 4)]):
+            self.assertEqual(1, weights[0])
+            self.assertEqual(6, weights[5])
+
     def test_one_weight_per_side_d6(self):
         for weights in self.d6_perms:
             self.assertEqual(self.d6_faces, len(weights))
@@ -176,5 +184,31 @@ class TestFaceWeightGenerator(unittest.TestCase):
             self.assertEqual(self.d20_faces, len(weights))
 
 
+class TestRankedFaceWeights(unittest.TestCase):
+    def test_unrank_permutations(self):
+        perms = unrank_permutations(np.array([0, 1, 5, 23]), np.array([1, 2, 3, 4]))
+
+        self.assertListEqual([[1, 2, 3, 4], [1, 2, 4, 3], [1, 4, 3, 2], [4, 3, 2, 1]], perms.tolist())
+
+    def test_rank_permutations(self):
+        items = np.arange(2, 8)
+        ranks = np.array([0, 7, 333, 719])
+
+        self.assertListEqual(list(ranks), list(rank_permutations(unrank_permutations(ranks, items), items)))
+
+    def test_free_block_matches_generator(self):
+        expected = [list(w) for w in face_weights_locked_one(num_faces=7)][100:300]
+
+        self.assertListEqual(expected, face_weights_locked_one_block(num_faces=7, start=100, stop=300).tolist())
+
+    def test_paired_block_holds_same_placements_as_generator(self):
+        opp_faces = [(1, 12), (2, 11), (3, 10), (4, 9), (5, 8), (6, 7)]
+        expected = {tuple(w) for w in paired_face_weights_locked_one(num_faces=12, opp_faces=list(opp_faces))}
+
+        block = paired_face_weights_locked_one_block(num_faces=12, opp_faces=opp_faces, start=0, stop=120)
+
+        self.assertSetEqual(expected, {tuple(w) for w in block.tolist()})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from utils.geometry import DieGeometry
+from utils.scoring import geometric_moment
+
+
+class TestDieGeometry(unittest.TestCase):
+    # a unit cube, numbered like the d6 in tests_dice
+    points = [(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+    faces = [[1, 3, 7, 5], [4, 5, 7, 6], [2, 3, 7, 6], [0, 1, 5, 4], [0, 1, 3, 2], [0, 2, 6, 4]]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.geometry = DieGeometry(cls.points, cls.faces)
+
+    def test_face_areas_and_normals(self):
+        np.testing.assert_allclose(np.ones(6), self.geometry.areas)
+        np.testing.assert_allclose([0, 0, 1], self.geometry.normals[0], atol=1e-12)
+        np.testing.assert_allclose([-1, 0, 0], self.geometry.normals[4], atol=1e-12)
+
+    def test_centroid(self):
+        np.testing.assert_allclose([0.5, 0.5, 0.5], self.geometry.centroid)
+
+    def test_adjacent_faces(self):
+        expected = {(1, 2), (1, 3), (1, 4), (1, 5), (2, 3), (2, 4), (2, 6), (3, 5), (3, 6), (4, 5), (4, 6), (5, 6)}
+
+        self.assertSetEqual(expected, self.geometry.adjacent_faces())
+
+    def test_geometric_moment(self):
+        block = np.array([[1, 2, 3, 4, 5, 6], [3, 3, 3, 3, 3, 3]])
+
+        moments = geometric_moment(block, self.geometry.lever_arms())
+
+        # opposing faces differ by 5, 3 and 1
+        self.assertAlmostEqual(0.5 * np.sqrt(25 + 9 + 1), moments[0])
+        self.assertAlmostEqual(0, moments[1])
+
+    def test_engraving_masses(self):
+        masses = self.geometry.engraving_masses(max_value=6, depth=0.1, ink_fraction=lambda v: 0.1 * len(str(v)))
+
+        self.assertEqual(7, len(masses))
+        self.assertEqual(0, masses[0])
+        self.assertAlmostEqual(0.01, masses[6])
+
+
+if __name__ == '__main__':
+    unittest.main()
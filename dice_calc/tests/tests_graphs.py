@@ -1,6 +1,7 @@
 import unittest
 
-from utils.graphs import Vertex, Edge, UndirectedPath, UndirectedCycle
+from utils.graphs import Vertex, Edge, UndirectedPath, UndirectedCycle, adjacency_bitsets, dual_cycles, \
+    find_simple_cycles, iter_bits
 
 
 class TestVertex(unittest.TestCase):
@@ -139,5 +140,54 @@ class TestUndirectedCycle(unittest.TestCase):
         self.assertEqual(self.v2, UndirectedCycle([self.v1, self.v2, self.v3])[1])
 
 
+class TestSimpleCycles(unittest.TestCase):
+    @staticmethod
+    def prism_edges(n: int) -> list[tuple[int, int]]:
+        # The face adjacencies of an n-gonal bipyramid: two rings of n faces joined at the equator
+        return ([(i, (i + 1) % n) for i in range(n)] + [(n + i, n + (i + 1) % n) for i in range(n)] +
+                [(i, n + i) for i in range(n)])
+
+    def test_adjacency_bitsets(self):
+        adjacency = adjacency_bitsets(4, [(0, 1), (1, 2), (2, 0), (2, 3)])
+
+        self.assertListEqual([0b0110, 0b0101, 0b1011, 0b0100], adjacency)
+        self.assertListEqual([0, 1, 3], list(iter_bits(adjacency[2])))
+
+    def test_complete_graph_cycles(self):
+        adjacency = adjacency_bitsets(4, [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)])
+
+        self.assertListEqual([(0, 1, 2), (0, 1, 3), (0, 2, 3), (1, 2, 3)], find_simple_cycles(adjacency, 3))
+        self.assertListEqual([(0, 1, 2, 3), (0, 1, 3, 2), (0, 2, 1, 3)], find_simple_cycles(adjacency, 4))
+
+    def test_cycles_through_edges(self):
+        edges = self.prism_edges(60)
+        adjacency = adjacency_bitsets(120, edges)
+
+        cycles = find_simple_cycles(adjacency, 4)
+
+        self.assertEqual(60, len(cycles))
+        self.assertIn((0, 1, 61, 60), cycles)
+        self.assertListEqual([(0, 1, 61, 60), (0, 59, 119, 60)], find_simple_cycles(adjacency, 4, [(60, 0)]))
+        self.assertListEqual([], find_simple_cycles(adjacency, 3))
+
+
+class TestDualCycles(unittest.TestCase):
+    def test_tetrahedron_is_self_dual(self):
+        edges, around = dual_cycles([[0, 1, 2], [0, 2, 3], [0, 3, 1], [1, 3, 2]])
+
+        self.assertListEqual([(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)], edges)
+        self.assertListEqual([[0, 2, 1], [0, 3, 2], [0, 1, 3], [1, 2, 3]], around)
+
+    def test_rings_follow_shared_edges(self):
+        cube = [[1, 3, 7, 5], [4, 5, 7, 6], [2, 3, 7, 6], [0, 1, 5, 4], [0, 1, 3, 2], [0, 2, 6, 4]]
+
+        edges, around = dual_cycles(cube)
+
+        self.assertEqual(12, len(edges))
+        for ring in around:
+            for a, b in zip(ring, ring[1:] + ring[:1]):
+                self.assertIn((min(a, b), max(a, b)), edges)
+
+
 if __name__ == '__main__':
     unittest.main()
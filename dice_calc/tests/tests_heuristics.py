@@ -0,0 +1,94 @@
+import unittest
+
+import numpy as np
+
+from dice import Die, load_die_definitions
+from utils.heuristics import SwapSpace, run_portfolio
+
+
+class TestSwapSpace(unittest.TestCase):
+    def setUp(self):
+        self.die = Die.from_dict(load_die_definitions()["d12"])
+
+    def test_swap_deltas_match_rescoring(self):
+        for locked in (False, True):
+            units, options = self.die.__get_placement_units__(locked)
+            space = SwapSpace(self.die.compile().incidence, units, options)
+            assignment = space.random_assignment(np.random.default_rng(1))
+            deltas = space.swap_deltas(assignment)
+
+            for row, (a, b) in enumerate(zip(space.swap_a, space.swap_b)):
+                swapped = assignment.copy()
+                swapped[a], swapped[b] = swapped[b], swapped[a]
+                np.testing.assert_allclose(space.vertex_weights(assignment) + deltas[row], space.vertex_weights(swapped))
+                self.assertAlmostEqual(self.die.calc_vertex_weight_sd(space.weights(swapped)),
+                                       float(space.vertex_weights(swapped).std()))
+
+    def test_weights_stay_in_the_search_space(self):
+        units, options = self.die.__get_placement_units__(True)
+        space = SwapSpace(self.die.compile().incidence, units, options)
+        weights = space.weights(space.random_assignment(np.random.default_rng(2)))
+
+        self.assertListEqual(list(range(1, 13)), sorted(weights))
+        self.assertEqual(1, weights[0])
+        for i, j in self.die.opposing_faces:
+            self.assertEqual(13, weights[i - 1] + weights[j - 1])
+
+
+class TestPortfolio(unittest.TestCase):
+    def test_portfolio_reaches_the_exact_optimum(self):
+        die = Die.from_dict(load_die_definitions()["d8"])
+        optimum, _ = die.calc_optimum_face_weights_locked_opposing_faces_dp()
+
+        sd, _ = die.calc_optimum_face_weights_portfolio(locked_opposing_faces=True, time_budget=20, target_sd=optimum,
+                                                        processes=2)
+
+        self.assertAlmostEqual(optimum, sd)
+        self.assertAlmostEqual(sd, float(np.std(die.__get_vertex_weights__())))
+        self.assertFalse(die.optimality_certificate.proven_optimal)
+
+    def test_portfolio_meeting_the_bound_is_proven(self):
+        die = Die.from_dict(load_die_definitions()["d8"])
+
+        sd, _ = die.calc_optimum_face_weights_portfolio(time_budget=20, processes=1)
+
+        self.assertAlmostEqual(0.0, sd)
+        self.assertTrue(die.optimality_certificate.proven_optimal)
+        self.assertEqual("bound", die.optimality_certificate.reason)
+
+    def test_every_strategy_improves(self):
+        die = Die.from_dict(load_die_definitions()["d12"])
+        units, options = die.__get_placement_units__(False)
+        space = SwapSpace(die.compile().incidence, units, options)
+        random_sd = float(space.vertex_weights(space.random_assignment(np.random.default_rng(0))).std())
+
+        for strategy in ("anneal", "tabu", "restart"):
+            assignment, sd, evaluations = run_portfolio(space, 0.5, 0.0, processes=1, strategies=(strategy,))
+            self.assertLess(sd, random_sd)
+            self.assertGreater(evaluations, 0)
+            self.assertAlmostEqual(sd, die.calc_vertex_weight_sd(space.weights(assignment)))
+
+    def test_no_time_still_gives_a_valid_placement(self):
+        die = Die.from_dict(load_die_definitions()["d20"])
+
+        for locked, processes in ((False, 1), (True, 2)):
+            sd, _ = die.calc_optimum_face_weights_portfolio(locked_opposing_faces=locked, time_budget=0,
+                                                            processes=processes)
+
+            weights = [v.weight for v in die.verts]
+            self.assertListEqual(list(range(1, 21)), sorted(weights))
+            if locked:
+                for i, j in die.opposing_faces:
+                    self.assertEqual(21, weights[i - 1] + weights[j - 1])
+            self.assertAlmostEqual(sd, die.calc_vertex_weight_sd(weights))
+            self.assertGreaterEqual(sd, die.optimality_certificate.lower_bound - 1e-9)
+
+    def test_unknown_strategies_are_rejected(self):
+        die = Die.from_dict(load_die_definitions()["d8"])
+
+        with self.assertRaises(ValueError):
+            die.calc_optimum_face_weights_portfolio(time_budget=1, strategies=("hill",))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from utils.pareto import ParetoFront, crowding_distance, non_dominated
+
+
+class TestNonDominated(unittest.TestCase):
+    def test_dominated_points_are_dropped(self):
+        scores = np.array([[1, 3], [2, 2], [2, 3], [3, 1], [3, 3]])
+
+        self.assertListEqual([True, True, False, True, False], list(non_dominated(scores)))
+
+    def test_duplicates_keep_the_first(self):
+        scores = np.array([[1, 2], [2, 1], [1, 2]])
+
+        self.assertListEqual([True, True, False], list(non_dominated(scores)))
+
+    def test_crowding_distance_keeps_extremes(self):
+        distance = crowding_distance(np.array([[0, 4], [1, 3], [1.5, 2.5], [4, 0]]))
+
+        self.assertTrue(np.isinf(distance[0]))
+        self.assertTrue(np.isinf(distance[3]))
+        self.assertLess(distance[1], distance[2])
+
+
+class TestParetoFront(unittest.TestCase):
+    def test_update_merges_blocks(self):
+        front = ParetoFront(["a", "b"])
+
+        self.assertTrue(front.update(np.array([[2.0, 2.0]]), np.array([[1, 2]])))
+        self.assertFalse(front.update(np.array([[3.0, 3.0], [2.0, 2.0]]), np.array([[2, 1], [1, 2]])))
+        self.assertTrue(front.update(np.array([[1.0, 1.0]]), np.array([[2, 1]])))
+
+        self.assertEqual(1, len(front))
+        placement, scores = next(iter(front))
+        self.assertListEqual([2, 1], placement)
+        self.assertDictEqual({"a": 1.0, "b": 1.0}, scores)
+
+    def test_front_is_bounded(self):
+        front = ParetoFront(["a", "b"], max_size=5)
+        xs = np.linspace(0, 1, 50)
+        front.update(np.column_stack([xs, 1 - xs]), np.arange(50).reshape(-1, 1))
+
+        self.assertEqual(5, len(front))
+        kept = [p[0] for p, _ in front]
+        self.assertIn(0, kept)
+        self.assertIn(49, kept)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+
+import numpy as np
+
+from dice import Die, load_die_definitions
+from utils.generators import face_weights_locked_one_from_perms
+from utils.sampling import fraction_upper_bound, order_statistic_bounds, quantile_interval, sample_sds
+
+
+class TestSampling(unittest.TestCase):
+    def setUp(self):
+        self.die = Die.from_dict(load_die_definitions()["d10"])
+
+    def test_strata_are_sampled_evenly(self):
+        items = np.arange(2, 11, dtype=np.int16)
+        seen = []
+
+        def to_placements(perms):
+            seen.append(perms[:, 0].copy())
+            return face_weights_locked_one_from_perms(perms)
+
+        sds, best_weights, _ = sample_sds(self.die.compile(), items, to_placements, 0, 900, 900,
+                                          np.random.default_rng(0))
+
+        self.assertEqual(900, len(sds))
+        self.assertListEqual([100] * 9, np.bincount(np.concatenate(seen))[2:].tolist())
+        self.assertAlmostEqual(float(sds.min()), self.die.calc_vertex_weight_sd(best_weights), places=6)
+
+    def test_the_last_round_is_split_across_every_stratum(self):
+        items = np.arange(2, 11, dtype=np.int16)
+        seen = []
+
+        def to_placements(perms):
+            seen.append(perms[:, 0].copy())
+            return face_weights_locked_one_from_perms(perms)
+
+        sample_sds(self.die.compile(), items, to_placements, 60, 1000, 900, np.random.default_rng(0))
+
+        self.assertListEqual([100] * 9, np.bincount(seen[0])[2:].tolist())
+        counts = np.bincount(seen[1], minlength=11)[2:]
+        self.assertEqual(100, counts.sum())
+        self.assertLessEqual(counts.max() - counts.min(), 1)
+
+    def test_quantiles_cover_the_exact_distribution(self):
+        summary, _ = self.die.calc_vertex_weight_sd_sample(time_budget=0, max_samples=200000, quantiles=(0.01, 0.1),
+                                                           seed=3)
+        block = self.die.__get_ranked_placements__(False)[1](0, 362880)
+        exact = np.sort(self.die.compile().objective("vertex_weight_sd")(block))
+
+        for q, (estimate, low, high) in summary.quantiles.items():
+            self.assertIsNotNone(low)
+            self.assertIsNotNone(high)
+            self.assertLessEqual(low, estimate)
+            self.assertLessEqual(estimate, high)
+            self.assertLessEqual(low, exact[int(q * len(exact))] + 1e-6)
+            self.assertGreaterEqual(high, exact[int(q * len(exact))] - 1e-6)
+
+    def test_better_placements_are_bounded(self):
+        optimum, _ = self.die.calc_optimum_face_weights_free_opposing_faces_dp()
+
+        summary, _ = self.die.calc_vertex_weight_sd_sample(time_budget=0, max_samples=20000, seed=0)
+
+        self.assertAlmostEqual(optimum, summary.incumbent_sd)
+        self.assertEqual(0, summary.better_count)
+        self.assertAlmostEqual(1 - 0.05 ** (1 / 20000), summary.better_fraction_upper)
+
+        worse, _ = self.die.calc_vertex_weight_sd_sample(time_budget=0, max_samples=20000, incumbent_sd=1.0, seed=0)
+        self.assertGreater(worse.better_count, 0)
+        self.assertGreater(worse.better_fraction_upper, worse.better_count / worse.num_samples)
+
+    def test_upper_bound(self):
+        self.assertAlmostEqual(3 / 1000, fraction_upper_bound(0, 1000, 0.95), places=4)
+        self.assertLess(fraction_upper_bound(10, 1000, 0.95), 0.02)
+        self.assertGreater(fraction_upper_bound(10, 1000, 0.95), 0.01)
+
+    def test_quantile_interval(self):
+        sds = np.arange(1000, dtype=float)
+
+        estimate, low, high = quantile_interval(sds, 0.5, 0.95)
+
+        self.assertEqual(500, estimate)
+        self.assertEqual(468, low)
+        self.assertEqual(531, high)
+
+    def test_thin_tails_are_unbounded(self):
+        # about one sample in the tail, which cannot bound the quantile from below
+        estimate, low, high = quantile_interval(np.arange(10000, dtype=float), 1e-4, 0.95)
+
+        self.assertEqual(1, estimate)
+        self.assertIsNone(low)
+        self.assertEqual(3, high)
+        self.assertTupleEqual((None, None), order_statistic_bounds(10, 0.5, 0.999))
+
+    def test_intervals_cover_small_quantiles(self):
+        rng = np.random.default_rng(0)
+        n, trials = 2000, 2000
+
+        for q in (0.001, 0.005):
+            low, high = order_statistic_bounds(n, q, 0.95)
+            # the number of uniform samples below the quantile q is binomial(n, q)
+            below = rng.binomial(n, q, trials)
+            low_ok = below > low if low is not None else np.ones(trials, dtype=bool)
+            self.assertGreaterEqual(float(np.mean(low_ok & (below <= high))), 0.95)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+
+from dice import Die, load_die_definitions
+from utils.shard_queue import ShardQueue, reduce_shards, shard_worker
+
+
+class TestShardQueue(unittest.TestCase):
+    def setUp(self):
+        self.die = Die.from_dict(load_die_definitions()["d8"])
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "queue.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_workers_match_the_exhaustive_search(self):
+        die = Die.from_dict(load_die_definitions()["d10"])
+        sd, _ = die.calc_optimum_face_weights_free_opposing_faces_dp()
+        results = []
+
+        for processes in (1, 3):
+            path = os.path.join(self.directory.name, "queue{}.sqlite".format(processes))
+            distributed_sd, _ = die.calc_optimum_face_weights_distributed(path, processes=processes,
+                                                                          shard_size=20000, block_size=4096)
+            results.append([v.weight for v in die.verts])
+            self.assertAlmostEqual(sd, distributed_sd)
+            self.assertEqual("exhausted", die.optimality_certificate.reason)
+
+        # the reducer picks the same placement however the shards were split between the workers
+        self.assertListEqual(results[0], results[1])
+
+    def test_crashed_leases_are_leased_again(self):
+        self.assertTrue(self.die.publish_optimum_search(self.path, shard_size=500, block_size=128))
+        queue = ShardQueue(self.path)
+        crashed = queue.lease("crashed", lease_seconds=0.2)
+
+        self.assertEqual(11, shard_worker(self.path, "survivor", poll_seconds=0.05))
+
+        results = queue.results()
+        queue.close()
+        self.assertEqual(11, len(results))
+        self.assertEqual(2, results[crashed[0] - 1][3])
+        self.assertAlmostEqual(self.die.calc_optimum_face_weights_free_opposing_faces()[0],
+                               self.die.collect_optimum_face_weights(self.path))
+
+    def test_lost_leases_are_not_renewed_or_completed(self):
+        self.die.publish_optimum_search(self.path, shard_size=5040)
+        queue = ShardQueue(self.path)
+        shard_id, _, _ = queue.lease("slow", lease_seconds=0.05)
+        time.sleep(0.1)
+
+        self.assertEqual((shard_id, 0, 5040), queue.lease("fast", lease_seconds=60))
+        self.assertFalse(queue.renew(shard_id, "slow", 60))
+        self.assertFalse(queue.complete(shard_id, "slow", 0, 0, [1] * 8))
+        self.assertTrue(queue.renew(shard_id, "fast", 60))
+        self.assertIsNone(queue.lease("idle", lease_seconds=60))
+        self.assertDictEqual({"done": 0, "leased": 1, "waiting": 0}, queue.progress())
+        queue.close()
+        with self.assertRaises(ValueError):
+            reduce_shards(self.path)
+
+    def test_empty_queues_cannot_be_reduced(self):
+        ShardQueue(self.path).close()
+
+        with self.assertRaisesRegex(ValueError, "no shards"):
+            reduce_shards(self.path)
+
+    def test_publishing_again_resumes(self):
+        self.assertTrue(self.die.publish_optimum_search(self.path, shard_size=500))
+        queue = ShardQueue(self.path)
+        queue.lease("worker", lease_seconds=60)
+        queue.close()
+
+        self.assertFalse(self.die.publish_optimum_search(self.path, shard_size=500))
+        with self.assertRaises(ValueError):
+            self.die.publish_optimum_search(self.path, locked_opposing_faces=True)
+        with self.assertRaises(ValueError):
+            Die.from_dict(load_die_definitions()["d6"]).collect_optimum_face_weights(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from solver_service import serve
+
+
+class TestSolverService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.service = serve(port=0, max_workers=1)
+        cls.url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.shutdown()
+
+    def post(self, path, body):
+        request = urllib.request.Request(self.url + path, data=json.dumps(body).encode(), method="POST")
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+
+    def test_solve_standard_die(self):
+        status, body = self.post("/solve", {"die": "d8", "mode": "locked_dp"})
+
+        self.assertEqual(200, status)
+        self.assertEqual("done", body["status"])
+        self.assertAlmostEqual(1.1902, body["result"]["sd"], places=4)
+        self.assertTrue(body["result"]["proven_optimal"])
+
+    def test_identical_jobs_share_an_id(self):
+        definition = {"num_faces": 4, "adjacent_faces": [[1, 2], [1, 3], [1, 4], [2, 3], [2, 4], [3, 4]],
+                      "num_faces_on_vertices": 3, "opposing_faces": [[1, 3], [2, 4]]}
+
+        _, first = self.post("/jobs", {"die": definition, "mode": "free"})
+        _, second = self.post("/jobs", {"die": dict(reversed(definition.items())), "mode": "free"})
+        self.assertEqual(first["id"], second["id"])
+
+        with urllib.request.urlopen("{}/jobs/{}?wait=60".format(self.url, first["id"])) as response:
+            body = json.loads(response.read())
+        self.assertEqual("done", body["status"])
+        self.assertEqual(4, len(body["result"]["weights"]))
+
+    def test_bad_requests(self):
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            self.post("/jobs", {"die": "d7"})
+        self.assertEqual(400, e.exception.code)
+
+        for body in (["d8"], "d8", None):
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                self.post("/solve", body)
+            self.assertEqual(400, e.exception.code)
+
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(self.url + "/jobs/nope?wait=soon")
+        self.assertEqual(400, e.exception.code)
+
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(self.url + "/jobs/nope")
+        self.assertEqual(404, e.exception.code)
+
+
+if __name__ == '__main__':
+    unittest.main()
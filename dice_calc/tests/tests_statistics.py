@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from utils.statistics import SdDistribution
+
+
+class TestSdDistribution(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.sds = np.random.default_rng(7).uniform(0, 2, size=10000)
+
+    def test_moments(self):
+        distribution = SdDistribution(bins=100, high=2)
+        for block in np.array_split(self.sds, 7):
+            distribution.add(block)
+
+        self.assertEqual(len(self.sds), distribution.count)
+        self.assertAlmostEqual(self.sds.mean(), distribution.mean)
+        self.assertAlmostEqual(self.sds.var(), distribution.variance)
+        self.assertEqual(self.sds.min(), distribution.min)
+
+    def test_merge_matches_single_pass(self):
+        whole = SdDistribution(bins=50, high=2)
+        whole.add(self.sds)
+        first, second = SdDistribution(bins=50, high=2), SdDistribution(bins=50, high=2)
+        first.add(self.sds[:3000])
+        second.add(self.sds[3000:])
+
+        merged = first.merge(second)
+
+        np.testing.assert_array_equal(whole.counts, merged.counts)
+        self.assertAlmostEqual(whole.mean, merged.mean)
+        self.assertAlmostEqual(whole.variance, merged.variance)
+
+    def test_quantiles_and_percentiles(self):
+        distribution = SdDistribution(bins=200, high=2)
+        distribution.add(self.sds)
+
+        self.assertAlmostEqual(np.quantile(self.sds, 0.1), distribution.quantile(0.1), places=2)
+        self.assertAlmostEqual(np.median(self.sds), distribution.quantile(0.5), places=2)
+        self.assertAlmostEqual(100 * (self.sds < 0.5).mean(), distribution.percentile_of(0.5), places=0)
+        self.assertEqual(0, distribution.percentile_of(0))
+
+    def test_large_values_go_in_the_last_bin(self):
+        distribution = SdDistribution(bins=4, high=1)
+        distribution.add(np.array([0.1, 5.0]))
+
+        self.assertListEqual([1, 0, 0, 1], list(distribution.counts))
+
+
+if __name__ == '__main__':
+    unittest.main()
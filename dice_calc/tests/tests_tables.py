@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dice import Die, load_die_definitions
+
+
+class TestSdTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.die = Die.from_dict(load_die_definitions()["d6"])
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "d6.npy")
+        cls.table = cls.die.materialize_vertex_weight_sd_table(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.table
+        cls.directory.cleanup()
+
+    def test_table_holds_every_placement(self):
+        self.assertEqual(120, len(self.table))
+        for rank in (0, 17, 119):
+            weights = self.table.placement(rank)
+            self.assertEqual(rank, self.table.rank_of(weights))
+            self.assertAlmostEqual(self.die.calc_vertex_weight_sd(weights), self.table.sd(rank), places=6)
+        self.assertRaises(ValueError, self.table.rank_of, [1, 1, 3, 4, 5, 6])
+        self.assertRaises(ValueError, self.table.rank_of, [2, 1, 3, 4, 5, 6])
+
+    def test_best_matches_search(self):
+        sd, _ = self.die.calc_optimum_face_weights_free_opposing_faces()
+
+        weights, best_sd = self.table.best()
+
+        self.assertAlmostEqual(sd, best_sd, places=6)
+        self.assertListEqual([v.weight for v in self.die.verts], weights)
+
+    def test_best_with_fixed_faces(self):
+        weights, sd = self.table.best({6: 2, 2: 3})
+
+        self.assertEqual(2, weights[5])
+        self.assertEqual(3, weights[1])
+        self.assertGreaterEqual(sd, self.table.best()[1])
+
+    def test_threshold_queries(self):
+        threshold = float(np.median(self.table.sd(np.arange(120))))
+
+        ranks = self.table.ranks_below(threshold)
+
+        self.assertTrue(np.all(self.table.sd(ranks) <= threshold))
+        self.assertAlmostEqual(100 * len(self.table.ranks_below(0.5)) / 120, self.table.percentile_of(0.5 + 1e-6))
+
+    def test_reopen_and_fixed_point(self):
+        reopened = self.die.open_vertex_weight_sd_table(self.path)
+        fixed = self.die.materialize_vertex_weight_sd_table(os.path.join(self.directory.name, "q.npy"), dtype="uint16")
+
+        np.testing.assert_allclose(self.table.sd(np.arange(120)), reopened.sd(np.arange(120)))
+        np.testing.assert_allclose(self.table.sd(np.arange(120)), fixed.sd(np.arange(120)), atol=fixed.scale)
+
+    def test_locked_table(self):
+        table = self.die.materialize_vertex_weight_sd_table(os.path.join(self.directory.name, "l.npy"),
+                                                            locked_opposing_faces=True)
+        sd, _ = self.die.calc_optimum_face_weights_locked_opposing_faces()
+
+        self.assertEqual(2, len(table))
+        self.assertAlmostEqual(sd, table.best()[1], places=6)
+        for rank in range(len(table)):
+            self.assertEqual(rank, table.rank_of(table.placement(rank)))
+        i, j = next((i, j) for i, j in self.die.opposing_faces if 1 not in (i, j))
+        flipped = table.placement(0)
+        flipped[i - 1], flipped[j - 1] = flipped[j - 1], flipped[i - 1]
+        self.assertRaises(ValueError, table.rank_of, flipped)
+        self.assertRaises(ValueError, Die(
+            num_faces=4, adjacent_faces=[(1, 2), (1, 3), (1, 4), (2, 3), (2, 4), (3, 4)], num_faces_on_vertices=3,
+            opposing_faces=[(1, 3), (2, 4)]
+        ).open_vertex_weight_sd_table, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def aiterate(iter_solver, *args, **kwargs):
+    """
+    Turns one of the Die.iter_* anytime solvers into an async iterator. The solver runs in a worker thread so that the
+    event loop stays responsive, and its results are handed over as soon as they are yielded. Leaving the loop early,
+    or cancelling the task that runs it, stops the solver cooperatively through its cancel event and waits for the
+    worker thread to finish.
+
+    :param iter_solver: a Die.iter_* method
+    :param args: positional arguments for the solver
+    :param kwargs: keyword arguments for the solver. A cancel event is created unless one is given
+    :return: an async iterator of whatever the solver yields
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancel = kwargs.setdefault("cancel", threading.Event())
+
+    def produce():
+        solver = iter_solver(*args, **kwargs)
+        try:
+            for item in solver:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+                if cancel.is_set():
+                    break
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, _Failure(e))
+        finally:
+            solver.close()
+            loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+    worker = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        cancel.set()
+        await asyncio.shield(worker)
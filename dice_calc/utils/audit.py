@@ -0,0 +1,212 @@
+import csv
+import json
+import math
+import os
+
+import numpy as np
+
+from utils.compiled import CompiledDie
+from utils.generators import FACE_WEIGHT_DTYPE
+
+AUDIT_FIELDS = ("layout", "sd", "sd_ratio", "optimum_gap")
+
+
+class AuditChunk:
+    def __init__(self, labels: list, placements: np.ndarray, sds: np.ndarray, total_sd: float, best_sd: float = None):
+        """
+        The scores of a chunk of audited layouts
+        :param labels: the name of each layout, or its row number in the source
+        :param placements: the face weights of each layout, one per row
+        :param sds: the vertex weight sd of each layout
+        :param total_sd: the sd of the face values, which is what an sd ratio is relative to
+        :param best_sd: the sd of the best known placement, None if there is none
+        """
+        self.labels = labels
+        self.placements = placements
+        self.sds = sds
+        self.ratios = sds / total_sd
+        self.gaps = None if best_sd is None else sds - best_sd
+
+    def __len__(self):
+        return len(self.labels)
+
+    def rows(self):
+        """
+        :return: a generator of one dict per layout, with AUDIT_FIELDS as keys. optimum_gap is None if there is no best
+            known placement
+        """
+        for i, label in enumerate(self.labels):
+            yield {
+                "layout": label,
+                "sd": float(self.sds[i]),
+                "sd_ratio": float(self.ratios[i]),
+                "optimum_gap": None if self.gaps is None else float(self.gaps[i]),
+            }
+
+
+def check_placements(labels: list, block: np.ndarray, num_faces: int):
+    """
+    :param labels: the name of each layout
+    :param block: face weights, one layout per row
+    :param num_faces: the number of faces on the die
+    :throws: a ValueError naming the first layout that does not use each value from 1 to num_faces once
+    """
+    if block.ndim != 2 or block.shape[1] != num_faces:
+        raise ValueError("Layouts need {} face values, got shape {}".format(num_faces, block.shape))
+    valid = (np.sort(block, axis=1) == np.arange(1, num_faces + 1)).all(axis=1)
+    if not valid.all():
+        i = int(np.argmin(valid))
+        raise ValueError("Layout {} is not a numbering of 1 to {}: {}".format(labels[i], num_faces, block[i].tolist()))
+
+
+def check_values(labels: list, block: np.ndarray, num_faces: int):
+    """
+    Checks that layouts can be cast to FACE_WEIGHT_DTYPE without changing them
+    :param labels: the name of each layout
+    :param block: face weights, one layout per row, in any integer dtype
+    :param num_faces: the number of faces on the die
+    :throws: a ValueError naming the first layout with a value that is not a face value
+    """
+    if block.ndim != 2 or block.shape[1] != num_faces:
+        raise ValueError("Layouts need {} face values, got shape {}".format(num_faces, block.shape))
+    valid = ((block >= 1) & (block <= num_faces)).all(axis=1)
+    if not valid.all():
+        i = int(np.argmin(valid))
+        raise ValueError("Layout {} is not a numbering of 1 to {}: {}".format(labels[i], num_faces, block[i].tolist()))
+
+
+def to_block(labels: list, rows: list, num_faces: int) -> np.ndarray:
+    """
+    :param labels: the name of each layout
+    :param rows: the face weights of each layout, as lists of ints
+    :param num_faces: the number of faces on the die
+    :throws: a ValueError naming the first layout with the wrong number of values, or a value that is not an integer
+        face value
+    :return: the layouts as a block of FACE_WEIGHT_DTYPE
+    """
+    for label, row in zip(labels, rows):
+        if len(row) != num_faces or not all(isinstance(v, int) and not isinstance(v, bool) for v in row):
+            raise ValueError("Layout {} is not {} integer face values: {}".format(label, num_faces, row))
+    block = np.array(rows, dtype=np.int64)
+    check_values(labels, block, num_faces)
+    return block.astype(FACE_WEIGHT_DTYPE)
+
+
+def read_layout_chunks(source, num_faces: int, chunk_size: int = 65536):
+    """
+    Streams layouts in chunks, so sources of any size can be audited in bounded memory. Sources can be
+    - a 2d array, or the path of a .npy file, of integer face weights with one layout per row, labelled by row number
+    - a .csv file with one layout per row: the face weights in face order, optionally after a name column. A header row
+      is skipped
+    - a .jsonl file with one layout per line: a list of face weights, or an object with "weights" and an optional
+      "name"
+    :param source: the layouts
+    :param num_faces: the number of faces on the die
+    :param chunk_size: the number of layouts per chunk
+    :throws: a ValueError naming the first layout that does not have num_faces integer values from 1 to num_faces
+    :return: a generator of (labels, block of face weights) chunks
+    """
+    if isinstance(source, np.ndarray) or str(source).endswith(".npy"):
+        array = source if isinstance(source, np.ndarray) else np.load(source, mmap_mode="r")
+        if not np.issubdtype(array.dtype, np.integer):
+            raise ValueError("Layouts need integer face values, got {} values".format(array.dtype))
+        for start in range(0, len(array), chunk_size):
+            block = np.asarray(array[start:start + chunk_size])
+            labels = list(range(start, start + len(block)))
+            check_values(labels, block, num_faces)
+            yield labels, block.astype(FACE_WEIGHT_DTYPE)
+        return
+
+    extension = os.path.splitext(str(source))[1]
+    if extension == ".csv":
+        records = csv_layouts(source, num_faces)
+    elif extension == ".jsonl":
+        records = jsonl_layouts(source)
+    else:
+        raise ValueError("Unknown layout source {}, use a .npy, .csv or .jsonl file or a NumPy array".format(source))
+
+    labels, weights = [], []
+    for label, row in records:
+        labels.append(label)
+        weights.append(row)
+        if len(labels) == chunk_size:
+            yield labels, to_block(labels, weights, num_faces)
+            labels, weights = [], []
+    if labels:
+        yield labels, to_block(labels, weights, num_faces)
+
+
+def csv_layouts(path: str, num_faces: int):
+    """
+    :param path: a .csv file of layouts, see read_layout_chunks
+    :param num_faces: the number of faces on the die
+    :return: a generator of (label, face weights)
+    """
+    with open(path, newline="") as f:
+        for i, row in enumerate(csv.reader(f)):
+            if not row:
+                continue
+            label, values = (row[0], row[1:]) if len(row) == num_faces + 1 else (i, row)
+            try:
+                yield label, [int(v) for v in values]
+            except ValueError:
+                if i:
+                    raise ValueError("Row {} of {} is not a layout: {}".format(i, path, row))
+
+
+def jsonl_layouts(path: str):
+    """
+    :param path: a .jsonl file of layouts, see read_layout_chunks
+    :throws: a ValueError if a record has no face weights
+    :return: a generator of (label, face weights)
+    """
+    with open(path) as f:
+        for i, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict):
+                if "weights" not in record:
+                    raise ValueError("Layout {} on line {} of {} has no weights".format(record.get("name", i), i, path))
+                yield record.get("name", i), record["weights"]
+            else:
+                yield i, record
+
+
+def audit_layouts(compiled: CompiledDie, chunks, best_sd: float = None):
+    """
+    Scores chunks of layouts by the sd of their vertex weights, with the exact integer kernel
+    :param compiled: the compiled die
+    :param chunks: (labels, block of face weights) chunks, see read_layout_chunks
+    :param best_sd: the sd of the best known placement, to report each layout's gap to it
+    :return: a generator of AuditChunks
+    """
+    total_sd = math.sqrt((compiled.num_faces ** 2 - 1) / 12)
+    for labels, block in chunks:
+        check_placements(labels, block, compiled.num_faces)
+        sds = compiled.objective_sd(compiled.vertex_weight_objective(block))
+        yield AuditChunk(labels, block, sds, total_sd, best_sd)
+
+
+def write_audit(chunks, out, output_format: str = "csv") -> int:
+    """
+    Streams audit results to a text file as they are scored
+    :param chunks: AuditChunks, see audit_layouts
+    :param out: a writable text file
+    :param output_format: "csv" for a header and one row per layout, "jsonl" for one object per layout
+    :return: the number of layouts written
+    """
+    if output_format not in ("csv", "jsonl"):
+        raise ValueError("Unknown output format {}, choose from csv or jsonl".format(output_format))
+    writer = csv.DictWriter(out, AUDIT_FIELDS) if output_format == "csv" else None
+    if writer:
+        writer.writeheader()
+    count = 0
+    for chunk in chunks:
+        for row in chunk.rows():
+            if writer:
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(row) + "\n")
+        count += len(chunk)
+    return count
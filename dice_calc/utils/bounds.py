@@ -0,0 +1,109 @@
+import math
+from fractions import Fraction
+
+# Floating point slack used when comparing a computed sd against an exact bound
+BOUND_TOLERANCE = 1e-9
+
+
+class OptimalityCertificate:
+    def __init__(self, sd: float, lower_bound: float, proven_optimal: bool, reason: str, placements_checked: int,
+                 objective: str = "vertex_weight_sd", locked_opposing_faces: bool = False):
+        """
+        A record of how good a search result is known to be.
+
+        :param sd: the vertex weight sd of the returned placement
+        :param lower_bound: a proven lower bound on the vertex weight sd of any placement in the search space
+        :param proven_optimal: whether the returned placement is proven to be optimal
+        :param reason: why the result is (or is not) proven optimal. "bound" if the incumbent met the lower bound,
+            "exhausted" if the whole search space was scanned, "exact" if an exact solver covered the space implicitly,
+            "unproven" otherwise
+        :param placements_checked: the number of (partial) placements evaluated before the search stopped
+        :param objective: what the search minimized, sd is its score
+        :param locked_opposing_faces: whether the search was limited to placements whose opposing faces add up to the
+            same value
+        """
+        self.sd = sd
+        self.lower_bound = lower_bound
+        self.proven_optimal = proven_optimal
+        self.reason = reason
+        self.placements_checked = placements_checked
+        self.objective = objective
+        self.locked_opposing_faces = locked_opposing_faces
+
+    @property
+    def gap(self) -> float:
+        return max(0.0, self.sd - self.lower_bound)
+
+    def __str__(self):
+        if self.proven_optimal:
+            status = "proven optimal ({})".format(self.reason)
+        else:
+            status = "not proven optimal, gap {:.4f}".format(self.gap)
+        return "sd {:.4f}, lower bound {:.4f}, {} after {} placements".format(
+            self.sd, self.lower_bound, status, self.placements_checked
+        )
+
+    def __repr__(self):
+        return str(self)
+
+
+def meets_bound(sd: float, lower_bound: float) -> bool:
+    return sd <= lower_bound + BOUND_TOLERANCE
+
+
+def fixed_vertex_weight_mean(cycle_faces: list[list[int]], face_values: list[int]):
+    """
+    The mean of the vertex weights is the same for every placement when every face contributes the same amount to it,
+    ie. when sum(1 / len(cycle)) over the cycles touching a face is identical for all faces.
+
+    :param cycle_faces: the face indices around each vertex of the die
+    :param face_values: the multiset of values that are placed on the faces
+    :return: the exact mean as a Fraction, or None if the mean depends on the placement
+    """
+    coverage = [Fraction(0)] * len(face_values)
+    for cycle in cycle_faces:
+        for f in cycle:
+            coverage[f] += Fraction(1, len(cycle))
+
+    if len(set(coverage)) != 1:
+        return None
+    return coverage[0] * sum(Fraction(v) for v in face_values) / len(cycle_faces)
+
+
+def vertex_weight_sd_lower_bound(cycle_faces: list[list[int]], face_values: list[int]) -> float:
+    """
+    Derives a lower bound on the population sd of the vertex weights of any placement of face_values.
+
+    Every vertex weight is a cycle sum divided by the cycle length, and cycle sums of integer face values are integers.
+    When the vertex weight mean is fixed (see fixed_vertex_weight_mean) and all cycles have the same length k, the
+    cycle sums are integers with a fixed total, so the best they can do is to be split between floor and ceil of the
+    mean cycle sum. With mixed cycle lengths each vertex weight can at best sit on the multiple of 1 / k closest to
+    the mean.
+    If the mean is not fixed, or the face values are not integers, the only bound is 0.
+
+    :param cycle_faces: the face indices around each vertex of the die
+    :param face_values: the multiset of values that are placed on the faces
+    :return: a lower bound on the vertex weight sd
+    """
+    if not cycle_faces or any(Fraction(v).denominator != 1 for v in face_values):
+        return 0.0
+
+    mean = fixed_vertex_weight_mean(cycle_faces, face_values)
+    if mean is None:
+        return 0.0
+
+    num_cycles = len(cycle_faces)
+    cycle_lens = {len(c) for c in cycle_faces}
+    if len(cycle_lens) == 1:
+        k = cycle_lens.pop()
+        total = mean * k * num_cycles
+        assert total.denominator == 1
+        r = total.numerator % num_cycles
+        return math.sqrt(r * (num_cycles - r)) / (num_cycles * k)
+
+    variance = Fraction(0)
+    for cycle in cycle_faces:
+        k = len(cycle)
+        frac = (mean * k) - math.floor(mean * k)
+        variance += (min(frac, 1 - frac) / k) ** 2
+    return math.sqrt(variance / num_cycles)
@@ -0,0 +1,324 @@
+"""
+An exact parallel search for the placement with the lowest vertex weight sd. Workers search subtrees depth first and
+prune with the best sd any of them has found, which they share through shared memory. A worker that runs out of work
+says so, and the busy workers hand it the largest subtree they have not started yet.
+"""
+import math
+import multiprocessing
+import queue
+
+from utils.bounds import BOUND_TOLERANCE, fixed_vertex_weight_mean
+from utils.frontier import elimination_order
+from utils.heuristics import Incumbent
+
+# how many nodes a worker searches between looks at the shared state
+CHECK_INTERVAL = 256
+
+
+class SearchTree:
+    def __init__(self, cycle_faces: list[list[int]], units: list[tuple[int, ...]], options: list[list[tuple[int, ...]]]):
+        """
+        The search tree of a placement space: level d assigns a value tuple to the d-th unit, in an elimination order
+        that closes cycles early so that their sums are known and the bounds are tight.
+        :param cycle_faces: the face indices around each vertex of the die
+        :param units: groups of face indices that are assigned together
+        :param options: for each unit, the tuples of values its faces can take. No value can be used twice.
+        """
+        order = elimination_order(units, cycle_faces)
+        self.cycle_faces = [list(c) for c in cycle_faces]
+        self.units = [tuple(units[u]) for u in order]
+        self.options = [list(options[u]) for u in order]
+        self.num_faces = sum(len(u) for u in units)
+        self.cycle_lengths = [len(c) for c in cycle_faces]
+
+        face_cycles = [[] for _ in range(self.num_faces)]
+        for i, cycle in enumerate(cycle_faces):
+            for f in cycle:
+                face_cycles[f].append(i)
+        # what each option of each level adds to the cycle sums, and the values it uses as a bitmask
+        self.option_adds = []
+        self.option_masks = []
+        for unit, unit_options in zip(self.units, self.options):
+            self.option_adds.append([[(i, v) for f, v in zip(unit, option) for i in face_cycles[f]]
+                                     for option in unit_options])
+            self.option_masks.append([sum(1 << v for v in option) for option in unit_options])
+
+        self.values = sorted({v for unit_options in options for option in unit_options for v in option})
+        mean = None
+        if len(self.values) == self.num_faces:
+            mean = fixed_vertex_weight_mean(cycle_faces, self.values)
+        self.mean = None if mean is None else float(mean)
+
+    def sd(self, weights: list[int]) -> float:
+        """
+        :param weights: the face weights of a complete placement
+        :return: its vertex weight sd
+        """
+        vertex_weights = [sum(weights[f] for f in c) / len(c) for c in self.cycle_faces]
+        mean = sum(vertex_weights) / len(vertex_weights)
+        return math.sqrt(sum((w - mean) ** 2 for w in vertex_weights) / len(vertex_weights))
+
+
+class BranchAndBoundWorker:
+    def __init__(self, tree: SearchTree, tasks, pending, hungry, incumbent: Incumbent):
+        """
+        Searches subtrees of a SearchTree, given as the prefix of options that leads to them
+        :param tree: the search tree
+        :param tasks: a multiprocessing.Queue of subtree prefixes
+        :param pending: a shared count of the subtrees queued or being searched
+        :param hungry: a shared count of the idle workers that no subtree has been queued for yet
+        :param incumbent: the shared best placement
+        """
+        self.tree = tree
+        self.tasks = tasks
+        self.pending = pending
+        self.hungry = hungry
+        self.incumbent = incumbent
+        self.best_sd = math.inf
+        self.nodes = 0
+
+        self.sums = [0] * len(tree.cycle_lengths)
+        self.remaining = list(tree.cycle_lengths)
+        self.used = 0
+        self.path = []
+
+    def apply(self, option: int):
+        depth = len(self.path)
+        for i, v in self.tree.option_adds[depth][option]:
+            self.sums[i] += v
+            self.remaining[i] -= 1
+        self.used |= self.tree.option_masks[depth][option]
+        self.path.append(option)
+
+    def undo(self):
+        option = self.path.pop()
+        depth = len(self.path)
+        for i, v in self.tree.option_adds[depth][option]:
+            self.sums[i] -= v
+            self.remaining[i] += 1
+        self.used &= ~self.tree.option_masks[depth][option]
+
+    def bound(self) -> float:
+        """
+        A lower bound on the vertex weight sd of every placement below the current node. A closed cycle's vertex weight
+        is known. An open cycle's sum is an integer between its partial sum plus the smallest and the largest unused
+        values, so its vertex weight is at least the distance from the mean to the closest such sum away. Without a
+        fixed mean only the closed cycles count.
+        :return: the bound, the exact sd at a leaf
+        """
+        tree = self.tree
+        if tree.mean is None:
+            closed = [s / k for s, k, r in zip(self.sums, tree.cycle_lengths, self.remaining) if r == 0]
+            if not closed:
+                return 0.0
+            mean = sum(closed) / len(closed)
+            return math.sqrt(sum((w - mean) ** 2 for w in closed) / len(self.sums))
+
+        unused = [v for v in tree.values if not self.used >> v & 1]
+        smallest = [0]
+        largest = [0]
+        for low, high in zip(unused, reversed(unused)):
+            smallest.append(smallest[-1] + low)
+            largest.append(largest[-1] + high)
+
+        total = 0.0
+        for s, k, r in zip(self.sums, tree.cycle_lengths, self.remaining):
+            target = tree.mean * k
+            if r == 0:
+                distance = s - target
+            elif target < s + smallest[r]:
+                distance = s + smallest[r] - target
+            elif target > s + largest[r]:
+                distance = target - s - largest[r]
+            else:
+                fraction = target - math.floor(target)
+                distance = min(fraction, 1 - fraction)
+            total += (distance / k) ** 2
+        return math.sqrt(total / len(self.sums))
+
+    def children(self) -> list[tuple[int, float]]:
+        """
+        :return: the options of the next level that can still beat the incumbent, with their bounds, worst first
+        """
+        depth = len(self.path)
+        children = []
+        for option, mask in enumerate(self.tree.option_masks[depth]):
+            if self.used & mask:
+                continue
+            self.apply(option)
+            bound = self.bound()
+            self.undo()
+            if bound < self.best_sd - BOUND_TOLERANCE:
+                children.append((option, bound))
+        children.sort(key=lambda child: -child[1])
+        return children
+
+    def weights(self) -> list[int]:
+        weights = [0] * self.tree.num_faces
+        for unit, options, option in zip(self.tree.units, self.tree.options, self.path):
+            for f, v in zip(unit, options[option]):
+                weights[f] = v
+        return weights
+
+    def donate(self, stack: list[list[tuple[int, float]]], base: int):
+        """
+        Hands the unstarted subtree closest to the root to an idle worker, if there is one
+        :param stack: the children still to search at every level below base
+        :param base: the depth of the subtree this worker is searching
+        :return: None
+        """
+        for level, frame in enumerate(stack):
+            if frame:
+                break
+        else:
+            return
+        with self.hungry.get_lock():
+            if self.hungry.value <= 0:
+                return
+            self.hungry.value -= 1
+        option, _ = frame.pop(0)
+        with self.pending.get_lock():
+            self.pending.value += 1
+        self.tasks.put(self.path[:base + level] + [option])
+
+    def move_to(self, prefix: list[int]):
+        """
+        Moves the path to the root of a subtree and catches up with the shared incumbent
+        :param prefix: the options that lead to the subtree
+        :return: None
+        """
+        while self.path:
+            self.undo()
+        for option in prefix:
+            self.apply(option)
+        self.best_sd = self.incumbent.sd.value
+
+    def check_in(self, stack: list[list[tuple[int, float]]], base: int) -> bool:
+        """
+        Catches up with the shared search now and then: picks up a better incumbent and donates work to idle workers
+        :param stack: the children still to search at every level below base
+        :param base: the depth of the subtree this worker is searching
+        :return: whether to keep searching
+        """
+        if self.incumbent.stop.is_set():
+            return False
+        self.best_sd = min(self.best_sd, self.incumbent.sd.value)
+        self.donate(stack, base)
+        return True
+
+    def offer_leaf(self, bound: float):
+        """
+        Offers the complete placement on the path as the incumbent, then steps back from it
+        :param bound: the placement's bound, which for a complete placement is its sd
+        :return: None
+        """
+        if self.incumbent.offer(bound, self.weights()):
+            self.best_sd = bound
+        self.best_sd = min(self.best_sd, self.incumbent.sd.value)
+        self.undo()
+
+    def explore(self, prefix: list[int]):
+        """
+        Searches the subtree below a prefix depth first, best bound first
+        :param prefix: the options that lead to the subtree
+        :return: None
+        """
+        self.move_to(prefix)
+        if self.bound() >= self.best_sd - BOUND_TOLERANCE:
+            return
+        if len(prefix) == len(self.tree.units):
+            self.incumbent.offer(self.bound(), self.weights())
+            return
+
+        base = len(prefix)
+        stack = [self.children()]
+        while stack:
+            self.nodes += 1
+            if self.nodes % CHECK_INTERVAL == 0 and not self.check_in(stack, base):
+                return
+            frame = stack[-1]
+            if not frame:
+                stack.pop()
+                if stack:
+                    self.undo()
+                continue
+            option, bound = frame.pop()
+            if bound >= self.best_sd - BOUND_TOLERANCE:
+                continue
+            self.apply(option)
+            if len(self.path) == len(self.tree.units):
+                self.offer_leaf(bound)
+            else:
+                stack.append(self.children())
+
+
+def branch_and_bound_worker(tree: SearchTree, tasks, pending, hungry, incumbent: Incumbent, nodes, slot: int):
+    """
+    Searches subtrees from the task queue until every subtree is done or the target sd is reached. Runs in worker
+    processes.
+    :param tree: the search tree
+    :param tasks: a multiprocessing.Queue of subtree prefixes
+    :param pending: a shared count of the subtrees queued or being searched
+    :param hungry: a shared count of the idle workers that no subtree has been queued for yet
+    :param incumbent: the shared best placement
+    :param nodes: a shared array of the number of nodes each worker searched
+    :param slot: this worker's index into nodes
+    :return: None
+    """
+    # a stopped search can leave subtrees in the queue, which must not keep the worker from exiting
+    tasks.cancel_join_thread()
+    worker = BranchAndBoundWorker(tree, tasks, pending, hungry, incumbent)
+    while not incumbent.stop.is_set():
+        try:
+            prefix = tasks.get(timeout=0.01)
+        except queue.Empty:
+            if pending.value == 0:
+                break
+            continue
+        worker.explore(prefix)
+        with hungry.get_lock():
+            hungry.value += 1
+        with pending.get_lock():
+            pending.value -= 1
+    nodes[slot] = worker.nodes
+
+
+def branch_and_bound_optimum(cycle_faces: list[list[int]], units: list[tuple[int, ...]],
+                             options: list[list[tuple[int, ...]]], processes: int = None, target_sd: float = 0.0,
+                             incumbent_weights: list[int] = None) -> tuple[list[int], float, int, bool]:
+    """
+    Finds the face weights that minimize the population sd of the die vertex weights with a parallel branch and bound
+    :param cycle_faces: the face indices around each vertex of the die
+    :param units: groups of face indices that are assigned together
+    :param options: for each unit, the tuples of values its faces can take. No value can be used twice.
+    :param processes: the number of worker processes, defaults to the number of cpus
+    :param target_sd: a proven lower bound, the search stops as soon as it is met
+    :param incumbent_weights: an optional known placement to prune with from the start
+    :return: the optimal face weights, their sd, the number of nodes searched, and whether the search stopped at the
+        target
+    """
+    tree = SearchTree(cycle_faces, units, options)
+    processes = processes or multiprocessing.cpu_count()
+    incumbent = Incumbent(tree.num_faces, target_sd)
+    if incumbent_weights is not None:
+        incumbent.offer(tree.sd(incumbent_weights), incumbent_weights)
+
+    tasks = multiprocessing.Queue()
+    pending = multiprocessing.Value("i", 1)
+    # every worker starts idle, and the root is already queued for one of them
+    hungry = multiprocessing.Value("i", processes - 1)
+    nodes = multiprocessing.Array("q", processes)
+    tasks.put([])
+    jobs = [(tree, tasks, pending, hungry, incumbent, nodes, i) for i in range(processes)]
+
+    if processes == 1:
+        branch_and_bound_worker(*jobs[0])
+    else:
+        workers = [multiprocessing.Process(target=branch_and_bound_worker, args=job) for job in jobs]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    sd, weights = incumbent.best()
+    return [int(w) for w in weights], sd, int(sum(nodes)), incumbent.stop.is_set()
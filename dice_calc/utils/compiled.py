@@ -0,0 +1,178 @@
+import math
+
+import numpy as np
+
+from utils.scoring import vertex_weight_objective, objective_sd, edge_sum_sd, opposing_halves_imbalance, \
+    consecutive_adjacencies, geometric_moment
+
+OBJECTIVES = ("vertex_weight_sd", "edge_sum_sd", "opposing_halves_imbalance", "consecutive_adjacencies")
+
+
+def read_only(array) -> np.ndarray:
+    array = np.array(array)
+    array.flags.writeable = False
+    return array
+
+
+class Placement:
+    __slots__ = ("weights",)
+
+    def __init__(self, weights):
+        """
+        An immutable placement of face weights (numbers) on a die, in face order
+        :param weights: the face weights
+        """
+        object.__setattr__(self, "weights", tuple(int(w) for w in weights))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Placements are immutable")
+
+    def __reduce__(self):
+        return Placement, (self.weights,)
+
+    def __eq__(self, other):
+        return isinstance(other, Placement) and self.weights == other.weights
+
+    def __hash__(self):
+        return hash(self.weights)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def __getitem__(self, *args, **kwargs):
+        return self.weights.__getitem__(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self.weights)
+
+    def __str__(self):
+        return str(["{}|{}".format(i + 1, w) for i, w in enumerate(self.weights)])
+
+    def __repr__(self):
+        return "Placement({})".format(list(self.weights))
+
+
+class CompiledDie:
+    __slots__ = ("num_faces", "cycles", "edges", "opposing_faces", "incidence", "membership", "scale", "lcm",
+                 "edge_index", "halves", "lever_arms", "value_masses")
+
+    def __init__(self, num_faces: int, cycles: list[list[int]], edges: list[tuple[int, int]],
+                 opposing_faces: list[tuple[int, int]], lever_arms: np.ndarray = None, value_masses: np.ndarray = None):
+        """
+        The topology of a die, with everything the scoring needs precomputed, frozen so that any number of threads can
+        share it. Build one with Die.compile.
+        :param num_faces: the number of faces on the die
+        :param cycles: the face indices around each vertex of the die
+        :param edges: pairs of face indices of adjacent faces
+        :param opposing_faces: pairs of (1 based) opposing face numbers
+        :param lever_arms: optional (faces x 3) offsets of the face centroids from the die centroid
+        :param value_masses: optional masses of each face value, indexed by the value
+        """
+        set_slot = super().__setattr__
+        set_slot("num_faces", num_faces)
+        set_slot("cycles", tuple(tuple(c) for c in cycles))
+        set_slot("edges", tuple(tuple(e) for e in edges))
+        set_slot("opposing_faces", tuple(tuple(p) for p in opposing_faces))
+
+        membership = np.zeros((len(self.cycles), num_faces), dtype=np.int16)
+        for i, cycle in enumerate(self.cycles):
+            membership[i, list(cycle)] = 1
+        lengths = membership.sum(axis=1)
+        set_slot("membership", read_only(membership))
+        set_slot("incidence", read_only(membership / lengths[:, None]))
+        set_slot("lcm", math.lcm(*lengths.tolist()))
+        set_slot("scale", read_only((self.lcm // lengths).astype(np.int32)))
+        set_slot("edge_index", read_only(np.array(self.edges, dtype=np.int64).reshape(-1, 2).T))
+        set_slot("halves", read_only(self.__calc_opposing_halves__()))
+        set_slot("lever_arms", None if lever_arms is None else read_only(lever_arms))
+        set_slot("value_masses", None if value_masses is None else read_only(value_masses))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Compiled dice are immutable")
+
+    def __reduce__(self):
+        return CompiledDie, (self.num_faces, self.cycles, self.edges, self.opposing_faces, self.lever_arms,
+                             self.value_masses)
+
+    def vertex_weight_objective(self, block: np.ndarray) -> np.ndarray:
+        """
+        :param block: integer face weights, one placement per row
+        :return: the exact integer vertex weight objective of each placement, lower is better
+        """
+        return vertex_weight_objective(block, self.membership, self.scale)
+
+    def objective_sd(self, objective):
+        """
+        :param objective: values of vertex_weight_objective
+        :return: the vertex weight sds they stand for
+        """
+        return objective_sd(objective, len(self.cycles), self.lcm)
+
+    def __calc_opposing_halves__(self) -> np.ndarray:
+        """
+        Splits the die in two for every pair of opposing faces: the faces closer to one face of the pair than the other
+        make up its half. Faces as close to both belong to neither.
+        :return: a (opposing pairs x faces) matrix with 1 for one half and -1 for the other
+        """
+        neighbours = [[] for _ in range(self.num_faces)]
+        for a, b in self.edges:
+            neighbours[a].append(b)
+            neighbours[b].append(a)
+
+        def distances(source: int) -> np.ndarray:
+            dist = [self.num_faces] * self.num_faces
+            dist[source] = 0
+            queue = [source]
+            for v in queue:
+                for u in neighbours[v]:
+                    if dist[u] > dist[v] + 1:
+                        dist[u] = dist[v] + 1
+                        queue.append(u)
+            return np.array(dist)
+
+        halves = np.zeros((len(self.opposing_faces), self.num_faces))
+        for i, (a, b) in enumerate(self.opposing_faces):
+            halves[i] = np.sign(distances(b - 1) - distances(a - 1))
+        return halves
+
+    def objective(self, name: str):
+        """
+        :param name: a name from OBJECTIVES, or "geometric_moment" for dice with a geometry
+        :return: a function that scores a block of face weights, one placement per row
+        """
+        if name == "vertex_weight_sd":
+            return lambda block: self.objective_sd(self.vertex_weight_objective(block))
+        if name == "edge_sum_sd":
+            return lambda block: edge_sum_sd(block, self.edge_index)
+        if name == "opposing_halves_imbalance":
+            return lambda block: opposing_halves_imbalance(block, self.halves)
+        if name == "consecutive_adjacencies":
+            return lambda block: consecutive_adjacencies(block, self.edge_index)
+        if name == "geometric_moment":
+            if self.lever_arms is None:
+                raise ValueError("The geometric_moment objective needs a die geometry, see Die.set_geometry")
+            return lambda block: geometric_moment(block, self.lever_arms, self.value_masses)
+        raise ValueError("Unknown objective {}, choose from {}".format(name, OBJECTIVES))
+
+
+def evaluate(compiled: CompiledDie, placement: Placement, objective: str = "vertex_weight_sd") -> float:
+    """
+    Scores one placement. Touches nothing but its arguments, so it is safe to call from many threads at once.
+    :param compiled: the compiled die
+    :param placement: the placement
+    :param objective: a name from OBJECTIVES, or "geometric_moment"
+    :return: the score
+    """
+    return float(compiled.objective(objective)(np.array([placement.weights]))[0])
+
+
+def evaluate_block(compiled: CompiledDie, block: np.ndarray, objective: str = "vertex_weight_sd") -> np.ndarray:
+    """
+    Scores a block of placements. Touches nothing but its arguments, and NumPy releases the GIL for the heavy part, so
+    threads that share a compiled die can score blocks in parallel.
+    :param compiled: the compiled die
+    :param block: face weights, one placement per row
+    :param objective: a name from OBJECTIVES, or "geometric_moment"
+    :return: the score of each placement
+    """
+    return compiled.objective(objective)(np.asarray(block))
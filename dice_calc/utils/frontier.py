@@ -0,0 +1,184 @@
+import math
+
+
+def elimination_order(units: list[tuple[int, ...]], cycle_faces: list[list[int]]) -> list[int]:
+    """
+    Greedily orders the units so that as few cycles as possible are open (partly assigned) at any time. The first unit
+    is always first, every later step picks the unit that leaves the smallest frontier of open cycles.
+
+    :param units: groups of face indices that are assigned together
+    :param cycle_faces: the face indices around each vertex of the die
+    :return: the order of unit indices
+    """
+    order = [0]
+    assigned = set(units[0])
+    remaining = set(range(1, len(units)))
+
+    def frontier_size(faces: set) -> int:
+        return sum(1 for c in cycle_faces if 0 < len(faces.intersection(c)) < len(c))
+
+    while remaining:
+        u = min(remaining, key=lambda i: (frontier_size(assigned.union(units[i])), i))
+        order.append(u)
+        assigned.update(units[u])
+        remaining.remove(u)
+
+    return order
+
+
+def plan_unit(faces: tuple[int, ...], frontier: list[int], assigned: set, cycle_faces: list[list[int]],
+              face_cycles: list[list[int]], scale: list[int]):
+    """
+    Works out which cycles a unit leaves open and which it closes
+
+    :param faces: the face indices of the unit
+    :param frontier: the open cycles before the unit, in the order of their partial sums in the state
+    :param assigned: the faces assigned so far, the unit's included
+    :param cycle_faces: the face indices around each vertex of the die
+    :param face_cycles: the cycles around each face
+    :param scale: what each cycle's sum is multiplied by in the objective
+    :return: the new frontier, for each cycle in it a plan, and for each closing cycle a plan and its scale. A plan is
+        where the cycle's old partial sum is in the frontier (None for a new cycle) and which of the unit's faces add to
+        it
+    """
+    touched = sorted({i for f in faces for i in face_cycles[f]})
+    candidates = frontier + [i for i in touched if i not in frontier]
+    still_open = [i for i in candidates if not assigned.issuperset(cycle_faces[i])]
+    closing = [i for i in candidates if assigned.issuperset(cycle_faces[i])]
+    old_pos = {c: p for p, c in enumerate(frontier)}
+
+    def plan(cycle):
+        return old_pos.get(cycle), [j for j, f in enumerate(faces) if cycle in face_cycles[f]]
+
+    return still_open, [plan(c) for c in still_open], [(plan(c), scale[c]) for c in closing]
+
+
+def unit_steps(faces: tuple[int, ...], unit_options: list[tuple[int, ...]], face_coef: list[int], open_plan: list,
+               close_plan: list) -> list[tuple]:
+    """
+    Precomputes what each option of a unit adds to a state
+
+    :param faces: the face indices of the unit
+    :param unit_options: the tuples of values the unit's faces can take
+    :param face_coef: how much one unit of weight on each face adds to sum(y), None if sum(y) is not tracked
+    :param open_plan: the plans of the open cycles, see plan_unit
+    :param close_plan: the plans and scales of the closing cycles, see plan_unit
+    :return: for each option, (used values bitmask, what it adds to sum(y), what it adds to each open cycle, what it adds
+        to each closing cycle)
+    """
+    steps = []
+    for option in unit_options:
+        mask = 0
+        for v in option:
+            mask |= 1 << v
+        total = sum(v * face_coef[f] for v, f in zip(option, faces)) if face_coef is not None else 0
+        open_add = [sum(option[j] for j in js) for _, js in open_plan]
+        close_add = [sum(option[j] for j in js) for (_, js), _ in close_plan]
+        steps.append((mask, total, open_add, close_add))
+    return steps
+
+
+def advance_states(states: dict, step_options: list[tuple], open_plan: list, close_plan: list) -> tuple[dict, dict]:
+    """
+    Assigns a unit in every way to every state, keeping only the cheapest way to reach each new state
+
+    :param states: the cost of each state, see frontier_dp_optimum
+    :param step_options: what each option of the unit adds, see unit_steps
+    :param open_plan: the plans of the open cycles, see plan_unit
+    :param close_plan: the plans and scales of the closing cycles, see plan_unit
+    :return: the cost of each new state, and for each new state the state and option it came from
+    """
+    new_states = {}
+    back = {}
+    for key, cost in states.items():
+        used, partial, total = key
+        for o, (mask, add_total, open_add, close_add) in enumerate(step_options):
+            if used & mask:
+                continue
+            new_cost = cost
+            for ((p, _), s), add in zip(close_plan, close_add):
+                y = ((partial[p] if p is not None else 0) + add) * s
+                new_cost += y * y
+            new_partial = tuple((partial[p] if p is not None else 0) + add
+                                for (p, _), add in zip(open_plan, open_add))
+            new_key = (used | mask, new_partial, total + add_total)
+            if new_cost < new_states.get(new_key, new_cost + 1):
+                new_states[new_key] = new_cost
+                back[new_key] = (key, o)
+    return new_states, back
+
+
+def frontier_dp_optimum(cycle_faces: list[list[int]], units: list[tuple[int, ...]],
+                        options: list[list[tuple[int, ...]]], cancel=None) -> tuple[list[int], float, int]:
+    """
+    Finds the face weights that minimize the population sd of the die vertex weights with a dynamic program over face
+    subsets. Units of faces are assigned in a small-frontier elimination order, and two partial placements are merged
+    when they used the same values and give the same partial sums to every open cycle, because from there on they can
+    be finished in exactly the same ways. Only the cheapest of them has to be kept.
+
+    The objective is kept in integers: with L the lcm of the cycle lengths, y = cycle sum * L / cycle length and
+    m^2 * L^2 * variance = m * sum(y^2) - sum(y)^2. The sum of y is part of the state unless it is the same for every
+    placement.
+
+    :param cycle_faces: the face indices around each vertex of the die
+    :param units: groups of face indices that are assigned together, the first unit is assigned first
+    :param options: for each unit, the tuples of values its faces can take. No value can be used twice.
+    :param cancel: an optional threading.Event, checked between units
+    :return: the optimal face weights, their vertex weight sd, and the number of partial placements kept. None if
+        cancelled
+    """
+    num_cycles = len(cycle_faces)
+    num_faces = sum(len(u) for u in units)
+    lcm = math.lcm(*[len(c) for c in cycle_faces])
+    scale = [lcm // len(c) for c in cycle_faces]
+
+    # how much one unit of weight on a face adds to sum(y)
+    face_coef = [0] * num_faces
+    face_cycles = [[] for _ in range(num_faces)]
+    for i, cycle in enumerate(cycle_faces):
+        for f in cycle:
+            face_coef[f] += scale[i]
+            face_cycles[f].append(i)
+    track_total = len(set(face_coef)) != 1
+
+    order = elimination_order(units, cycle_faces)
+    assigned = set()
+    frontier = []
+    # state key: (used values bitmask, partial sums of the open cycles, sum(y) so far)
+    states = {(0, (), 0): 0}
+    history = []
+    states_kept = 0
+
+    for u in order:
+        if cancel is not None and cancel.is_set():
+            return None
+        faces = units[u]
+        assigned.update(faces)
+        still_open, open_plan, close_plan = plan_unit(faces, frontier, assigned, cycle_faces, face_cycles, scale)
+        step_options = unit_steps(faces, options[u], face_coef if track_total else None, open_plan, close_plan)
+
+        new_states, back = advance_states(states, step_options, open_plan, close_plan)
+
+        states = new_states
+        states_kept += len(states)
+        history.append(back)
+        frontier = still_open
+
+    if not states:
+        raise ValueError("No placement satisfies the unit options")
+
+    # without the total in the state every placement has the same sum(y), so the cheapest is the best
+    best_key, best_cost = min(states.items(),
+                              key=lambda item: num_cycles * item[1] - item[0][2] ** 2 if track_total else item[1])
+
+    # walk the back pointers to recover the placement
+    weights = [0] * num_faces
+    key = best_key
+    for u, back in zip(reversed(order), reversed(history)):
+        key, o = back[key]
+        for f, v in zip(units[u], options[u][o]):
+            weights[f] = v
+
+    total = sum(w * c for w, c in zip(weights, face_coef))
+    best_objective = num_cycles * best_cost - total * total
+    return weights, math.sqrt(best_objective) / (num_cycles * lcm), states_kept
@@ -1,6 +1,12 @@
-from itertools import permutations
+import functools
+from itertools import islice, permutations
 from math import factorial
 
+import numpy as np
+
+# face values are small, and compact blocks of them use less memory bandwidth when scored
+FACE_WEIGHT_DTYPE = np.int16
+
 
 def paired_face_weights_locked_one(num_faces: int, opp_faces: list[tuple[int, int]]):
     # create permutations of opposite faces (starting at 2 because we already set 1
@@ -16,14 +22,14 @@ def paired_face_weights_locked_one(num_faces: int, opp_faces: list[tuple[int, in
 
     # remove the locked first face from the number of opposite faces
     def find_first_pairing(face_pairs):
-        for fp in opp_faces:
-            if fp[0] == 1:
+        for fp in face_pairs:
+            if fp[0] == 1 or fp[1] == 1:
                 return fp
-            elif fp[1] == 1:
-                return fp[1], fp[0]
 
     face_one_pairing = find_first_pairing(opp_faces)
     opp_faces.remove(face_one_pairing)
+    if face_one_pairing[0] != 1:
+        face_one_pairing = face_one_pairing[1], face_one_pairing[0]
     perm[face_one_pairing[0]-1] = 1
     perm[face_one_pairing[1]-1] = num_faces
 
@@ -53,3 +59,130 @@ def face_weights_locked_one(num_faces: int):
         perm = next(face_vals_perms)
         yield (1,) + perm
         curr_perm += 1
+
+
+def batched_face_weights(weights_generator, block_size: int):
+    """
+    Groups the weights from a generator into blocks so that they can be scored together
+    :param weights_generator: an iterable of face weights
+    :param block_size: the maximum number of weights in a block
+    :return: a generator of 2d FACE_WEIGHT_DTYPE arrays with one set of face weights per row
+    """
+    weights_generator = iter(weights_generator)
+    while True:
+        # copy each set of weights, the generators may reuse the yielded list
+        block = [tuple(w) for w in islice(weights_generator, block_size)]
+        if not block:
+            return
+        yield np.array(block, dtype=FACE_WEIGHT_DTYPE)
+
+
+def unrank_permutations(ranks: np.ndarray, items: np.ndarray) -> np.ndarray:
+    """
+    Finds the permutations of items at the given lexicographic ranks, the same order itertools.permutations uses for
+    sorted items
+    :param ranks: an array of ranks, each less than len(items)!
+    :param items: the sorted items to permute
+    :return: a 2d array with one permutation per row
+    """
+    ranks = np.asarray(ranks, dtype=np.int64)
+    num_items = len(items)
+    rows = len(ranks)
+    available = np.tile(np.asarray(items), (rows, 1))
+    perms = np.empty((rows, num_items), dtype=available.dtype)
+    for i in range(num_items):
+        # the i-th factorial base digit picks one of the items that are left
+        place = factorial(num_items - 1 - i)
+        digits = (ranks // place) % (num_items - i)
+        perms[:, i] = available[np.arange(rows), digits]
+        cols = np.arange(num_items - i - 1)
+        available = np.take_along_axis(available, cols + (cols >= digits[:, None]), axis=1)
+    return perms
+
+
+def face_weights_locked_one_block(num_faces: int, start: int, stop: int) -> np.ndarray:
+    """
+    The placements of face_weights_locked_one with ranks start to stop, in the same order
+    :param num_faces: the number of faces on the die
+    :param start: the first rank
+    :param stop: one past the last rank
+    :return: a 2d array with one placement of face weights per row
+    """
+    perms = unrank_permutations(np.arange(start, stop, dtype=np.int64), np.arange(2, num_faces + 1,
+                                                                                  dtype=FACE_WEIGHT_DTYPE))
+    return face_weights_locked_one_from_perms(perms)
+
+
+def face_weights_locked_one_from_perms(perms: np.ndarray) -> np.ndarray:
+    """
+    :param perms: a 2d array with one permutation of the values 2 to num_faces per row
+    :return: the placements with face 1 set to 1 and the permutation on the other faces
+    """
+    return np.column_stack([np.ones(len(perms), dtype=perms.dtype), perms])
+
+
+def paired_face_weights_locked_one_block(num_faces: int, opp_faces: list[tuple[int, int]], start: int,
+                                         stop: int) -> np.ndarray:
+    """
+    The placements of paired_face_weights_locked_one with ranks start to stop. The placements are the same, but are
+    ranked by the lexicographic order of the value pairs rather than the generator's order
+    :param num_faces: the number of faces on the die
+    :param opp_faces: the opposing face pairs of the die
+    :param start: the first rank
+    :param stop: one past the last rank
+    :return: a 2d array with one placement of face weights per row
+    """
+    low_values = unrank_permutations(np.arange(start, stop, dtype=np.int64),
+                                     np.arange(2, num_faces // 2 + 1, dtype=FACE_WEIGHT_DTYPE))
+    return paired_face_weights_from_low_values(num_faces, opp_faces, low_values)
+
+
+def paired_face_weights_from_low_values(num_faces: int, opp_faces: list[tuple[int, int]],
+                                        low_values: np.ndarray) -> np.ndarray:
+    """
+    :param num_faces: the number of faces on the die
+    :param opp_faces: the opposing face pairs of the die
+    :param low_values: a 2d array with one permutation of the values 2 to num_faces / 2 per row, the lower values of
+        the opposing pairs that do not hold face 1, in the order they are listed
+    :return: the placements of paired_face_weights_locked_one with those lower values
+    """
+    face_one_pairing = next(fp if fp[0] == 1 else (fp[1], fp[0]) for fp in opp_faces if 1 in fp)
+    other_pairs = [fp for fp in opp_faces if 1 not in fp]
+    block = np.empty((len(low_values), num_faces), dtype=low_values.dtype)
+    block[:, face_one_pairing[0] - 1] = 1
+    block[:, face_one_pairing[1] - 1] = num_faces
+    for i, (j, k) in enumerate(other_pairs):
+        block[:, j - 1] = low_values[:, i]
+        block[:, k - 1] = num_faces + 1 - low_values[:, i]
+    return block
+
+
+def ranked_placements(num_faces: int, opp_faces: list[tuple[int, int]], locked_opposing_faces: bool):
+    """
+    :param num_faces: the number of faces on the die
+    :param opp_faces: the opposing face pairs of the die
+    :param locked_opposing_faces: whether opposing faces must add up to the same value
+    :return: the number of placements in the search space, and a picklable function from (start, stop) to the block of
+        placements with those ranks
+    """
+    if locked_opposing_faces:
+        return factorial(num_faces // 2 - 1), functools.partial(paired_face_weights_locked_one_block, num_faces,
+                                                                list(opp_faces))
+    return factorial(num_faces - 1), functools.partial(face_weights_locked_one_block, num_faces)
+
+
+def rank_permutations(perms: np.ndarray, items: np.ndarray) -> np.ndarray:
+    """
+    The inverse of unrank_permutations
+    :param perms: a 2d array with one permutation of items per row
+    :param items: the sorted items
+    :return: the lexicographic rank of each permutation
+    """
+    perms = np.asarray(perms)
+    num_items = len(items)
+    ranks = np.zeros(len(perms), dtype=np.int64)
+    for i in range(num_items):
+        # the factorial base digit is the number of later items that are smaller
+        smaller_later = (perms[:, i + 1:] < perms[:, i:i + 1]).sum(axis=1)
+        ranks += smaller_later * factorial(num_items - 1 - i)
+    return ranks
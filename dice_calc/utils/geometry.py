@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class DieGeometry:
+    def __init__(self, points: list[tuple[float, float, float]], faces: list[list[int]]):
+        """
+        The solid shape of a convex die. Face i of the geometry is face i + 1 of the die.
+
+        :param points: the 3d coordinates of the corners of the die
+        :param faces: for each face, the indices of its corner points in order around the face
+        """
+        self.points = np.asarray(points, dtype=float)
+        self.faces = [list(f) for f in faces]
+        self.areas, self.normals, self.face_centroids = self.__calc_faces__()
+        self.centroid = self.__calc_centroid__()
+
+    def __calc_faces__(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fans every face into triangles to find its area, outward unit normal and area weighted centroid
+        :return: (areas, normals, centroids) with one row per face
+        """
+        inside = self.points.mean(axis=0)
+        areas = np.zeros(len(self.faces))
+        normals = np.zeros((len(self.faces), 3))
+        centroids = np.zeros((len(self.faces), 3))
+        for i, face in enumerate(self.faces):
+            corners = self.points[face]
+            a, b, c = corners[0], corners[1:-1], corners[2:]
+            cross = np.cross(b - a, c - a)
+            tri_areas = np.linalg.norm(cross, axis=1) / 2
+            areas[i] = tri_areas.sum()
+            normal = cross.sum(axis=0)
+            normal /= np.linalg.norm(normal)
+            # the die is convex, so the outward normal points away from any inside point
+            normals[i] = normal if np.dot(normal, corners.mean(axis=0) - inside) >= 0 else -normal
+            centroids[i] = ((a + b + c) / 3 * tri_areas[:, None]).sum(axis=0) / areas[i]
+        return areas, normals, centroids
+
+    def __calc_centroid__(self) -> np.ndarray:
+        """
+        The centre of mass of the solid die, found by splitting it into pyramids from an inside point to every face
+        :return: the centroid
+        """
+        inside = self.points.mean(axis=0)
+        heights = np.einsum("ij,ij->i", self.face_centroids - inside, self.normals)
+        volumes = self.areas * heights / 3
+        # a pyramid's centre of mass is 3/4 of the way from its apex to its base centroid
+        pyramid_centroids = inside + 0.75 * (self.face_centroids - inside)
+        return (pyramid_centroids * volumes[:, None]).sum(axis=0) / volumes.sum()
+
+    def lever_arms(self) -> np.ndarray:
+        """
+        :return: the offset of every face centroid from the die centroid, one row per face
+        """
+        return self.face_centroids - self.centroid
+
+    def adjacent_faces(self) -> set[tuple[int, int]]:
+        """
+        :return: the pairs of (1 based) face numbers that share an edge, lowest first
+        """
+        edge_faces = {}
+        for i, face in enumerate(self.faces):
+            for a, b in zip(face, face[1:] + face[:1]):
+                edge_faces.setdefault((min(a, b), max(a, b)), []).append(i + 1)
+        return {tuple(sorted(fs)) for fs in edge_faces.values() if len(fs) == 2}
+
+    def opposing_pairs(self, positions: np.ndarray, decimals: int = 6) -> list[tuple[int, int]]:
+        """
+        Pairs up positions that are mirror images through the die centroid, by hashing rounded offsets
+        :param positions: 3d positions, such as self.points or self.face_centroids
+        :param decimals: the number of decimals offsets must agree to
+        :return: the pairs of (1 based) position numbers, lowest first, or an empty list if some position has no mirror
+            image, as on a die that is not centrally symmetric
+        """
+        offsets = np.round(np.asarray(positions) - self.centroid, decimals)
+        by_offset = {tuple(o): i for i, o in enumerate(offsets)}
+        pairs = set()
+        for i, offset in enumerate(offsets):
+            j = by_offset.get(tuple(-offset))
+            if j is None or j == i:
+                return []
+            pairs.add((min(i, j) + 1, max(i, j) + 1))
+        return sorted(pairs)
+
+    def engraving_masses(self, max_value: int, depth: float, ink_fraction) -> np.ndarray:
+        """
+        A mass model for engraved numbers: a number removes depth * (its share of the face area) of material. Faces are
+        assumed to be the same size.
+
+        :param max_value: the largest face value
+        :param depth: the engraving depth
+        :param ink_fraction: a function from a face value to the fraction of the face its engraving covers
+        :return: an array of the mass removed for each face value, indexed by the value
+        """
+        face_area = self.areas.mean()
+        return np.array([depth * face_area * ink_fraction(v) if v > 0 else 0.0 for v in range(max_value + 1)])
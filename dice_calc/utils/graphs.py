@@ -213,3 +213,141 @@ class Graph:
     def __init__(self, vertices: list[Vertex], edges: list[Edge]):
         self.verts = vertices
         self.edges = edges
+
+
+def adjacency_bitsets(num_verts: int, edges: list[tuple[int, int]]) -> list[int]:
+    """
+    Builds the neighbourhoods of an undirected graph as bitsets, so a step of a path search is a bitwise AND
+    :param num_verts: the number of vertices
+    :param edges: the edges as pairs of vertex indices
+    :return: for each vertex index, an int with bit j set if vertex j is a neighbour
+    """
+    adjacency = [0] * num_verts
+    for a, b in edges:
+        adjacency[a] |= 1 << b
+        adjacency[b] |= 1 << a
+    return adjacency
+
+
+def find_simple_cycles(adjacency: list[int], cycle_len: int, edges: list[tuple[int, int]] = None) -> list[tuple]:
+    """
+    Finds the simple cycles of a given length in an undirected graph. Paths only extend to neighbours that are not
+    already on the path, and the step before closing only to neighbours of the first vertex, so every extension is
+    one bitwise AND against the path's membership bitset.
+    :param adjacency: the neighbourhood bitsets, see adjacency_bitsets
+    :param cycle_len: the number of vertices in the cycles
+    :param edges: only find the cycles through these edges, as pairs of vertex indices. All cycles by default
+    :return: the sorted cycles as tuples of vertex indices in path order, starting at the smallest index and continuing
+        to its smaller neighbour on the cycle
+    """
+    cycles = set()
+    if edges is None:
+        # Every cycle is found from its smallest vertex, through vertices above it
+        everything = (1 << len(adjacency)) - 1
+        for first in range(len(adjacency)):
+            above = everything & ~((1 << (first + 1)) - 1)
+            for second in iter_bits(adjacency[first] & above):
+                extend_path(adjacency, cycle_len, [first, second], 1 << first | 1 << second, above, cycles)
+    else:
+        for a, b in edges:
+            extend_path(adjacency, cycle_len, [a, b], 1 << a | 1 << b, -1, cycles)
+
+    return sorted(cycles)
+
+
+def extend_path(adjacency: list[int], cycle_len: int, path: list[int], members: int, allowed: int, cycles: set):
+    """
+    Extends a path depth first through the allowed neighbours that are not on it yet, and records the cycles it closes
+    :param adjacency: the neighbourhood bitsets, see adjacency_bitsets
+    :param cycle_len: the number of vertices in the cycles
+    :param path: the vertex indices of the path, extended in place and restored
+    :param members: the bitset of the vertices on the path
+    :param allowed: the bitset of the vertices the path may extend to
+    :param cycles: the set to add the closed cycles to, see canonical_cycle
+    :return: None
+    """
+    first, last = path[0], path[-1]
+    if len(path) == cycle_len:
+        if adjacency[last] >> first & 1:
+            cycles.add(canonical_cycle(path))
+        return
+    candidates = adjacency[last] & allowed & ~members
+    if len(path) == cycle_len - 1:
+        candidates &= adjacency[first]
+    for v in iter_bits(candidates):
+        path.append(v)
+        extend_path(adjacency, cycle_len, path, members | 1 << v, allowed, cycles)
+        path.pop()
+
+
+def canonical_cycle(path: list[int]) -> tuple:
+    """
+    :param path: the vertex indices of a cycle in path order
+    :return: the cycle starting at its smallest index and continuing to its smaller neighbour on the cycle
+    """
+    start = path.index(min(path))
+    cycle = path[start:] + path[:start]
+    if cycle[1] > cycle[-1]:
+        cycle = cycle[:1] + cycle[:0:-1]
+    return tuple(cycle)
+
+
+def iter_bits(bitset: int):
+    """
+    :param bitset: a non-negative bitset
+    :return: a generator of the indices of the set bits, lowest first
+    """
+    while bitset:
+        bit = bitset & -bitset
+        bitset ^= bit
+        yield bit.bit_length() - 1
+
+
+def dual_cycles(cycles: list[list[int]]) -> tuple[list[tuple[int, int]], list[list[int]]]:
+    """
+    Turns a closed polyhedral surface inside out, in time linear in its size. The surface is given as cycles of items,
+    for example the faces around each vertex of a die, or the corners around each face of a mesh. Consecutive items of
+    a cycle share an edge, and every edge is on exactly two cycles. In the dual the cycles are the items, two of them
+    are adjacent if they share an edge, and every item becomes the cycle of the cycles around it.
+    :param cycles: the item indices of each cycle, in order around it. Every index from 0 up must be on some cycle
+    :throws: a ValueError if the cycles do not make up a closed surface
+    :return: the pairs of indices of cycles that share an edge, and for each item the indices of the cycles around it in
+        order
+    """
+    edge_cycles = {}
+    neighbours = {}
+    for c, cycle in enumerate(cycles):
+        for i, item in enumerate(cycle):
+            following = cycle[(i + 1) % len(cycle)]
+            edge_cycles.setdefault((min(item, following), max(item, following)), []).append(c)
+            neighbours[c, item] = (cycle[i - 1], following)
+    for edge, on_cycles in edge_cycles.items():
+        if len(on_cycles) != 2:
+            raise ValueError("The edge {} is on {} cycles, a closed surface has every edge on two".format(
+                edge, len(on_cycles)))
+
+    first_cycle = {}
+    for c, item in neighbours:
+        first_cycle.setdefault(item, c)
+    if sorted(first_cycle) != list(range(len(first_cycle))):
+        raise ValueError("Every item from 0 to {} must be on a cycle".format(max(first_cycle)))
+
+    around = []
+    for item in range(len(first_cycle)):
+        # walk around the item, leaving each cycle over the edge that was not used to enter it
+        start = cycle = first_cycle[item]
+        entered_over = neighbours[cycle, item][0]
+        ring = [cycle]
+        for _ in range(len(cycles)):
+            before, after = neighbours[cycle, item]
+            leave_over = after if before == entered_over else before
+            a, b = edge_cycles[min(item, leave_over), max(item, leave_over)]
+            cycle, entered_over = (b if a == cycle else a), leave_over
+            if cycle == start:
+                break
+            ring.append(cycle)
+        else:
+            raise ValueError("The cycles around item {} do not close up".format(item))
+        around.append(ring)
+
+    return sorted(tuple(on_cycles) for on_cycles in edge_cycles.values()), around
@@ -0,0 +1,304 @@
+"""
+A portfolio of local searches over placements that run in parallel processes and share their best placement. Every
+worker publishes improvements to a shared incumbent and restarts from it when its own search stalls, so one worker's
+luck is everyone's starting point.
+"""
+import math
+import multiprocessing
+import time
+
+import numpy as np
+
+from utils.bounds import BOUND_TOLERANCE
+
+STRATEGIES = ("anneal", "tabu", "restart")
+
+
+class SwapSpace:
+    def __init__(self, incidence: np.ndarray, units: list[tuple[int, ...]], options: list[list[tuple[int, ...]]]):
+        """
+        A search space of placements, see Die.__get_placement_units__, searched by swapping the values of two units.
+        Units with a single option stay fixed, the others must share one list of options, one option per unit.
+        :param incidence: the die's (vertices x faces) incidence matrix
+        :param units: groups of face indices that are assigned together
+        :param options: the value tuples each unit can take
+        """
+        self.num_faces = incidence.shape[1]
+        self.fixed = [(u, o[0]) for u, o in zip(units, options) if len(o) == 1]
+        self.movable = [u for u, o in zip(units, options) if len(o) > 1]
+        self.pool = next((o for o in options if len(o) > 1), [])
+        if any(o != self.pool for o in options if len(o) > 1) or len(self.pool) != len(self.movable):
+            raise ValueError("Swaps need every unit that is not fixed to share one list of options")
+
+        fixed_weights = np.zeros(self.num_faces)
+        for unit, option in self.fixed:
+            fixed_weights[list(unit)] = option
+        self.base = incidence @ fixed_weights
+        # contributions[u, o] is what giving movable unit u option o adds to the die vertex weights
+        self.contributions = np.zeros((len(self.movable), len(self.pool), incidence.shape[0]))
+        for i, unit in enumerate(self.movable):
+            for j, option in enumerate(self.pool):
+                self.contributions[i, j] = incidence[:, list(unit)] @ np.array(option, dtype=float)
+        self.swap_a, self.swap_b = np.triu_indices(len(self.movable), k=1)
+
+    def random_assignment(self, rng: np.random.Generator) -> np.ndarray:
+        """
+        :param rng: the random generator
+        :return: the option index of each movable unit, a random permutation
+        """
+        return rng.permutation(len(self.movable))
+
+    def vertex_weights(self, assignment: np.ndarray) -> np.ndarray:
+        return self.base + self.contributions[np.arange(len(assignment)), assignment].sum(axis=0)
+
+    def swap_delta(self, assignment: np.ndarray, a: int, b: int) -> np.ndarray:
+        """
+        :return: the change to the die vertex weights from swapping the options of movable units a and b
+        """
+        c, oa, ob = self.contributions, assignment[a], assignment[b]
+        return c[a, ob] + c[b, oa] - c[a, oa] - c[b, ob]
+
+    def swap_deltas(self, assignment: np.ndarray) -> np.ndarray:
+        """
+        :return: the change to the die vertex weights from every swap, one row per (swap_a, swap_b) pair
+        """
+        return self.swap_delta(assignment, self.swap_a, self.swap_b)
+
+    def weights(self, assignment: np.ndarray) -> list[int]:
+        """
+        :return: the face weights of an assignment, in face order
+        """
+        weights = [0] * self.num_faces
+        for unit, option in self.fixed + [(u, self.pool[o]) for u, o in zip(self.movable, assignment)]:
+            for face, value in zip(unit, option):
+                weights[face] = value
+        return weights
+
+
+class Incumbent:
+    def __init__(self, size: int, target_sd: float):
+        """
+        The best placement found by any worker, in shared memory. Reaching the target sd stops every worker.
+        :param size: the length of a placement, the number of movable units for a SwapSpace
+        :param target_sd: the sd that is good enough
+        """
+        self.sd = multiprocessing.Value("d", math.inf)
+        self.assignment = multiprocessing.Array("i", size)
+        self.stop = multiprocessing.Event()
+        self.target_sd = target_sd
+
+    def offer(self, sd: float, assignment: np.ndarray) -> bool:
+        """
+        Publishes a placement if it beats the incumbent
+        :return: whether it did
+        """
+        with self.sd.get_lock():
+            if sd >= self.sd.value - BOUND_TOLERANCE:
+                return False
+            self.sd.value = sd
+            self.assignment[:] = [int(o) for o in assignment]
+        if sd <= self.target_sd + BOUND_TOLERANCE:
+            self.stop.set()
+        return True
+
+    def best(self) -> tuple[float, np.ndarray]:
+        with self.sd.get_lock():
+            return self.sd.value, np.array(self.assignment[:])
+
+
+class PortfolioWorker:
+    def __init__(self, space: SwapSpace, incumbent: Incumbent, seed: int, deadline: float):
+        """
+        One local search of the portfolio
+        :param space: the search space
+        :param incumbent: the shared best placement
+        :param seed: the seed of this worker's random generator
+        :param deadline: the time.monotonic() time to stop at
+        """
+        self.space = space
+        self.incumbent = incumbent
+        self.rng = np.random.default_rng(seed)
+        self.deadline = deadline
+        self.evaluations = 0
+
+    def done(self) -> bool:
+        return time.monotonic() >= self.deadline or self.incumbent.stop.is_set()
+
+    def kick(self, swaps: int) -> np.ndarray:
+        """
+        :param swaps: the number of random swaps
+        :return: the incumbent's assignment after some random swaps, or a random assignment if there is none yet
+        """
+        sd, assignment = self.incumbent.best()
+        if math.isinf(sd):
+            return self.space.random_assignment(self.rng)
+        for _ in range(swaps):
+            a, b = self.rng.choice(len(assignment), size=2, replace=False)
+            assignment[a], assignment[b] = assignment[b], assignment[a]
+        return assignment
+
+    def descend(self, assignment: np.ndarray) -> tuple[np.ndarray, float]:
+        """
+        Takes the best swap until no swap improves the placement
+        :param assignment: the starting assignment, changed in place
+        :return: the local optimum and its sd
+        """
+        vertex_weights = self.space.vertex_weights(assignment)
+        sd = float(vertex_weights.std())
+        while not self.done():
+            sds = (vertex_weights + self.space.swap_deltas(assignment)).std(axis=1)
+            self.evaluations += len(sds)
+            i = int(np.argmin(sds))
+            if sds[i] >= sd - BOUND_TOLERANCE:
+                break
+            a, b = self.space.swap_a[i], self.space.swap_b[i]
+            vertex_weights += self.space.swap_delta(assignment, a, b)
+            assignment[a], assignment[b] = assignment[b], assignment[a]
+            sd = float(sds[i])
+        return assignment, sd
+
+    def restart(self):
+        """
+        Random restart local search. Every other descent starts from a perturbed incumbent instead of a random placement.
+        """
+        while not self.done():
+            if self.rng.random() < 0.5:
+                start = self.space.random_assignment(self.rng)
+            else:
+                start = self.kick(int(self.rng.integers(2, max(3, len(self.space.movable) // 2))))
+            assignment, sd = self.descend(start)
+            self.incumbent.offer(sd, assignment)
+
+    def tabu(self):
+        """
+        Tabu search: always takes the best swap that does not move a recently moved unit, unless it beats the incumbent.
+        Goes back to a perturbed incumbent when it has not improved on its own best for a while.
+        """
+        space = self.space
+        num_units = len(space.movable)
+        patience = 20 * num_units
+        assignment = space.random_assignment(self.rng)
+        while not self.done():
+            vertex_weights = space.vertex_weights(assignment)
+            best_sd = float(vertex_weights.std())
+            self.incumbent.offer(best_sd, assignment)
+            tabu_until = np.zeros(num_units, dtype=np.int64)
+            step = stalled = 0
+            while stalled < patience and not self.done():
+                sds = (vertex_weights + space.swap_deltas(assignment)).std(axis=1)
+                self.evaluations += len(sds)
+                allowed = (tabu_until[space.swap_a] <= step) & (tabu_until[space.swap_b] <= step)
+                allowed |= sds < self.incumbent.sd.value - BOUND_TOLERANCE
+                if not allowed.any():
+                    allowed[:] = True
+                i = int(np.argmin(np.where(allowed, sds, np.inf)))
+                a, b = space.swap_a[i], space.swap_b[i]
+                vertex_weights += space.swap_delta(assignment, a, b)
+                assignment[a], assignment[b] = assignment[b], assignment[a]
+                step += 1
+                tabu_until[[a, b]] = step + num_units // 4 + int(self.rng.integers(1, 4))
+                if sds[i] < best_sd - BOUND_TOLERANCE:
+                    best_sd = float(sds[i])
+                    stalled = 0
+                    self.incumbent.offer(best_sd, assignment)
+                else:
+                    stalled += 1
+            assignment = self.kick(int(self.rng.integers(2, max(3, num_units // 3))))
+
+    def anneal(self):
+        """
+        Simulated annealing with random swaps. Each cooling run starts from a perturbed incumbent once there is one.
+        """
+        space = self.space
+        num_units = len(space.movable)
+        steps = 400 * len(space.swap_a)
+        assignment = space.random_assignment(self.rng)
+        # start hot enough to accept a typical worsening swap about half the time
+        vertex_weights = space.vertex_weights(assignment)
+        typical = np.abs((vertex_weights + space.swap_deltas(assignment)).std(axis=1) - vertex_weights.std())
+        start_temperature = max(float(typical.mean()), BOUND_TOLERANCE) / math.log(2)
+        cooling = (1e-3) ** (1 / steps)
+        while not self.done():
+            vertex_weights = space.vertex_weights(assignment)
+            sd = best_sd = float(vertex_weights.std())
+            self.incumbent.offer(sd, assignment)
+            temperature = start_temperature
+            for step in range(steps):
+                if step % 256 == 0 and self.done():
+                    break
+                a, b = sorted(self.rng.choice(num_units, size=2, replace=False))
+                delta = space.swap_delta(assignment, a, b)
+                new_sd = float((vertex_weights + delta).std())
+                self.evaluations += 1
+                if new_sd < sd or self.rng.random() < math.exp((sd - new_sd) / temperature):
+                    vertex_weights += delta
+                    assignment[a], assignment[b] = assignment[b], assignment[a]
+                    sd = new_sd
+                    if sd < best_sd - BOUND_TOLERANCE:
+                        best_sd = sd
+                        self.incumbent.offer(sd, assignment)
+                temperature *= cooling
+            assignment = self.kick(int(self.rng.integers(2, max(3, num_units // 3))))
+            start_temperature /= 2
+
+
+def portfolio_worker(space: SwapSpace, strategy: str, seed: int, deadline: float, incumbent: Incumbent,
+                     evaluations, slot: int):
+    """
+    Runs one worker of the portfolio until the deadline or the target sd. Runs in worker processes.
+    :param space: the search space
+    :param strategy: a name from STRATEGIES
+    :param seed: the seed of the worker's random generator
+    :param deadline: the time.monotonic() time to stop at
+    :param incumbent: the shared best placement
+    :param evaluations: a shared array of the number of placements each worker scored
+    :param slot: this worker's index into evaluations
+    :return: None
+    """
+    worker = PortfolioWorker(space, incumbent, seed, deadline)
+    if len(space.swap_a) == 0:
+        # there is only one placement
+        incumbent.offer(float(space.vertex_weights(np.arange(len(space.movable))).std()), np.arange(len(space.movable)))
+    else:
+        getattr(worker, strategy)()
+    evaluations[slot] = worker.evaluations
+
+
+def run_portfolio(space: SwapSpace, time_budget: float, target_sd: float, processes: int = None,
+                  strategies: tuple[str, ...] = STRATEGIES, seed: int = 0) -> tuple[np.ndarray, float, int]:
+    """
+    Runs a portfolio of local searches in parallel, assigning the strategies to the workers in turn
+    :param space: the search space
+    :param time_budget: the number of seconds to search for
+    :param target_sd: the sd that is good enough, the search stops once any worker reaches it
+    :param processes: the number of worker processes, defaults to the number of cpus
+    :param strategies: names from STRATEGIES
+    :param seed: the seed of the first worker, the others count up from it
+    :return: the best assignment, its sd, and the number of placements scored
+    """
+    unknown = set(strategies) - set(STRATEGIES)
+    if not strategies or unknown:
+        raise ValueError("Unknown strategies {}, choose from {}".format(sorted(unknown), STRATEGIES))
+    processes = processes or multiprocessing.cpu_count()
+    incumbent = Incumbent(len(space.movable), target_sd)
+    # a valid placement to return even if no worker gets to offer one before the deadline
+    start = space.random_assignment(np.random.default_rng(seed))
+    incumbent.offer(float(space.vertex_weights(start).std()), start)
+    evaluations = multiprocessing.Array("q", processes)
+    deadline = time.monotonic() + time_budget
+    jobs = [(space, strategies[i % len(strategies)], seed + i, deadline, incumbent, evaluations, i)
+            for i in range(processes)]
+
+    if processes == 1:
+        portfolio_worker(*jobs[0])
+    else:
+        workers = [multiprocessing.Process(target=portfolio_worker, args=job) for job in jobs]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    sd, assignment = incumbent.best()
+    if sd == math.inf:
+        raise RuntimeError("The portfolio finished without a placement")
+    return assignment, sd, int(sum(evaluations)) + 1
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+def non_dominated(scores: np.ndarray) -> np.ndarray:
+    """
+    Finds the rows that no other row dominates (is at least as good in every objective and better in one). Of rows with
+    identical scores only the first is kept.
+    :param scores: one row of objective scores per point, lower is better
+    :return: a boolean mask of the non-dominated rows
+    """
+    num_points = len(scores)
+    keep = np.ones(num_points, dtype=bool)
+    for i in range(num_points):
+        if not keep[i]:
+            continue
+        others = scores[keep]
+        dominated = np.all(others <= scores[i], axis=1) & np.any(others < scores[i], axis=1)
+        if dominated.any():
+            keep[i] = False
+            continue
+        # drop everything this point dominates, and later duplicates of it
+        beaten = np.all(scores[i] <= scores, axis=1) & (np.any(scores[i] < scores, axis=1) |
+                                                        (np.arange(num_points) > i))
+        keep &= ~beaten
+    return keep
+
+
+def crowding_distance(scores: np.ndarray) -> np.ndarray:
+    """
+    The NSGA-II crowding distance of each point, the extremes of each objective get an infinite distance
+    :param scores: one row of objective scores per point
+    :return: the distance of each point
+    """
+    num_points, num_objectives = scores.shape
+    distance = np.zeros(num_points)
+    for k in range(num_objectives):
+        order = np.argsort(scores[:, k], kind="stable")
+        values = scores[order, k]
+        spread = values[-1] - values[0]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        if spread > 0 and num_points > 2:
+            distance[order[1:-1]] += (values[2:] - values[:-2]) / spread
+    return distance
+
+
+class ParetoFront:
+    def __init__(self, objectives: list[str], max_size: int = 64):
+        """
+        A bounded set of mutually non-dominated placements. When the front grows beyond max_size the most crowded
+        points are dropped, so the front keeps its extremes and stays evenly spread.
+        :param objectives: the names of the objectives, in score column order
+        :param max_size: the maximum number of placements kept
+        """
+        self.objectives = list(objectives)
+        self.max_size = max_size
+        self.scores = np.empty((0, len(self.objectives)))
+        self.placements = None
+
+    def update(self, scores: np.ndarray, placements: np.ndarray) -> bool:
+        """
+        Merges a block of scored placements into the front
+        :param scores: one row of objective scores per placement
+        :param placements: the face weights, one placement per row
+        :return: whether the front changed
+        """
+        if self.placements is None:
+            self.placements = np.empty((0, placements.shape[1]), dtype=placements.dtype)
+
+        # cheap first pass: throw out everything the current front already dominates
+        if len(self.scores):
+            dominated = np.zeros(len(scores), dtype=bool)
+            for point in self.scores:
+                dominated |= np.all(point <= scores, axis=1)
+            scores = scores[~dominated]
+            placements = placements[~dominated]
+            if not len(scores):
+                return False
+
+        all_scores = np.concatenate([self.scores, scores])
+        all_placements = np.concatenate([self.placements, placements])
+        is_new = np.arange(len(all_scores)) >= len(self.scores)
+        keep = non_dominated(all_scores)
+        all_scores, all_placements, is_new = all_scores[keep], all_placements[keep], is_new[keep]
+
+        while len(all_scores) > self.max_size:
+            drop = np.argmin(crowding_distance(all_scores))
+            all_scores = np.delete(all_scores, drop, axis=0)
+            all_placements = np.delete(all_placements, drop, axis=0)
+            is_new = np.delete(is_new, drop)
+
+        self.scores = all_scores
+        self.placements = all_placements
+        return bool(is_new.any())
+
+    def copy(self):
+        """
+        :return: an independent copy of the front
+        """
+        front = ParetoFront(self.objectives, max_size=self.max_size)
+        front.scores = self.scores.copy()
+        front.placements = None if self.placements is None else self.placements.copy()
+        return front
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __iter__(self):
+        """
+        :return: (placement, {objective name: score}) for each point on the front, ordered by the first objective
+        """
+        for i in np.lexsort(self.scores.T[::-1]):
+            yield list(self.placements[i]), dict(zip(self.objectives, self.scores[i]))
+
+    def __str__(self):
+        return "\n".join("{} {}".format(
+            [int(w) for w in placement], ", ".join("{}: {:.4f}".format(k, v) for k, v in scores.items())
+        ) for placement, scores in self)
@@ -0,0 +1,169 @@
+import math
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from utils.bounds import BOUND_TOLERANCE
+from utils.compiled import CompiledDie
+
+DEFAULT_QUANTILES = (1e-6, 1e-4, 1e-3, 1e-2)
+
+
+class SampleSummary:
+    def __init__(self, num_placements: int, sds: np.ndarray, quantiles: tuple[float, ...], confidence: float,
+                 best_weights: list[int], incumbent_sd: float = None, better_count: int = 0):
+        """
+        What a uniform sample of a placement space says about the whole space
+        :param num_placements: the number of placements in the space
+        :param sds: the sampled vertex weight sds
+        :param quantiles: the quantiles to estimate
+        :param confidence: the confidence level of the intervals and bounds
+        :param best_weights: the face weights of the best sampled placement
+        :param incumbent_sd: the sd of a known placement, to bound the share of the space that beats it
+        :param better_count: the number of sampled placements that beat the incumbent
+        """
+        self.num_placements = num_placements
+        self.num_samples = len(sds)
+        self.confidence = confidence
+        self.best_weights = best_weights
+        self.best_sd = float(sds.min()) if len(sds) else math.inf
+        self.incumbent_sd = incumbent_sd
+        self.better_count = better_count
+        self.quantiles = {q: quantile_interval(sds, q, confidence) for q in quantiles}
+        self.better_fraction_upper = None
+        if incumbent_sd is not None:
+            self.better_fraction_upper = fraction_upper_bound(better_count, self.num_samples, confidence)
+
+    @property
+    def better_count_upper(self) -> int:
+        """
+        :return: an upper confidence bound on the number of placements in the space that beat the incumbent
+        """
+        if self.better_fraction_upper is None:
+            return None
+        return math.ceil(self.better_fraction_upper * self.num_placements)
+
+    def __str__(self):
+        lines = ["{} samples of {} placements, best sd {:.4f}".format(self.num_samples, self.num_placements, self.best_sd)]
+        for q, (estimate, low, high) in self.quantiles.items():
+            lines.append("quantile {:g}: sd {:.4f} ({:.0%} interval {} to {})".format(
+                q, estimate, self.confidence, "-" if low is None else "{:.4f}".format(low),
+                "-" if high is None else "{:.4f}".format(high)))
+        if self.incumbent_sd is not None:
+            lines.append("{} samples beat sd {:.4f}, at most {:.3g} of the space ({} placements) does".format(
+                self.better_count, self.incumbent_sd, self.better_fraction_upper, self.better_count_upper))
+        return "\n".join(lines)
+
+
+def order_statistic_bounds(n: int, q: float, confidence: float) -> tuple[int, int]:
+    """
+    Picks the order statistics that bracket a quantile with at least the given confidence. The number of samples below
+    the true quantile is binomial(n, q), so the i-th smallest sample (from 0) is above the quantile with probability
+    P(K <= i), which is summed exactly over the binomial probabilities near n * q.
+    :param n: the number of samples
+    :param q: the quantile, between 0 and 1
+    :param confidence: the two sided confidence level
+    :return: the indices of the low and high order statistics, None where the tail has too few samples for a bound
+    """
+    alpha = (1 - confidence) / 2
+    spread = math.sqrt(n * q * (1 - q))
+    # the binomial probabilities outside this window are far below any usable alpha
+    first = max(0, math.floor(n * q - 12 * spread) - 12)
+    last = min(n, math.ceil(n * q + 12 * spread) + 12)
+    log_choose = math.lgamma(n + 1)
+    log_pmf = [log_choose - math.lgamma(k + 1) - math.lgamma(n - k + 1) + k * math.log(q) + (n - k) * math.log1p(-q)
+               for k in range(first, last + 1)]
+    cdf = np.cumsum(np.exp(log_pmf))
+
+    below = np.flatnonzero(cdf <= alpha)
+    low = int(first + below[-1]) if len(below) else None
+    above = np.flatnonzero(cdf >= 1 - alpha)
+    high = int(first + above[0]) if len(above) and first + above[0] < n else None
+    return low, high
+
+
+def quantile_interval(sds: np.ndarray, q: float, confidence: float) -> tuple[float, float, float]:
+    """
+    Estimates a quantile with a distribution free confidence interval between two order statistics, see
+    order_statistic_bounds
+    :param sds: the samples
+    :param q: the quantile, between 0 and 1
+    :param confidence: the two sided confidence level
+    :return: (estimate, low, high), low or high is None if there are too few samples in that tail to bound it
+    """
+    n = len(sds)
+    if not n:
+        return math.nan, None, None
+    low, high = order_statistic_bounds(n, q, confidence)
+    estimate = min(n - 1, int(n * q))
+    indices = sorted({i for i in (estimate, low, high) if i is not None})
+    ordered = np.partition(sds, indices)
+    return tuple(None if i is None else float(ordered[i]) for i in (estimate, low, high))
+
+
+def fraction_upper_bound(successes: int, trials: int, confidence: float) -> float:
+    """
+    A one sided upper confidence bound on a proportion. With no successes it is the exact 1 - (1 - confidence)^(1/n),
+    otherwise the Wilson score bound.
+    :param successes: the number of successes
+    :param trials: the number of trials
+    :param confidence: the confidence level
+    :return: the bound
+    """
+    if not trials:
+        return 1.0
+    if not successes:
+        return 1 - (1 - confidence) ** (1 / trials)
+    z = NormalDist().inv_cdf(confidence)
+    p = successes / trials
+    centre = p + z * z / (2 * trials)
+    spread = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+    return min(1.0, (centre + spread) / (1 + z * z / trials))
+
+
+def sample_sds(compiled: CompiledDie, items: np.ndarray, to_placements, time_budget: float, max_samples: int,
+               block_size: int, rng: np.random.Generator, incumbent_sd: float = None):
+    """
+    Scores uniform random placements of a space whose placements are the permutations of items, stratified by the
+    first item. Each stratum holds the same number of placements, and each round takes the same number of samples
+    from every stratum, so the pooled sample stays uniform while covering every stratum evenly.
+    :param compiled: the compiled die
+    :param items: the sorted items whose permutations make up the space
+    :param to_placements: a function from a 2d array of permutations to the block of placements they rank
+    :param time_budget: the number of seconds to sample for
+    :param max_samples: the most samples to take, which bounds memory
+    :param block_size: about the number of placements scored together
+    :param rng: the random generator
+    :param incumbent_sd: the sd of a known placement, to count the samples that beat it
+    :return: the sampled sds as float32, the best sampled placement, and how many samples beat the incumbent
+    """
+    strata = np.array([[first] + [i for i in items if i != first] for first in items], dtype=items.dtype)
+    per_stratum = max(1, block_size // len(strata))
+    sds = np.empty(max_samples, dtype=np.float32)
+    num_samples = better_count = 0
+    best_weights, best_key = None, None
+    deadline = time.monotonic() + time_budget
+
+    while num_samples < max_samples and (num_samples == 0 or time.monotonic() < deadline):
+        remaining = max_samples - num_samples
+        if remaining >= per_stratum * len(strata):
+            counts = np.full(len(strata), per_stratum)
+        else:
+            # split the last round evenly, with the leftover samples going to random strata
+            counts = np.full(len(strata), remaining // len(strata))
+            counts[rng.choice(len(strata), remaining % len(strata), replace=False)] += 1
+        perms = np.repeat(strata, counts, axis=0)
+        perms[:, 1:] = rng.permuted(perms[:, 1:], axis=1)
+        block = to_placements(perms)
+        keys = compiled.vertex_weight_objective(block)
+        block_sds = compiled.objective_sd(keys)
+        i = int(np.argmin(keys))
+        if best_key is None or keys[i] < best_key:
+            best_key, best_weights = keys[i], block[i].tolist()
+        if incumbent_sd is not None:
+            better_count += int((block_sds < incumbent_sd - BOUND_TOLERANCE).sum())
+        sds[num_samples:num_samples + len(block)] = block_sds
+        num_samples += len(block)
+
+    return sds[:num_samples], best_weights, better_count
@@ -0,0 +1,94 @@
+"""
+Objectives that score a whole block of face weights at once. Every function takes a 2d array with one placement of face
+weights per row and returns one score per row, lower is better.
+"""
+import numpy as np
+
+
+def vertex_weight_sd(block: np.ndarray, incidence: np.ndarray) -> np.ndarray:
+    """
+    The population sd of the die vertex weights
+    :param block: face weights, one placement per row
+    :param incidence: a (vertices x faces) matrix holding 1 / (faces on the vertex) where a face touches a vertex
+    :return: the sd of each placement
+    """
+    return (block @ incidence.T).std(axis=1)
+
+
+def cycle_sums(block: np.ndarray, membership: np.ndarray) -> np.ndarray:
+    """
+    The sums of the face weights around each die vertex, in exact integers. The product runs in float64 so it can use
+    BLAS, which is several times faster than numpy's integer matmul, and it is exact as the sums are far below 2^53.
+    :param block: integer face weights, one placement per row
+    :param membership: a (vertices x faces) matrix holding 1 where a face touches a vertex
+    :return: a (placements x vertices) int64 array of cycle sums
+    """
+    return (block @ membership.T.astype(np.float64)).astype(np.int64)
+
+
+def vertex_weight_objective(block: np.ndarray, membership: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    The population variance of the die vertex weights in exact integers, so that equal placements tie exactly. With L
+    the lcm of the cycle lengths, y = cycle sum * L / cycle length and m vertices, m^2 * L^2 * variance =
+    m * sum(y^2) - sum(y)^2. This works for mixed cycle lengths too.
+    :param block: integer face weights, one placement per row
+    :param membership: a (vertices x faces) matrix holding 1 where a face touches a vertex
+    :param scale: L / cycle length for each vertex
+    :return: the int64 objective of each placement, see objective_sd to turn it into an sd
+    """
+    y = cycle_sums(block, membership) * scale
+    return len(scale) * (y * y).sum(axis=1) - y.sum(axis=1) ** 2
+
+
+def objective_sd(objective, num_cycles: int, lcm: int):
+    """
+    :param objective: values of vertex_weight_objective
+    :param num_cycles: the number of die vertices
+    :param lcm: the lcm of the cycle lengths
+    :return: the vertex weight sds they stand for
+    """
+    return np.sqrt(objective) / (num_cycles * lcm)
+
+
+def edge_sum_sd(block: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    The population sd of the sums of adjacent faces
+    :param block: face weights, one placement per row
+    :param edges: a (2 x edges) array of the face indices at each end of a die edge
+    :return: the sd of each placement
+    """
+    return (block[:, edges[0]] + block[:, edges[1]]).std(axis=1)
+
+
+def opposing_halves_imbalance(block: np.ndarray, halves: np.ndarray) -> np.ndarray:
+    """
+    The largest difference between the face weight totals of two opposing halves of the die
+    :param block: face weights, one placement per row
+    :param halves: a (opposing pairs x faces) matrix with 1 for the faces in one half, -1 for the faces in the other
+    :return: the imbalance of each placement
+    """
+    return np.abs(block @ halves.T).max(axis=1)
+
+
+def consecutive_adjacencies(block: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    The number of die edges between faces with consecutive numbers
+    :param block: face weights, one placement per row
+    :param edges: a (2 x edges) array of the face indices at each end of a die edge
+    :return: the count for each placement
+    """
+    return (np.abs(block[:, edges[0]] - block[:, edges[1]]) == 1).sum(axis=1)
+
+
+def geometric_moment(block: np.ndarray, lever_arms: np.ndarray, value_masses: np.ndarray = None) -> np.ndarray:
+    """
+    The size of the moment of the face values (or the masses they represent) about the die centroid. A perfectly
+    balanced placement has no moment.
+    :param block: face weights, one placement per row
+    :param lever_arms: a (faces x 3) array of the offsets of the face centroids from the die centroid
+    :param value_masses: an optional lookup of the mass each face value represents, indexed by the value. The value
+        itself is used when not given
+    :return: the size of the moment of each placement
+    """
+    masses = block if value_masses is None else value_masses[block]
+    return np.linalg.norm(masses @ lever_arms, axis=1)
@@ -0,0 +1,278 @@
+import contextlib
+import json
+import math
+import os
+import socket
+import sqlite3
+import time
+
+import numpy as np
+
+from utils.compiled import CompiledDie
+from utils.generators import ranked_placements
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    objective INTEGER,
+    rank INTEGER,
+    weights TEXT
+);
+"""
+
+
+class ShardQueue:
+    def __init__(self, path: str, timeout: float = 60.0):
+        """
+        A queue of shards of a ranked placement space, in a SQLite file. Any process that can open the file, on any node
+        of a shared file system with working file locks, can lease shards from it. Leases expire unless they are renewed,
+        so the shards of a worker that crashed are leased again. Lease times are wall clock times, so the nodes' clocks
+        must agree to well within a lease.
+        :param path: the SQLite file, created if it does not exist
+        :param timeout: the number of seconds to wait for another process's lock on the file
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    @contextlib.contextmanager
+    def __write__(self):
+        """
+        A write transaction, only one process at a time can change the queue
+        :return: the connection
+        """
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def publish(self, job: dict, bounds: list[int]) -> bool:
+        """
+        Publishes a job once. Publishing the same job again leaves the queue, and any progress on it, as it is
+        :param job: the json-able description of the job, which workers read back with job()
+        :param bounds: the shard boundaries, shard i covers the ranks bounds[i] to bounds[i + 1]
+        :throws: a ValueError if the queue holds a different job
+        :return: whether the job was new
+        """
+        value = json.dumps(job, sort_keys=True)
+        with self.__write__() as connection:
+            existing = connection.execute("SELECT value FROM job WHERE key = 'job'").fetchone()
+            if existing is None:
+                connection.execute("INSERT INTO job VALUES ('job', ?)", (value,))
+                connection.executemany("INSERT INTO shards (start, stop) VALUES (?, ?)", zip(bounds, bounds[1:]))
+        if existing is not None and existing[0] != value:
+            raise ValueError("The shard queue at {} holds a different job".format(self.path))
+        return existing is None
+
+    def job(self) -> dict:
+        """
+        :return: the published job, None if there is none yet
+        """
+        row = self.connection.execute("SELECT value FROM job WHERE key = 'job'").fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def lease(self, worker: str, lease_seconds: float):
+        """
+        Leases the first shard that is not done and not leased, or whose lease has expired
+        :param worker: a name for the worker that is unique across nodes
+        :param lease_seconds: how long the lease lasts unless it is renewed
+        :return: (shard id, first rank, one past the last rank), or None if no shard can be leased right now
+        """
+        now = time.time()
+        with self.__write__() as connection:
+            row = connection.execute(
+                "SELECT id, start, stop FROM shards WHERE done = 0 AND (worker IS NULL OR lease_expires < ?) "
+                "ORDER BY id LIMIT 1", (now,)
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE shards SET worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + lease_seconds, row[0])
+                )
+        return row
+
+    def renew(self, shard_id: int, worker: str, lease_seconds: float) -> bool:
+        """
+        Extends a lease, the heartbeat of a worker
+        :param shard_id: the leased shard
+        :param worker: the worker holding the lease
+        :param lease_seconds: how long from now the lease lasts
+        :return: whether the worker still held the lease. If not, the shard went to another worker
+        """
+        with self.__write__() as connection:
+            cursor = connection.execute(
+                "UPDATE shards SET lease_expires = ? WHERE id = ? AND worker = ? AND done = 0",
+                (time.time() + lease_seconds, shard_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, shard_id: int, worker: str, objective: int, rank: int, weights: list[int]) -> bool:
+        """
+        Records the optimum of a shard
+        :param shard_id: the leased shard
+        :param worker: the worker holding the lease
+        :param objective: the exact integer objective of the shard's best placement
+        :param rank: the rank of the shard's best placement, the lowest of any ties
+        :param weights: the face weights of the shard's best placement
+        :return: whether the worker still held the lease. If not, the result is dropped for the new holder's
+        """
+        with self.__write__() as connection:
+            cursor = connection.execute(
+                "UPDATE shards SET done = 1, objective = ?, rank = ?, weights = ? WHERE id = ? AND worker = ? "
+                "AND done = 0", (objective, rank, json.dumps(weights), shard_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def progress(self) -> dict[str, int]:
+        """
+        :return: the number of shards that are done, leased and waiting
+        """
+        done, leased, total = self.connection.execute(
+            "SELECT COALESCE(SUM(done), 0), COALESCE(SUM(done = 0 AND worker IS NOT NULL AND lease_expires >= ?), 0), "
+            "COUNT(*) FROM shards", (time.time(),)
+        ).fetchone()
+        return {"done": done, "leased": leased, "waiting": total - done - leased}
+
+    def next_expiry(self) -> float:
+        """
+        :return: the earliest expiry time of the leases of unfinished shards, inf if there are none
+        """
+        expiry, = self.connection.execute("SELECT MIN(lease_expires) FROM shards WHERE done = 0").fetchone()
+        return math.inf if expiry is None else expiry
+
+    def results(self) -> list[tuple[int, int, list[int], int]]:
+        """
+        :return: the (objective, rank, weights, attempts) of each finished shard, by shard id
+        """
+        rows = self.connection.execute(
+            "SELECT objective, rank, weights, attempts FROM shards WHERE done = 1 ORDER BY id"
+        ).fetchall()
+        return [(objective, rank, json.loads(weights), attempts) for objective, rank, weights, attempts in rows]
+
+
+def publish_shards(path: str, job: dict, num_placements: int, shard_size: int) -> bool:
+    """
+    Splits a ranked placement space into shards of about equal size and publishes them
+    :param path: the SQLite file of the queue
+    :param job: the json-able description of the job, see job_space, and the block_size workers score at once
+    :param num_placements: the number of placements in the space
+    :param shard_size: about the number of placements per shard
+    :return: whether the job was new, see ShardQueue.publish
+    """
+    num_shards = max(1, math.ceil(num_placements / shard_size))
+    queue = ShardQueue(path)
+    try:
+        return queue.publish(job, [num_placements * i // num_shards for i in range(num_shards + 1)])
+    finally:
+        queue.close()
+
+
+def job_space(job: dict):
+    """
+    :param job: a published job: num_faces, opposing_faces, locked_opposing_faces and cycles as face indices
+    :return: the compiled die and the ranked placement function of the job
+    """
+    compiled = CompiledDie(job["num_faces"], job["cycles"], [], [tuple(p) for p in job["opposing_faces"]])
+    _, placement_block = ranked_placements(job["num_faces"], job["opposing_faces"], job["locked_opposing_faces"])
+    return compiled, placement_block
+
+
+def optimum_of_ranks(compiled: CompiledDie, placement_block, start: int, stop: int, block_size: int, heartbeat=None):
+    """
+    Finds the best placement of a range of ranks by the exact integer vertex weight objective
+    :param compiled: the compiled die
+    :param placement_block: a function from (start, stop) to the block of placements with those ranks
+    :param start: the first rank
+    :param stop: one past the last rank
+    :param block_size: the number of placements scored together
+    :param heartbeat: an optional function called between blocks, the search stops early if it returns False
+    :return: (objective, rank, weights) of the best placement, the lowest rank winning ties, or None if stopped early
+    """
+    best = None
+    for block_start in range(start, stop, block_size):
+        if heartbeat is not None and not heartbeat():
+            return None
+        block = placement_block(block_start, min(block_start + block_size, stop))
+        objective = compiled.vertex_weight_objective(block)
+        i = int(np.argmin(objective))
+        if best is None or objective[i] < best[0]:
+            best = int(objective[i]), block_start + i, block[i].tolist()
+    return best
+
+
+def shard_worker(path: str, worker: str = None, lease_seconds: float = 60.0, poll_seconds: float = 1.0) -> int:
+    """
+    Leases and searches shards until every shard of the queue is done. The lease is renewed between blocks once a third
+    of it has passed. Runs on any node that can open the queue, in as many processes as there are cores to spare.
+    :param path: the SQLite file of the queue
+    :param worker: a name for the worker that is unique across nodes, the host name and process id by default
+    :param lease_seconds: how long a lease lasts without a heartbeat
+    :param poll_seconds: the longest wait before looking for a shard again while all of them are leased to others
+    :return: the number of shards this worker completed
+    """
+    worker = worker or "{}-{}".format(socket.gethostname(), os.getpid())
+    queue = ShardQueue(path)
+    try:
+        job = queue.job()
+        if job is None:
+            raise ValueError("No job has been published to {}".format(path))
+        compiled, placement_block = job_space(job)
+        completed = 0
+        while True:
+            shard = queue.lease(worker, lease_seconds)
+            if shard is None:
+                progress = queue.progress()
+                if not progress["leased"] and not progress["waiting"]:
+                    return completed
+                time.sleep(max(0.0, min(poll_seconds, queue.next_expiry() - time.time())))
+                continue
+
+            shard_id, start, stop = shard
+            renewed = [time.monotonic()]
+
+            def heartbeat() -> bool:
+                if time.monotonic() - renewed[0] < lease_seconds / 3:
+                    return True
+                renewed[0] = time.monotonic()
+                return queue.renew(shard_id, worker, lease_seconds)
+
+            best = optimum_of_ranks(compiled, placement_block, start, stop, job["block_size"], heartbeat)
+            if best is not None and queue.complete(shard_id, worker, *best):
+                completed += 1
+    finally:
+        queue.close()
+
+
+def reduce_shards(path: str) -> tuple[int, int, list[int], int]:
+    """
+    Merges the shard optima of a finished queue. The lowest objective wins, then the lowest rank, so the result does not
+    depend on which workers searched which shards, or in what order
+    :param path: the SQLite file of the queue
+    :throws: a ValueError if the queue has no shards or some shards are not done
+    :return: (objective, rank, weights) of the best placement of the space, and the number of leases the shards took
+    """
+    queue = ShardQueue(path)
+    try:
+        progress = queue.progress()
+        if progress["leased"] or progress["waiting"]:
+            raise ValueError("{} shards of {} are not done".format(progress["leased"] + progress["waiting"], path))
+        results = queue.results()
+    finally:
+        queue.close()
+    if not results:
+        raise ValueError("{} has no shards, publish a search to it first".format(path))
+    objective, rank, weights, _ = min(results, key=lambda r: (r[0], r[1]))
+    return objective, rank, weights, sum(r[3] for r in results)
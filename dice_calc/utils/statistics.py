@@ -0,0 +1,116 @@
+import numpy as np
+
+from utils.compiled import CompiledDie
+
+
+class SdDistribution:
+    def __init__(self, bins: int, high: float):
+        """
+        A constant memory summary of a stream of vertex weight sds: a histogram with fixed bins over [0, high], and the
+        count, mean, variance, min and max. Summaries of parts of a stream can be merged.
+        :param bins: the number of histogram bins
+        :param high: the upper edge of the last bin, larger sds are counted in the last bin
+        """
+        self.edges = np.linspace(0, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, sds: np.ndarray):
+        """
+        Counts a block of sds
+        :param sds: the sds
+        :return: None
+        """
+        if not len(sds):
+            return
+        bins = np.clip(np.searchsorted(self.edges, sds, side="right") - 1, 0, len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        mean = float(sds.mean())
+        self.__merge_moments__(len(sds), mean, float(((sds - mean) ** 2).sum()))
+        self.min = min(self.min, float(sds.min()))
+        self.max = max(self.max, float(sds.max()))
+
+    def __merge_moments__(self, count: int, mean: float, m2: float):
+        # Chan et al.'s parallel update of the mean and sum of squared differences
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def merge(self, other):
+        """
+        Adds the counts of a summary of another part of the stream, with the same bins
+        :param other: the other summary
+        :return: this summary
+        """
+        assert np.array_equal(self.edges, other.edges), "Only summaries with the same bins can be merged"
+        if other.count:
+            self.counts += other.counts
+            self.__merge_moments__(other.count, other.mean, other.m2)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile, interpolating within its bin
+        :param q: the quantile, between 0 and 1
+        :return: the sd below which a fraction q of the placements lie
+        """
+        target = q * self.count
+        cumulative = np.cumsum(self.counts)
+        i = min(int(np.searchsorted(cumulative, target, side="left")), len(self.counts) - 1)
+        below = cumulative[i - 1] if i else 0
+        inside = (target - below) / self.counts[i] if self.counts[i] else 0.0
+        value = self.edges[i] + inside * (self.edges[i + 1] - self.edges[i])
+        return float(np.clip(value, self.min, self.max))
+
+    def percentile_of(self, sd: float) -> float:
+        """
+        Estimates where an sd falls in the distribution, interpolating within its bin
+        :param sd: the sd, for example of an existing placement
+        :return: the percentage of placements with a lower sd
+        """
+        if sd <= self.min:
+            return 0.0
+        if sd > self.max:
+            return 100.0
+        i = int(np.clip(np.searchsorted(self.edges, sd, side="right") - 1, 0, len(self.counts) - 1))
+        inside = np.clip((sd - self.edges[i]) / (self.edges[i + 1] - self.edges[i]), 0, 1)
+        return float(100 * (self.counts[:i].sum() + inside * self.counts[i]) / self.count)
+
+    def __str__(self):
+        return "{} placements, sd mean {:.4f}, sd {:.4f}, min {:.4f}, median {:.4f}, max {:.4f}".format(
+            self.count, self.mean, self.variance ** 0.5, self.min, self.quantile(0.5), self.max
+        )
+
+
+def sd_distribution_of_ranks(compiled: CompiledDie, placement_block, start: int, stop: int, bins: int, high: float,
+                             block_size: int) -> SdDistribution:
+    """
+    Summarizes the vertex weight sds of a range of ranked placements. Runs in worker processes, so it only takes
+    picklable arguments.
+    :param compiled: the compiled die
+    :param placement_block: a function from (start, stop) to a block of placements with those ranks
+    :param start: the first rank
+    :param stop: one past the last rank
+    :param bins: the number of histogram bins
+    :param high: the upper edge of the last bin
+    :param block_size: the number of placements scored together
+    :return: the summary
+    """
+    distribution = SdDistribution(bins, high)
+    score = compiled.objective("vertex_weight_sd")
+    for block_start in range(start, stop, block_size):
+        block = placement_block(block_start, min(block_start + block_size, stop))
+        distribution.add(score(block))
+    return distribution
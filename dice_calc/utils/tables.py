@@ -0,0 +1,143 @@
+import json
+
+import numpy as np
+
+from utils.compiled import CompiledDie
+from utils.generators import rank_permutations
+
+FIXED_POINT_MAX = np.iinfo(np.uint16).max
+
+
+class SdTable:
+    def __init__(self, path: str, sds: np.ndarray, scale: float, num_faces: int, opposing_faces: list[tuple[int, int]],
+                 locked_opposing_faces: bool, placement_block):
+        """
+        The vertex weight sd of every placement in a search space, indexed by placement rank and stored in a memory
+        mapped .npy file, so repeated questions about a space are scans over the file instead of new searches. Build
+        one with Die.materialize_vertex_weight_sd_table, and open it again with Die.open_vertex_weight_sd_table.
+        :param path: the .npy file
+        :param sds: the memory mapped sds (float32, or uint16 fixed point)
+        :param scale: the sd of one fixed point step, 1 for float tables
+        :param num_faces: the number of faces on the die
+        :param opposing_faces: the opposing face pairs of the die
+        :param locked_opposing_faces: whether the space is that of the locked opposing faces searches
+        :param placement_block: a function from (start, stop) to the block of placements with those ranks
+        """
+        self.path = path
+        self.sds = sds
+        self.scale = scale
+        self.num_faces = num_faces
+        self.opposing_faces = opposing_faces
+        self.locked_opposing_faces = locked_opposing_faces
+        self.placement_block = placement_block
+
+    def __len__(self):
+        return len(self.sds)
+
+    def sd(self, ranks) -> np.ndarray:
+        """
+        :param ranks: a rank, or an array of them
+        :return: the sds of the placements with those ranks
+        """
+        return np.asarray(self.sds[ranks], dtype=np.float64) * self.scale
+
+    def placement(self, rank: int) -> list[int]:
+        """
+        :param rank: a placement rank
+        :return: the face weights of the placement
+        """
+        return self.placement_block(int(rank), int(rank) + 1)[0].tolist()
+
+    def rank_of(self, weights: list[int]) -> int:
+        """
+        :param weights: the face weights of a placement in the table's space
+        :throws: a ValueError if the weights are not a placement in the table's space
+        :return: the placement's rank
+        """
+        weights = np.asarray(weights)
+        if sorted(weights.tolist()) != list(range(1, self.num_faces + 1)):
+            raise ValueError("The placement does not put the values 1 to {} on the faces".format(self.num_faces))
+        if weights[0] != 1:
+            raise ValueError("Face 1 always holds the value 1 in the ranked spaces")
+        if not self.locked_opposing_faces:
+            return int(rank_permutations(weights[None, 1:], np.arange(2, self.num_faces + 1))[0])
+        for i, j in self.opposing_faces:
+            low, high = weights[i - 1], weights[j - 1]
+            if low + high != self.num_faces + 1 or (1 not in (i, j) and low > high):
+                raise ValueError("Opposing faces {} and {} must add up to {} with the lower value on face {}".format(
+                    i, j, self.num_faces + 1, i))
+        low_values = [weights[i - 1] for i, j in self.opposing_faces if 1 not in (i, j)]
+        return int(rank_permutations(np.array([low_values]), np.arange(2, self.num_faces // 2 + 1))[0])
+
+    def __chunks__(self, chunk_size: int):
+        for start in range(0, len(self.sds), chunk_size):
+            yield start, self.sd(slice(start, start + chunk_size))
+
+    def percentile_of(self, sd: float, chunk_size: int = 1 << 20) -> float:
+        """
+        :param sd: a vertex weight sd
+        :param chunk_size: the number of table entries read at a time
+        :return: the percentage of placements with a lower sd
+        """
+        return 100 * sum(int((sds < sd).sum()) for _, sds in self.__chunks__(chunk_size)) / len(self.sds)
+
+    def ranks_below(self, threshold: float, chunk_size: int = 1 << 20) -> np.ndarray:
+        """
+        :param threshold: a vertex weight sd
+        :param chunk_size: the number of table entries read at a time
+        :return: the ranks of all placements with an sd at or below the threshold
+        """
+        found = [start + np.flatnonzero(sds <= threshold) for start, sds in self.__chunks__(chunk_size)]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def best(self, fixed: dict[int, int] = None, chunk_size: int = 1 << 16) -> tuple[list[int], float]:
+        """
+        Finds the best placement, optionally among those with some face values fixed
+        :param fixed: {face number: value} that the placement must have
+        :param chunk_size: the number of table entries read at a time
+        :return: the face weights of the best placement, and its sd. The lowest rank wins ties
+        """
+        best_rank, best_sd = None, np.inf
+        for start, sds in self.__chunks__(chunk_size):
+            if fixed:
+                placements = self.placement_block(start, start + len(sds))
+                allowed = np.all([placements[:, face - 1] == value for face, value in fixed.items()], axis=0)
+                sds = np.where(allowed, sds, np.inf)
+            i = int(np.argmin(sds))
+            if sds[i] < best_sd:
+                best_rank, best_sd = start + i, float(sds[i])
+        if best_rank is None:
+            raise ValueError("No placement has the fixed face values {}".format(fixed))
+        return self.placement(best_rank), best_sd
+
+
+def write_sd_table(path: str, compiled: CompiledDie, num_placements: int, placement_block, dtype: str = "float32",
+                   block_size: int = 65536, metadata: dict = None) -> tuple[np.ndarray, float]:
+    """
+    Scores every ranked placement into a memory mapped .npy file, with the metadata next to it in <path>.json
+    :param path: the .npy file to write
+    :param compiled: the compiled die
+    :param num_placements: the number of placements in the space
+    :param placement_block: a function from (start, stop) to the block of placements with those ranks
+    :param dtype: "float32", or "uint16" for fixed point sds at half the size
+    :param block_size: the number of placements scored together
+    :param metadata: what else to store about the table
+    :return: the memory mapped sds, and the sd of one fixed point step
+    """
+    if dtype not in ("float32", "uint16"):
+        raise ValueError("Tables are stored as float32 or uint16 fixed point")
+    num_faces = compiled.num_faces
+    score = compiled.objective("vertex_weight_sd")
+    # vertex weights are averages of face values, so they can be at most half the range of the values apart
+    scale = (num_faces - 1) / 2 / FIXED_POINT_MAX if dtype == "uint16" else 1.0
+
+    sds = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(num_placements,))
+    for start in range(0, num_placements, block_size):
+        stop = min(start + block_size, num_placements)
+        block_sds = score(placement_block(start, stop))
+        sds[start:stop] = np.rint(block_sds / scale) if dtype == "uint16" else block_sds
+    sds.flush()
+
+    with open(path + ".json", "w") as f:
+        json.dump(dict(metadata or {}, dtype=dtype, scale=scale, num_placements=num_placements), f)
+    return np.lib.format.open_memmap(path, mode="r"), scale